@@ -506,7 +506,7 @@ class DemandSource(object):
 
 	# DEMAND GENERATION
 
-	def generate_demand(self, period=None):
+	def generate_demand(self, period=None, rng=None):
 		"""Generate a demand value using the demand type specified in ``type``.
 		If ``type`` is ``None``, returns ``None``.
 
@@ -516,6 +516,9 @@ class DemandSource(object):
 			The period to generate a demand value for. If ``type`` = 'D' (deterministic),
 			this is required if ``demand_list`` is a list of demands, one per period. If omitted,
 			will return first (or only) demand in list.
+		rng : :class:`numpy.random.Generator` or :class:`numpy.random.RandomState`, optional
+			Random number generator to draw the demand from. If omitted, the global ``numpy.random``
+			generator is used.
 
 		Returns
 		-------
@@ -526,20 +529,22 @@ class DemandSource(object):
 
 		if self.type is None:
 			return None
+		if rng is None:
+			rng = np.random
 		if self.type == 'N':
-			demand = self._generate_demand_normal()
+			demand = self._generate_demand_normal(rng)
 		elif self.type == 'P':
-			demand = self._generate_demand_poisson()
+			demand = self._generate_demand_poisson(rng)
 		elif self.type == 'UD':
-			demand = self._generate_demand_uniform_discrete()
+			demand = self._generate_demand_uniform_discrete(rng)
 		elif self.type == 'UC':
-			demand = self._generate_demand_uniform_continuous()
+			demand = self._generate_demand_uniform_continuous(rng)
 		elif self.type == 'NB':
-			demand = self._generate_demand_negative_binomial()
+			demand = self._generate_demand_negative_binomial(rng)
 		elif self.type == 'D':
 			demand = self._generate_demand_deterministic(period)
 		elif self.type == 'CD':
-			demand = self._generate_demand_custom_discrete()
+			demand = self._generate_demand_custom_discrete(rng)
 		else:
 			demand = None
 
@@ -548,60 +553,160 @@ class DemandSource(object):
 
 		return demand
 
-	def _generate_demand_normal(self):
+	def generate_demands(self, num_periods, size=None, rng=None):
+		"""Generate demand values for periods 0, ..., ``num_periods`` - 1 in a single vectorized draw,
+		using the demand type specified in ``type``. If ``size`` is provided, generate ``size``
+		independent demand paths. If ``type`` is ``None``, returns ``None``.
+
+		Each path contains the same values as ``num_periods`` successive calls to :func:`generate_demand`
+		(for periods 0, ..., ``num_periods`` - 1) that draw from the same random number generator, and the
+		generator is left in the same state. If ``size`` is provided, the paths are drawn one after the other.
+
+		Parameters
+		----------
+		num_periods : int
+			Number of periods to generate demands for.
+		size : int, optional
+			Number of demand paths to generate. If omitted, a single path is generated.
+		rng : :class:`numpy.random.Generator` or :class:`numpy.random.RandomState`, optional
+			Random number generator to draw the demands from. If omitted, the global ``numpy.random``
+			generator is used.
+
+		Returns
+		-------
+		demands : ndarray
+			Array of shape (``num_periods``,), or (``size``, ``num_periods``) if ``size`` is provided,
+			containing the demand values.
+
+		"""
+
+		if self.type is None:
+			return None
+		if rng is None:
+			rng = np.random
+		shape = num_periods if size is None else (size, num_periods)
+		if self.type == 'N':
+			demands = np.maximum(0, rng.normal(self.mean, self.standard_deviation, shape))
+		elif self.type == 'P':
+			demands = rng.poisson(self.mean, shape)
+		elif self.type == 'UD':
+			if isinstance(rng, np.random.Generator):
+				demands = rng.integers(int(self.lo), int(self.hi) + 1, shape)
+			else:
+				demands = rng.randint(int(self.lo), int(self.hi) + 1, shape)
+		elif self.type == 'UC':
+			demands = rng.uniform(self.lo, self.hi - self.lo, shape)
+		elif self.type == 'NB':
+			demands = rng.negative_binomial(self.n, self.p, shape).astype(float)
+		elif self.type == 'D':
+			if is_iterable(self.demand_list):
+				# Loop back to the beginning of demand_list if we are past its end.
+				demands = np.array(self.demand_list)[np.arange(num_periods) % len(self.demand_list)]
+			else:
+				demands = np.full(num_periods, self.demand_list)
+			if size is not None:
+				demands = np.tile(demands, (size, 1))
+		elif self.type == 'CD':
+			demands = rng.choice(self.demand_list, size=shape, p=self.probabilities)
+		else:
+			return None
+
+		if self.round_to_int:
+			demands = np.round(demands).astype(int)
+
+		return demands
+
+	def _generate_demand_normal(self, rng=None):
 		"""Generate demand from normal distribution.
 
+		Parameters
+		----------
+		rng : :class:`numpy.random.Generator` or :class:`numpy.random.RandomState`, optional
+			Random number generator. If omitted, the global ``numpy.random`` generator is used.
+
 		Returns
 		-------
 		demand : float
 			The demand value.
 
 		"""
-		return max(0, float(np.random.normal(self.mean, self.standard_deviation)))
+		if rng is None:
+			rng = np.random
+		return max(0, float(rng.normal(self.mean, self.standard_deviation)))
 
-	def _generate_demand_poisson(self):
+	def _generate_demand_poisson(self, rng=None):
 		"""Generate demand from Poisson distribution.
 
+		Parameters
+		----------
+		rng : :class:`numpy.random.Generator` or :class:`numpy.random.RandomState`, optional
+			Random number generator. If omitted, the global ``numpy.random`` generator is used.
+
 		Returns
 		-------
 		demand : int
 			The demand value.
 
 		"""
-		return int(np.random.poisson(self.mean))
+		if rng is None:
+			rng = np.random
+		return int(rng.poisson(self.mean))
 
-	def _generate_demand_uniform_discrete(self):
+	def _generate_demand_uniform_discrete(self, rng=None):
 		"""Generate demand from discrete uniform distribution.
 
+		Parameters
+		----------
+		rng : :class:`numpy.random.Generator` or :class:`numpy.random.RandomState`, optional
+			Random number generator. If omitted, the global ``numpy.random`` generator is used.
+
 		Returns
 		-------
 		demand : float
 			The demand value.
 
 		"""
-		return int(np.random.randint(int(self.lo), int(self.hi) + 1))
+		if rng is None:
+			rng = np.random
+		if isinstance(rng, np.random.Generator):
+			return int(rng.integers(int(self.lo), int(self.hi) + 1))
+		return int(rng.randint(int(self.lo), int(self.hi) + 1))
 
-	def _generate_demand_uniform_continuous(self):
+	def _generate_demand_uniform_continuous(self, rng=None):
 		"""Generate demand from continuous uniform distribution.
 
+		Parameters
+		----------
+		rng : :class:`numpy.random.Generator` or :class:`numpy.random.RandomState`, optional
+			Random number generator. If omitted, the global ``numpy.random`` generator is used.
+
 		Returns
 		-------
 		demand : float
 			The demand value.
 
 		"""
-		return float(np.random.uniform(self.lo, self.hi - self.lo))
+		if rng is None:
+			rng = np.random
+		return float(rng.uniform(self.lo, self.hi - self.lo))
 
-	def _generate_demand_negative_binomial(self):
+	def _generate_demand_negative_binomial(self, rng=None):
 		"""Generate demand from negative binomial distribution.
 
+		Parameters
+		----------
+		rng : :class:`numpy.random.Generator` or :class:`numpy.random.RandomState`, optional
+			Random number generator. If omitted, the global ``numpy.random`` generator is used.
+
 		Returns
 		-------
 		demand : int
 			The demand value.
 
 		"""
-		return float(np.random.negative_binomial(self.n, self.p))
+		if rng is None:
+			rng = np.random
+		return float(rng.negative_binomial(self.n, self.p))
 	
 	def _generate_demand_deterministic(self, period=None):
 		"""Generate deterministic demand.
@@ -630,16 +735,23 @@ class DemandSource(object):
 			# Return demand_list singleton.
 			return self.demand_list
 
-	def _generate_demand_custom_discrete(self):
+	def _generate_demand_custom_discrete(self, rng=None):
 		"""Generate demand from custom discrete distribution.
 
+		Parameters
+		----------
+		rng : :class:`numpy.random.Generator` or :class:`numpy.random.RandomState`, optional
+			Random number generator. If omitted, the global ``numpy.random`` generator is used.
+
 		Returns
 		-------
 		demand : float
 			The demand value.
 
 		"""
-		return np.random.choice(self.demand_list, p=self.probabilities)
+		if rng is None:
+			rng = np.random
+		return rng.choice(self.demand_list, p=self.probabilities)
 
 	# OTHER METHODS
 
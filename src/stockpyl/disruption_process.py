@@ -369,7 +369,7 @@ class DisruptionProcess(object):
 
 	# DISRUPTION STATE MANAGEMENT
 
-	def update_disruption_state(self, period=None):
+	def update_disruption_state(self, period=None, rng=None):
 		"""Update the disruption state using the type specified in ``random_process_type`` and
 		set the ``disrupted`` attribute accordingly. 
 
@@ -381,12 +381,15 @@ class DisruptionProcess(object):
 			The period to update the disruption state for. If ``random_process_type`` = 'E' (explicit), this is required
 			if ``disruption_state_list`` is a list of disruption states, one per period. If omitted,
 			will return first (or only) disruption state in list.
+		rng : :class:`numpy.random.Generator` or :class:`numpy.random.RandomState`, optional
+			Random number generator to draw the disruption state from. If omitted, the global
+			``numpy.random`` generator is used.
 		"""
 
 		if self.random_process_type is None:
 			disrupted = False
 		if self.random_process_type == 'M':
-			disrupted = self._generate_disruption_state_markovian()
+			disrupted = self._generate_disruption_state_markovian(rng)
 		elif self.random_process_type == 'E':
 			disrupted = self._generate_disruption_state_explicit(period)
 		else:
@@ -394,19 +397,26 @@ class DisruptionProcess(object):
 
 		self.disrupted = disrupted
 
-	def _generate_disruption_state_markovian(self):
+	def _generate_disruption_state_markovian(self, rng=None):
 		"""Generate new disruption state for a Markovian disruption process.
 
+		Parameters
+		----------
+		rng : :class:`numpy.random.Generator` or :class:`numpy.random.RandomState`, optional
+			Random number generator. If omitted, the global ``numpy.random`` generator is used.
+
 		Returns
 		-------
 		disrupted : bool
 			``True`` if the new disruption state is disrupted, ``False`` otherwise.
 
 		"""
+		if rng is None:
+			rng = np.random
 		if self.disrupted:
-			return np.random.rand() <= 1 - self.recovery_probability
+			return rng.random() <= 1 - self.recovery_probability
 		else:
-			return np.random.rand() <= self.disruption_probability
+			return rng.random() <= self.disruption_probability
 
 	def _generate_disruption_state_explicit(self, period=None):
 		"""Generate explicit disruption state.
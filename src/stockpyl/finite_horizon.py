@@ -54,7 +54,9 @@ def finite_horizon_dp(
 		d_spread=4,
 		s_spread=5,
 		oul_matrix=None,
-		x_range=None):
+		x_range=None,
+		policy_only=False,
+		warm_start=None):
 	"""
 	Solve the finite-horizon inventory optimization problem, with or without
 	fixed costs, minimizing the expected discounted cost over the time horizon,
@@ -166,6 +168,27 @@ def finite_horizon_dp(
 	x_range : ndarray, optional
 		User-specified list of :math:`x`-values used in the discretization, i.e.,
 		indices of the columns of ``cost_matrix`` and ``oul_matrix``. 
+	policy_only : bool, optional
+		If ``True``, only the optimal policy and total cost are calculated: the DP
+		costs are kept only for the current and next period, and ``cost_matrix`` and
+		``oul_matrix`` are returned as ``None``. This uses memory proportional to the
+		size of the :math:`x`-range, rather than to :math:`T` times it. Default = ``False``.
+	warm_start : dict, optional
+		Dict in which the solution is stored so that it can be re-used by a later
+		call, e.g., when the problem is re-planned with updated forecasts. Pass an
+		empty dict on the first call and the same dict on later calls. The demand
+		probabilities of each demand source (and truncation) are kept, so they are
+		calculated only for demand sources that were not used in the previous solve.
+		In addition, since :math:`\\theta_t` depends only on the parameters of periods
+		:math:`t,\\ldots,T` and the terminal costs, the recursion is performed only for
+		the periods before the longest tail of periods whose parameters are the same as
+		the last periods of the previous solve; the others are copied. (The number of
+		such periods is stored in ``warm_start['num_periods_reused']``.) This helps only
+		if the end of the horizon is fixed and only early periods change; if the horizon
+		slides forward with a new last period, no periods are reused. If ``x_range`` is not
+		provided, the estimated :math:`x`-range is extended to include the previous one;
+		the results are the same as if the resulting ``x_range`` had been provided.
+		Cannot be used with ``oul_matrix`` or ``policy_only``.
 
 	Returns
 	-------
@@ -180,10 +203,11 @@ def finite_horizon_dp(
 		Matrix of DP costs; ``cost_matrix[t,x]`` = optimal expected cost
 		in periods :math:`t,\\ldots,T` if we begin period :math:`t` with
 		:math:`IL_t = x` (and act optimally thereafter). [:math:`\\theta_t(x)`]
+		``None`` if ``policy_only`` is ``True``.
 	oul_matrix : ndarray
 		Matrix of order-up-to levels; ``oul_matrix[t,x]`` = optimal
 		order-up-to level in period :math:`t` if we begin period :math:`t`
-		with :math:`IL_t = x`. ``t=0`` is ignored.
+		with :math:`IL_t = x`. ``t=0`` is ignored. ``None`` if ``policy_only`` is ``True``.
 	x_range : list
 		List of :math:`x`-values used in the discretization, i.e.,
 		indices of the columns of ``cost_matrix`` and ``oul_matrix``.
@@ -205,6 +229,8 @@ def finite_horizon_dp(
 	ValueError
 		If ``oul_matrix`` is provided but ``x_range`` is not, or ``x_range`` does not contain all
 		values in ``oul_matrix``.
+	ValueError
+		If ``warm_start`` is provided together with ``oul_matrix`` or ``policy_only``.
 
 
 	**Equation Used** (equation (4.66)):
@@ -221,10 +247,9 @@ def finite_horizon_dp(
 
 	**Truncation and Discretization** are performed as follows:
 
-		1. Range of demand values is truncated at :math:`\\mu \pm` ``d_spread``:math:`\\sigma`,
+		1. Range of demand values in each period is truncated at :math:`\\mu \pm` ``d_spread``:math:`\\sigma`,
 		where :math:`\\mu` and :math:`\\sigma` are the mean and 
-		standard deviation of the demand, truncating also at 0, and accounting conservatively
-		for the variations in demand parameters across periods.
+		standard deviation of the demand in that period, truncating also at 0.
 
 		2. If the total probability of demand outside the demand range in any time period
 		is greater than ``trunc_tol``, a warning is issued.
@@ -247,8 +272,10 @@ def finite_horizon_dp(
 		7. If, at any point in the optimization, the optimal order-up-to level for any :math:`x`
 		and :math:`t` is the largest value in the :math:`x`-range, suggesting that the uppper end
 		of the range is too low and that the optimal order-up-to level may be greater than it, the
-		optimization is terminated, the upper end of the :math:`x`-range is doubled,
-		and the optimization is restarted.
+		upper end of the :math:`x`-range is doubled, and the optimization is restarted
+		from period :math:`T`. (The values of :math:`H_t(y)` that were already calculated
+		remain valid and are re-used, so only the new values of :math:`y` are evaluated,
+		unless :math:`\\theta_{t+1}` changes.)
 
 		8. If, at any point in the optimization, the total probability of demand values
 		that could bring the inventory level below the smallest value in the :math:`x`-range is
@@ -278,6 +305,8 @@ def finite_horizon_dp(
 	if num_periods <= 0 or not is_integer(num_periods): raise ValueError("num_periods must be a positive integer")
 	if terminal_holding_cost < 0: raise ValueError("terminal_holding_cost must be non-negative")
 	if terminal_stockout_cost < 0: raise ValueError("terminal_stockout_cost must be non-negative")
+	if warm_start is not None and (oul_matrix is not None or policy_only):
+		raise ValueError("warm_start cannot be used with oul_matrix or policy_only")
 
 	# Replace scalar parameters with lists (multiple copies of scalar).
 	holding_cost = np.array(ensure_list_for_time_periods(holding_cost, num_periods, var_name="holding_cost"))
@@ -310,23 +339,22 @@ def finite_horizon_dp(
 	if (demand_mean is None or demand_sd is None) and demand_source is None:
 		raise ValueError("You must provide either demand_mean and demand_standard_deviation, or demand_source")
 	
-	# Determine truncation for D: mu +/- d_spread * sigma (but no negative values)
-	# (accounting appropriately for variations among periods)
-	d_min = int(max(0, round(np.min(demand_mean[1:]) - d_spread * np.max(demand_sd[1:]))))
-	d_max = int(round(np.max(demand_mean[1:]) + d_spread * np.max(demand_sd[1:])))
-	d_range = np.array(range(d_min, d_max + 1))
+	# Determine truncation for D in each period: mu +/- d_spread * sigma (but no negative values)
+	d_min = [0] * (num_periods+1)
+	d_max = [0] * (num_periods+1)
+	for t in range(1, num_periods + 1):
+		d_min[t] = int(max(0, round(demand_mean[t] - d_spread * demand_sd[t])))
+		d_max[t] = int(round(demand_mean[t] + d_spread * demand_sd[t]))
 
-	# Calculate total probability of demand outside d_range for each t, and
-	# raise warning if > trunc_tol for any t. (prob is an array.)
-	# Ignore entry 0 (o/w divide-by-0) but then add back an entry for 0 to keep
-	# things consistent.
-	prob = [demand_source[t].demand_distribution.cdf(d_min) + \
-		    (1 - demand_source[t].demand_distribution.cdf(d_max)) for t in range(1, num_periods + 1)]
-	# prob = norm.cdf(d_min, demand_mean[1:], demand_sd[1:]) + \
-	# 	   (1 - norm.cdf(d_max, demand_mean[1:], demand_sd[1:]))
-	prob = np.append([0], prob)
-	if np.any(prob > trunc_tol):
-		warnings.warn("Total probability of demand outside demand-truncation range exceeds trunc_tol for at least one period.")
+	# Record the demand source and truncation, and the other parameters, of each
+	# period (to identify periods that share demand probabilities, and for warm_start).
+	demand_keys = [None] * (num_periods+1)
+	period_keys = [None] * (num_periods+1)
+	for t in range(1, num_periods + 1):
+		demand_keys[t] = (tuple(tuple(v) if isinstance(v, (list, tuple, np.ndarray)) else v
+								for v in demand_source[t].to_dict().values()), d_min[t], d_max[t])
+		period_keys[t] = (holding_cost[t], stockout_cost[t], purchase_cost[t], fixed_cost[t],
+						  discount_factor[t], demand_keys[t])
 
 	# Calculate alpha (= p/(p+h)) in each period.
 	alpha = np.zeros(num_periods+1)
@@ -378,170 +406,476 @@ def finite_horizon_dp(
 		# period T to include terminal costs)
 		x_min = int(round(np.min(nv[1:]) - np.max(demand_mean[1:]) - np.max(demand_sd[1:]) * (s_spread + d_spread)))
 		x_max = int(round(np.max(nv[1:]) + np.max(Q[1:]) + np.max(demand_sd[1:]) * s_spread))
+		# If warm-starting, extend the range to include the previous one (which
+		# is needed to re-use the previous DP costs).
+		if warm_start:
+			x_min = min(x_min, int(warm_start['x_range'][0]))
+			x_max = max(x_max, int(warm_start['x_range'][-1]))
 		x_range = np.array(range(x_min, x_max+1))
 
+	# Determine number of periods at the end of the horizon whose DP costs can be
+	# copied from the previous solve: those in the longest tail of periods whose
+	# parameters match the last periods of the previous solve (with the same
+	# terminal costs and x-range).
+	num_reused = 0
+	if warm_start and warm_start['terminal_costs'] == (terminal_holding_cost, terminal_stockout_cost) \
+		and warm_start['x_range'][0] == x_min and warm_start['x_range'][-1] == x_max:
+		prev_keys = warm_start['period_keys']
+		while num_reused < min(num_periods, len(prev_keys) - 1) \
+			and period_keys[num_periods - num_reused] == prev_keys[-1 - num_reused]:
+			num_reused += 1
+
+	# Build demand distribution and probability vector for demand in each period
+	# (except reused periods). Periods with the same demand source and truncation
+	# share them, so each is calculated only once.
+	distribution = [None] * (num_periods+1)
+	prob = [None] * (num_periods+1)
+	prob_cache = dict(warm_start.get('demand_probabilities', {})) if warm_start else {}
+	for t in range(1, num_periods - num_reused + 1):
+		if demand_keys[t] not in prob_cache:
+			prob_cache[demand_keys[t]] = _demand_probabilities(demand_source[t], d_min[t], d_max[t])
+		distribution[t], prob[t] = prob_cache[demand_keys[t]]
+
+	# Calculate total probability of demand outside d_range for each t, and
+	# raise warning if > trunc_tol for any t. (prob_outside is an array.)
+	# Ignore entry 0 (o/w divide-by-0) but then add back an entry for 0 to keep
+	# things consistent.
+	prob_outside = [distribution[t].cdf(d_min[t]) + \
+		    (1 - distribution[t].cdf(d_max[t])) for t in range(1, num_periods - num_reused + 1)]
+	prob_outside = np.append([0], prob_outside)
+	if np.any(prob_outside > trunc_tol):
+		warnings.warn("Total probability of demand outside demand-truncation range exceeds trunc_tol for at least one period.")
+
 	# Note:
 	# - to get x value from index i, use x_range[i]
 	# - to get index from x value, use x - x_min
 	# Example: x_range = 10:20; then x_range[3] = 13 and 13 - x_min = 3.
 
-	# Start with initial truncation range; abort, expand, and re-try if necessary.
-	done = False
-	while not done:
+	# Allocate arrays. If policy_only, cost_matrix has only two rows (containing
+	# theta_t in row t % 2), and H and oul_matrix (if not provided) have only one.
+	reorder_points = [0] * (num_periods+1)
+	order_up_to_levels = [0] * (num_periods+1)
+	cost_matrix = np.zeros((2 if policy_only else num_periods+2, len(x_range)))
+	if not user_provided_oul_matrix:
+		oul_matrix = np.zeros((1 if policy_only else num_periods+1, len(x_range)))
+	H = np.zeros((1 if policy_only else num_periods+1, len(x_range)))
+
+	# Copy DP costs, OULs, and policy for reused periods from the previous solve.
+	if num_reused > 0:
+		prev_num_periods = len(warm_start['period_keys']) - 1
+		cost_matrix[num_periods-num_reused+1:, :] = warm_start['cost_matrix'][prev_num_periods-num_reused+1:, :]
+		oul_matrix[num_periods-num_reused+1:, :] = warm_start['oul_matrix'][prev_num_periods-num_reused+1:, :]
+		reorder_points[num_periods-num_reused+1:] = warm_start['reorder_points'][prev_num_periods-num_reused+1:]
+		order_up_to_levels[num_periods-num_reused+1:] = warm_start['order_up_to_levels'][prev_num_periods-num_reused+1:]
+
+	# H_valid[t] = number of leading columns of H[t, :] that are up to date. H_t(y)
+	# depends on theta_{t+1} only at values <= y, so when the x-range is expanded
+	# upward, the existing columns of H remain valid unless theta_{t+1} changes.
+	H_valid = [0] * (num_periods+1)
+
+	# Start with initial truncation range; if range is not large enough, expand it
+	# and re-sweep the periods, re-using the columns of H that are still valid.
+	# (Periods copied from a warm start are skipped unless the range is expanded.)
+	x_values = np.arange(x_min, x_max + 1)
+	t = num_periods - num_reused
+	while t >= 1:
+
+		# Determine rows of cost_matrix, H, and oul_matrix to use for period t.
+		if policy_only:
+			row, next_row, H_row = t % 2, (t+1) % 2, 0
+			oul_row = t if user_provided_oul_matrix else 0
+			H_valid[t] = 0
+		else:
+			row, next_row, H_row, oul_row = t, t+1, t, t
+
+		# Build demand distribution for reused period if range has been expanded.
+		if prob[t] is None:
+			if demand_keys[t] not in prob_cache:
+				prob_cache[demand_keys[t]] = _demand_probabilities(demand_source[t], d_min[t], d_max[t])
+			distribution[t], prob[t] = prob_cache[demand_keys[t]]
+
+		# (Re-)calculate terminal costs at start of each sweep.
+		if t == num_periods:
+			x_values = np.arange(x_min, x_max + 1)
+			cost_matrix[next_row, :] \
+				= terminal_holding_cost * np.maximum(x_range, 0) + \
+				  terminal_stockout_cost * np.maximum(-x_range, 0)
+
+		# Calculate H_t(y) for each y whose column is not up to date.
+		y_lo = x_min + H_valid[t]
+		# Current-period (newsvendor) cost, using n(y) and \bar{n}(y).
+		n, n_bar = lf.normal_loss(x_values[H_valid[t]:], demand_mean[t], demand_sd[t])
+		H[H_row, H_valid[t]:] = holding_cost[t] * n_bar + stockout_cost[t] * n
+
+		# Future cost. Demand is truncated to avoid y-d exceeding x bounds,
+		# i.e., y-d is replaced by min(max(y-d, x_min), x_max), which is
+		# equivalent to extending theta_{t+1} beyond the x bounds using its
+		# values at x_min and x_max. E[theta_{t+1}(y-D)] is then the convolution
+		# of theta_{t+1} (on y_lo-d_max, ..., x_max-d_min) with prob.
+		theta_ext = cost_matrix[next_row, np.clip(np.arange(y_lo - d_max[t], x_max - d_min[t] + 1), x_min, x_max) - x_min]
+		H[H_row, H_valid[t]:] += discount_factor[t] * np.convolve(theta_ext, prob[t], mode='valid')
+		H_valid[t] = len(x_values)
+
+		# Determine optimal order-up-to level for each x.
+		if user_provided_oul_matrix:
+			# Only consider y equal to value specified in oul_matrix.
+			y_opt = oul_matrix[oul_row, :]
+			best_cost = np.where(y_opt > x_values, purchase_cost[t] * (y_opt - x_values) + fixed_cost[t], 0.0) \
+				+ H[H_row, (y_opt - x_min).astype(int)]
+			for x_ind in np.flatnonzero((y_opt == x_max) & (x_values < x_max)):
+				warnings.warn('Cost is still decreasing at upper end of y range; did not increase upper range '
+							'because oul_matrix was provided: t = {:d}, x = {:d}, y = {:d}.'.format(t, x_values[x_ind], y_opt[x_ind]))
+		else:
+			# The cost of ordering up to y > x is K + c(y-x) + H_t(y), so the best y > x
+			# minimizes c*y + H_t(y) over y >= x+1, i.e., it is a suffix minimum. Find
+			# the smallest index attaining the minimum over each suffix.
+			G = purchase_cost[t] * x_values + H[H_row, :]
+			G_rev = G[::-1]
+			last_min = np.maximum.accumulate(np.where(G_rev == np.minimum.accumulate(G_rev),
+													  np.arange(len(G_rev)), 0))
+			suffix_argmin = (len(G) - 1 - last_min)[::-1]
+
+			# Compare ordering up to the best y > x with not ordering (y = x).
+			y_ind = np.arange(len(x_values))
+			y_ind[:-1] = suffix_argmin[1:]
+			order_cost = purchase_cost[t] * (x_values[y_ind] - x_values) + fixed_cost[t] + H[H_row, y_ind]
+			order = y_ind > np.arange(len(x_values))
+			order[order] = order_cost[order] < H[H_row, order]
+			y_ind = np.where(order, y_ind, np.arange(len(x_values)))
+			best_cost = np.where(order, order_cost, H[H_row, :])
+			y_opt = x_values[y_ind]
+
+			# If the largest y in range is optimal for any x < x_max, increase upper
+			# range and re-sweep the periods.
+			x_ind = np.flatnonzero((y_opt == x_max) & (x_values < x_max))
+			if x_ind.size > 0:
+				warnings.warn('Cost is still decreasing at upper end of y range; increasing upper range '
+							'and retrying: t = {:d}, x = {:d}, y = {:d}.'.format(t, x_values[x_ind[0]], y_opt[x_ind[0]]))
+				x_max = x_max * 2
+				x_range = np.array(range(x_min, x_max + 1))
+				num_new_cols = len(x_range) - cost_matrix.shape[1]
+				cost_matrix = np.pad(cost_matrix, ((0, 0), (0, num_new_cols)))
+				oul_matrix = np.pad(oul_matrix, ((0, 0), (0, num_new_cols)))
+				H = np.pad(H, ((0, 0), (0, num_new_cols)))
+				num_reused = 0
+				t = num_periods
+				continue
+
+		# H_{t-1} must be re-calculated starting at the first column in which theta_t changed.
+		if not policy_only:
+			changed = np.flatnonzero(cost_matrix[t, :H_valid[t-1]] != best_cost[:H_valid[t-1]])
+			if changed.size > 0:
+				H_valid[t-1] = int(changed[0])
+
+		# Store best cost and best action for this t, x.
+		cost_matrix[row, :] = best_cost
+		oul_matrix[oul_row, :] = y_opt
+
+		# Determine s^*_t and S^*_t.
+		# S^*_t = OUL for first x-value in range.
+		order_up_to_levels[t] = oul_matrix[oul_row, 0]
+		# s^*_t = largest x s.t. y_t[x] = S^*_t
+		other_oul = np.flatnonzero(oul_matrix[oul_row, 1:] != order_up_to_levels[t])
+		reorder_points[t] = x_range[0] + (int(other_oul[0]) if other_oul.size > 0 else len(x_values) - 1)
+
+		# Raise warning if truncation makes it so that probability of
+		# demand bringing IL below x_range > trunc_tol (i.e., if
+		# P(s - D < x_min) > trunc_tol). (Issue warning in each period
+		# in which there is a violation.)
+		prob_demand_below_range = 1 - distribution[t].cdf(reorder_points[t] - x_min)
+		# prob_demand_below_range = 1 - \
+		# 	norm.cdf(reorder_points[t] - x_min, demand_mean[t], demand_sd[t])
+		if prob_demand_below_range > trunc_tol:
+			warnings.warn('Probability that demand brings IL below x-truncation range exceeds trunc_tol: t = {:d}, prob = {:f}'.format(t, prob_demand_below_range))
+
+		t -= 1
 
-		# Allocate arrays.
-		reorder_points = [0] * (num_periods+1)
-		order_up_to_levels = [0] * (num_periods+1)
-		cost_matrix = np.zeros((num_periods+2, len(x_range)))
-		if not user_provided_oul_matrix:
-			oul_matrix = np.zeros((num_periods+1, len(x_range)))
-		H = np.zeros((num_periods+1, len(x_range)))
+	# Calculate expected total cost.
+	total_cost = cost_matrix[1, int(initial_inventory_level) - x_min]
 
-		# Initialize abort (will be set to true if range is not large enough)
-		abort = False
+	if policy_only:
+		return reorder_points, order_up_to_levels, total_cost, None, None, x_range
 
-		# Initialize warning flags (will be set to True when warnings are
-		# issued to avoid duplication).
-#		opt_warning = False
+	# Store solution for re-use.
+	if warm_start is not None:
+		warm_start.update(period_keys=period_keys,
+						  terminal_costs=(terminal_holding_cost, terminal_stockout_cost),
+						  x_range=x_range, cost_matrix=cost_matrix, oul_matrix=oul_matrix,
+						  reorder_points=list(reorder_points), order_up_to_levels=list(order_up_to_levels),
+						  num_periods_reused=num_reused,
+						  demand_probabilities={key: prob_cache[key] for key in demand_keys[1:] if key in prob_cache})
 
-		# Calculate terminal costs.
-		cost_matrix[num_periods+1, :] \
-			= terminal_holding_cost * np.maximum(x_range, 0) + \
-			  terminal_stockout_cost * np.maximum(-x_range, 0)
+	return reorder_points, order_up_to_levels, total_cost, cost_matrix, oul_matrix, x_range
 
-		# Loop backwards through periods.
-		for t in range(num_periods, 0, -1):
 
-			# Calculate probability vector for demand.
-			if demand_source[t].is_discrete:
-				prob = [demand_source[t].demand_distribution.pmf(d) for d in d_range]
-			else:
-				prob = [demand_source[t].demand_distribution.cdf(d + 0.5) - \
-						demand_source[t].demand_distribution.cdf(d - 0.5) for d in d_range]
-			# prob = norm.cdf(d_range + 0.5, demand_mean[t], demand_sd[t]) - \
-			# 	   norm.cdf(d_range - 0.5, demand_mean[t], demand_sd[t])
-
-			# Calculate H_t(y).
-			for y in range(x_min, x_max + 1):
-
-				# Initialize cost.
-				cost = 0.0
-
-				# Calculate n(y) and \bar{n}(y). 
-				n, n_bar = lf.normal_loss(y, demand_mean[t], demand_sd[t])
-
-				# Calculate current-period (newsvendor) cost.
-				cost += holding_cost[t] * n_bar + stockout_cost[t] * n
-
-				# Truncate demand range to avoid y-d exceeding x bounds.
-				# Need x_min <= y - d <= x_max.
-				# Therefore d_eff (d effective) must be between y - x_max
-				# and y - x_min.
-				d_eff = np.maximum(np.minimum(d_range, y - x_min), y - x_max)
-
-				# Calculate amount of demand probability that was truncated
-				# and issue warning if truncprob > trunc_tol
-				#truncprob = np.dot(prob, d_range != d_eff)
-				#if truncprob > trunc_tol:
-				#	warnings.warn('Total probability of truncated demand exceeds trunc_tol: t = {:d}, y = {:d}, truncprob = {:f}'.format(t, y, truncprob))
-
-				# Calculate future cost for this y.
-				future_cost = discount_factor[t] * np.dot(prob,
-								cost_matrix[t+1, y - d_eff - x_min])
-
-				# Add future cost.
-				cost += future_cost
-
-				# Set H.
-				H[t, y - x_min] = cost
-
-			# Loop through possible x values.
-			for x in range(x_min, x_max + 1):
-
-				# Initialize best_cost to something big (keeps track of best
-				# cost found for this t and x).
-				best_cost = float("inf")
-
-				# Did user provide oul_matrix? 
-				if user_provided_oul_matrix:
-					# Only consider y equal to value specified in oul_matrix.
-					y_range = [oul_matrix[t, x - x_min]]
-				else:
-					# Consider y = x, ..., x_max.
-					y_range = list(range(x, x_max + 1))
-
-				# Loop through possible y values.
-				for y in y_range:
-
-					# Initialize cost.
-					cost = 0.0
-
-					# Calculate ordering cost.
-					if y > x:
-						cost += purchase_cost[t] * (y - x) + fixed_cost[t]
-
-					# Add H_t(y).
-					cost += H[t, int(y - x_min)]
-
-					# Compare cost to current best.
-					if cost < best_cost:
-						best_cost = cost
-						best_y = y
-
-						# If this is the largest y in range (and range has more
-						# than one element), abort and increase upper range.
-						if y == x_max and x < x_max:
-							if user_provided_oul_matrix:
-								warnings.warn('Cost is still decreasing at upper end of y range; did not increase upper range '
-					 						'because oul_matrix was provided: t = {:d}, x = {:d}, y = {:d}.'.format(t, x, y))
-							else:
-								warnings.warn('Cost is still decreasing at upper end of y range; increasing upper range '
-											'and retrying: t = {:d}, x = {:d}, y = {:d}.'.format(t, x, y))
-								abort = True
-								x_max = x_max * 2
-								x_range = np.array(range(x_min, x_max + 1))
-								break
-
-				# If abort flag was set in for-y loop, exit for-x loop.
-				if abort:
-					break
-
-				# Store best cost and best action for this t, x.
-				cost_matrix[t, x - x_min] = best_cost
-				oul_matrix[t, x - x_min] = best_y
-
-			# If abort flag was set in for-y loop, exit for-t loop.
-			if abort:
-				break
-			else:
-				# Determine s^*_t and S^*_t.
-				# S^*_t = OUL for first x-value in range.
-				order_up_to_levels[t] = oul_matrix[t, 0]
-				# s^*_t = largest x s.t. y_t[x] = S^*_t
-				reorder_points[t] = x_range[0]
-				while oul_matrix[t, reorder_points[t] + 1 - x_min] \
-					== order_up_to_levels[t] and reorder_points[t] < x_max:
-					reorder_points[t] += 1
-
-			# Raise warning if truncation makes it so that probability of
-			# demand bringing IL below x_range > trunc_tol (i.e., if
-			# P(s - D < x_min) > trunc_tol). (Issue warning in each period
-			# in which there is a violation.)
-			prob_demand_below_range = 1 - \
-				demand_source[t].demand_distribution.cdf(reorder_points[t] - x_min)
-			# prob_demand_below_range = 1 - \
-			# 	norm.cdf(reorder_points[t] - x_min, demand_mean[t], demand_sd[t])
-			if prob_demand_below_range > trunc_tol:
-				warnings.warn('Probability that demand brings IL below x-truncation range exceeds trunc_tol: t = {:d}, prob = {:f}'.format(t, prob_demand_below_range))
-
-		# If made it through all t without abort flag, set done = True.
-		if not abort:
-			done = True
+def finite_horizon_dp_batch(
+		num_periods,
+		holding_cost,
+		stockout_cost,
+		terminal_holding_cost,
+		terminal_stockout_cost,
+		purchase_cost,
+		fixed_cost,
+		demand_mean,
+		demand_sd,
+		discount_factor=1.0,
+		initial_inventory_level=0.0,
+		trunc_tol=0.02,
+		d_spread=4,
+		s_spread=5):
+	"""
+	Solve the finite-horizon inventory optimization problem for several
+	independent SKUs at once, using dynamic programming (DP). The SKUs share
+	the number of periods but may have different costs and demands.
+
+	The per-period parameters (``holding_cost``, ``stockout_cost``,
+	``purchase_cost``, ``fixed_cost``, ``demand_mean``, ``demand_sd``, and
+	``discount_factor``) may be given as arrays of shape (``n_skus``, ``num_periods``),
+	or as any shape that broadcasts to it: a singleton applies to every SKU and
+	period, an array of length ``num_periods`` to every SKU, and an array of
+	shape (``n_skus``, 1) to every period. ``terminal_holding_cost``,
+	``terminal_stockout_cost``, and ``initial_inventory_level`` may be given as
+	singletons or arrays of length ``n_skus``. Demands are assumed to be normally
+	distributed.
+
+	The truncation of the demand and :math:`x`-ranges is determined for each SKU
+	as in :func:`finite_horizon_dp`. The :math:`x`-ranges are padded to a common grid,
+	and the backward recursion is performed for all SKUs together using array
+	operations, except for the expectation over the demand, which is calculated
+	separately on each SKU's own range. The results are the same as calling
+	:func:`finite_horizon_dp` for each SKU. If the largest :math:`y` in a SKU's
+	range is optimal for some :math:`x`, the upper end of that SKU's range is
+	doubled and the SKU is re-solved.
 
-	# Calculate expected total cost.
-	total_cost = cost_matrix[1, int(initial_inventory_level) - x_min]
+	Parameters
+	----------
+	num_periods : int
+		Number of periods in time horizon. [:math:`T`]
+	holding_cost : float or array
+		Holding cost per item per period. [:math:`h`]
+	stockout_cost : float or array
+		Stockout cost per item per period. [:math:`p`]
+	terminal_holding_cost : float or array
+		Terminal holding cost per item. [:math:`h_T`]
+	terminal_stockout_cost : float or array
+		Terminal stockout cost per item. [:math:`p_T`]
+	purchase_cost : float or array
+		Purchase cost per item. [:math:`c`]
+	fixed_cost : float or array
+		Fixed cost per order. [:math:`K`]
+	demand_mean : float or array
+		Mean demand per period. [:math:`\\mu`]
+	demand_sd : float or array
+		Standard deviation of demand per period. [:math:`\\sigma`]
+	discount_factor : float or array, optional
+		Discount factor, in :math:`(0,1]`. Default = 1. [:math:`\\gamma`]
+	initial_inventory_level : float or array, optional
+		Initial inventory level. Default = 0.
+	trunc_tol : float, optional
+		Threshold for total probability outside of truncation range for warning
+		to be issued. Default = 0.02.
+	d_spread : float, optional
+		Number of standard deviations about the mean to set demand truncation range.
+		Default = 4.
+	s_spread : float, optional
+		Number of standard deviations about the mean to set :math:`x`-truncation range.
+		Default = 5.
+
+	Returns
+	-------
+	reorder_points : ndarray
+		Array of shape (``n_skus``, ``num_periods``\\+1) of optimal reorder points;
+		``reorder_points[k, t]`` is :math:`s^*_t` for SKU ``k``. [:math:`s^*`]
+	order_up_to_levels : ndarray
+		Array of shape (``n_skus``, ``num_periods``\\+1) of optimal order-up-to levels;
+		``order_up_to_levels[k, t]`` is :math:`S^*_t` for SKU ``k``. [:math:`S^*`]
+	total_cost : ndarray
+		Optimal expected cost of each SKU.
 
-	return reorder_points, order_up_to_levels, total_cost, cost_matrix, oul_matrix, x_range
+
+	Raises
+	------
+	ValueError
+		If ``num_periods`` is not a positive integer.
+	ValueError
+		If the parameters cannot be broadcast to the shapes above.
+	ValueError
+		If ``holding_cost`` or ``stockout_cost`` <= 0.
+	ValueError
+		If ``terminal_holding_cost``, ``terminal_stockout_cost``, ``purchase_cost``,
+		``fixed_cost``, ``demand_mean``, or ``demand_sd`` < 0.
+	ValueError
+		If ``discount_factor`` <= 0 or > 1.
+
+
+	**Example**:
+
+	.. testsetup:: *
+
+		from stockpyl.finite_horizon import *
+
+	.. doctest::
+
+		>>> s, S, cost = finite_horizon_dp_batch(5, 1, 20, 1, 20, 2, [[50], [0]], 100, 20)
+		>>> s
+		array([[  0, 110, 110, 110, 110, 111],
+		       [  0, 133, 133, 133, 133, 126]])
+		>>> S
+		array([[  0, 133, 133, 133, 133, 126],
+		       [  0, 133, 133, 133, 133, 126]])
+	"""
+
+	# Validate singleton parameters.
+	if num_periods <= 0 or not is_integer(num_periods): raise ValueError("num_periods must be a positive integer")
+
+	# Broadcast per-period parameters to arrays of shape (n_skus, num_periods+1), so
+	# that column t refers to period t (column 0 is ignored).
+	per_period = (holding_cost, stockout_cost, purchase_cost, fixed_cost, demand_mean, demand_sd, discount_factor)
+	try:
+		shape = np.broadcast_shapes((1, num_periods), *(np.shape(v) for v in per_period))
+	except ValueError:
+		raise ValueError("per-period parameters must be broadcastable to shape (n_skus, num_periods)")
+	if len(shape) != 2:
+		raise ValueError("per-period parameters must be broadcastable to shape (n_skus, num_periods)")
+	n_skus = shape[0]
+	holding_cost, stockout_cost, purchase_cost, fixed_cost, demand_mean, demand_sd, discount_factor = \
+		(np.pad(np.broadcast_to(np.asarray(v, dtype=float), shape), ((0, 0), (1, 0)), constant_values=1)
+		 for v in per_period)
+
+	# Broadcast per-SKU parameters to arrays of length n_skus.
+	try:
+		terminal_holding_cost, terminal_stockout_cost, initial_inventory_level = \
+			(np.broadcast_to(np.asarray(v, dtype=float), (n_skus,))
+			 for v in (terminal_holding_cost, terminal_stockout_cost, initial_inventory_level))
+	except ValueError:
+		raise ValueError("terminal_holding_cost, terminal_stockout_cost, and initial_inventory_level must be "
+						 "singletons or have length n_skus")
+
+	# Validate other parameters. (holding_cost and stockout_cost must be positive
+	# to calculate the EOQB order quantity, as in finite_horizon_dp().)
+	if not np.all(terminal_holding_cost >= 0): raise ValueError("terminal_holding_cost must be non-negative")
+	if not np.all(terminal_stockout_cost >= 0): raise ValueError("terminal_stockout_cost must be non-negative")
+	if not np.all(holding_cost[:, 1:] > 0): raise ValueError("holding_cost must be positive")
+	if not np.all(stockout_cost[:, 1:] > 0): raise ValueError("stockout_cost must be positive")
+	if not np.all(purchase_cost[:, 1:] >= 0): raise ValueError("purchase_cost must be non-negative")
+	if not np.all(fixed_cost[:, 1:] >= 0): raise ValueError("fixed_cost must be non-negative")
+	if not np.all(discount_factor[:, 1:] > 0) or \
+		not np.all(discount_factor[:, 1:] <= 1): raise ValueError("discount_factor must be <0 and <=1")
+	if not np.all(demand_mean[:, 1:] >= 0): raise ValueError("demand_mean must be non-negative")
+	if not np.all(demand_sd[:, 1:] >= 0): raise ValueError("demand_sd must be non-negative")
+
+	# Determine truncation for D for each SKU and period: mu +/- d_spread * sigma
+	# (but no negative values).
+	d_min = np.maximum(0, np.round(demand_mean - d_spread * demand_sd)).astype(int)
+	d_max = np.round(demand_mean + d_spread * demand_sd).astype(int)
+
+	# Raise warning if total probability of demand outside d_range > trunc_tol
+	# for any SKU and period.
+	prob_outside = norm.cdf(d_min[:, 1:], demand_mean[:, 1:], demand_sd[:, 1:]) + \
+		(1 - norm.cdf(d_max[:, 1:], demand_mean[:, 1:], demand_sd[:, 1:]))
+	if np.any(prob_outside > trunc_tol):
+		warnings.warn("Total probability of demand outside demand-truncation range exceeds trunc_tol for at least one SKU and period.")
+
+	# Determine initial truncation for x for each SKU, as in finite_horizon_dp():
+	# s is estimated as the newsvendor solution (mu) and S as s + EOQB.
+	Q = np.sqrt(2 * fixed_cost[:, 1:] * demand_mean[:, 1:] * (holding_cost[:, 1:] + stockout_cost[:, 1:])
+				/ (holding_cost[:, 1:] * stockout_cost[:, 1:]))
+	nv = demand_mean[:, 1:]
+	x_min = np.round(np.min(nv, axis=1) - np.max(demand_mean[:, 1:], axis=1)
+					 - np.max(demand_sd[:, 1:], axis=1) * (s_spread + d_spread)).astype(int)
+	x_max = np.round(np.max(nv, axis=1) + np.max(Q, axis=1)
+					 + np.max(demand_sd[:, 1:], axis=1) * s_spread).astype(int)
+
+	reorder_points = np.zeros((n_skus, num_periods+1), dtype=int)
+	order_up_to_levels = np.zeros((n_skus, num_periods+1), dtype=int)
+	total_cost = np.zeros(n_skus)
+
+	# Solve the SKUs in to_solve together. SKUs whose x-range turns out to be too
+	# small are re-solved (together) with a larger range.
+	to_solve = np.arange(n_skus)
+	while to_solve.size > 0:
+		k = to_solve
+		rows = np.arange(len(k))
+
+		# Pad the x-ranges to a common grid. Column j of each row refers to x = X_lo + j;
+		# SKU k's own range is in columns lo[k], ..., hi[k].
+		X_lo, X_hi = int(np.min(x_min[k])), int(np.max(x_max[k]))
+		x_values = np.arange(X_lo, X_hi + 1)
+		cols = np.arange(len(x_values))
+		lo, hi = (x_min[k] - X_lo)[:, None], (x_max[k] - X_lo)[:, None]
+		in_range = (cols >= lo) & (cols <= hi)
+		expand = np.zeros(len(k), dtype=bool)
+
+		# theta[k, j] = theta_{t+1}(X_lo + j) for SKU k. Initialize with terminal costs.
+		theta = terminal_holding_cost[k, None] * np.maximum(x_values, 0) + \
+			terminal_stockout_cost[k, None] * np.maximum(-x_values, 0)
+
+		for t in range(num_periods, 0, -1):
+
+			# Current-period (newsvendor) cost, using n(y) and \bar{n}(y).
+			n, n_bar = lf.normal_loss(x_values, demand_mean[k, t, None], demand_sd[k, t, None])
+			H = holding_cost[k, t, None] * n_bar + stockout_cost[k, t, None] * n
+
+			# Future cost, calculated as in finite_horizon_dp() on each SKU's own x- and
+			# demand ranges. (Columns outside a SKU's x-range are never used.) The
+			# ranges differ among SKUs, and a convolution on a common padded range
+			# would cost more than it saves, so this is done one SKU at a time; the
+			# demand probabilities are calculated for all SKUs together.
+			D_lo = int(np.min(d_min[k, t]))
+			d_range = np.arange(D_lo, int(np.max(d_max[k, t])) + 1)
+			prob = norm.cdf(d_range + 0.5, demand_mean[k, t, None], demand_sd[k, t, None]) - \
+				norm.cdf(d_range - 0.5, demand_mean[k, t, None], demand_sd[k, t, None])
+			for i, sku in enumerate(k):
+				prob_sku = prob[i, d_min[sku, t] - D_lo:d_max[sku, t] - D_lo + 1]
+				theta_ext = theta[i, np.clip(np.arange(lo[i, 0] - d_max[sku, t], hi[i, 0] - d_min[sku, t] + 1),
+											 lo[i, 0], hi[i, 0])]
+				H[i, lo[i, 0]:hi[i, 0] + 1] += discount_factor[sku, t] * np.convolve(theta_ext, prob_sku, mode='valid')
+
+			# Determine optimal order-up-to level for each x, using the suffix minimum
+			# of c*y + H_t(y) over each SKU's own range (see finite_horizon_dp()).
+			G = np.where(in_range, purchase_cost[k, t, None] * x_values + H, np.inf)
+			G_rev = G[:, ::-1]
+			last_min = np.maximum.accumulate(np.where(G_rev == np.minimum.accumulate(G_rev, axis=1), cols, 0), axis=1)
+			suffix_argmin = (len(cols) - 1 - last_min)[:, ::-1]
+			y_ind = np.tile(cols, (len(k), 1))
+			y_ind[:, :-1] = suffix_argmin[:, 1:]
+			order_cost = purchase_cost[k, t, None] * (x_values[y_ind] - x_values) + fixed_cost[k, t, None] \
+				+ np.take_along_axis(H, y_ind, axis=1)
+			order = (y_ind > cols) & (y_ind <= hi) & (order_cost < H)
+			y_ind = np.where(order, y_ind, cols)
+			theta = np.where(order, order_cost, H)
+			y_opt = x_values[y_ind]
+
+			# If the largest y in range is optimal for any x < x_max, the SKU will be
+			# re-solved with a larger range.
+			at_max = ~expand & np.any(in_range & (y_ind == hi) & (cols < hi), axis=1)
+			for i in np.flatnonzero(at_max):
+				warnings.warn('Cost is still decreasing at upper end of y range; increasing upper range '
+							'and retrying: SKU = {:d}, t = {:d}.'.format(k[i], t))
+			expand |= at_max
+
+			# Determine s^*_t and S^*_t.
+			# S^*_t = OUL for first x-value in range.
+			S = y_opt[rows, lo[:, 0]]
+			# s^*_t = largest x s.t. y_t[x] = S^*_t
+			other_oul = in_range & (cols > lo) & (y_opt != S[:, None])
+			s = np.where(np.any(other_oul, axis=1), X_lo + np.argmax(other_oul, axis=1) - 1, x_max[k])
+			reorder_points[k, t] = s
+			order_up_to_levels[k, t] = S
+
+			# Raise warning if P(s - D < x_min) > trunc_tol for any SKU.
+			prob_demand_below_range = 1 - norm.cdf(s - x_min[k], demand_mean[k, t], demand_sd[k, t])
+			for i in np.flatnonzero((prob_demand_below_range > trunc_tol) & ~expand):
+				warnings.warn('Probability that demand brings IL below x-truncation range exceeds trunc_tol: '
+							  'SKU = {:d}, t = {:d}, prob = {:f}'.format(k[i], t, prob_demand_below_range[i]))
+
+		# Calculate expected total cost.
+		total_cost[k] = theta[rows, initial_inventory_level[k].astype(int) - X_lo]
+
+		x_max[k[expand]] *= 2
+		to_solve = k[expand]
+
+	return reorder_points, order_up_to_levels, total_cost
 
 
 def myopic_bounds(
@@ -763,3 +1097,17 @@ def myopic_bounds(
 
 	return S_underbar, S_overbar, s_underbar, s_overbar
 
+
+### HELPER FUNCTIONS ###
+
+def _demand_probabilities(demand_source, d_min, d_max):
+	"""Return the demand distribution of ``demand_source`` and the probability of
+	each demand value in ``d_min``, ..., ``d_max``, treating continuous
+	distributions as discretized to the nearest integer.
+	"""
+	distribution = demand_source.demand_distribution
+	d_range = np.arange(d_min, d_max + 1)
+	if demand_source.is_discrete:
+		return distribution, distribution.pmf(d_range)
+	else:
+		return distribution, distribution.cdf(d_range + 0.5) - distribution.cdf(d_range - 0.5)
@@ -31,7 +31,14 @@ API Reference
 """
 
 import numpy as np
-from itertools import product
+import math
+import heapq
+import os
+import pickle
+from collections import deque, OrderedDict
+from itertools import product, islice, chain
+from concurrent.futures import ProcessPoolExecutor
+from scipy import stats
 from tqdm import tqdm				# progress bar
 
 from stockpyl.supply_chain_network import *
@@ -42,6 +49,19 @@ from stockpyl.instances import *
 import stockpyl.optimization as optimization
 
 
+# -------------------
+
+# GLOBAL VARIABLES
+
+# Network and evaluation settings used by worker processes in meio_by_enumeration().
+# Set once per worker by _initialize_enumeration_worker().
+_worker_network = None
+_worker_evaluation_args = None
+# Sample paths drawn so far by the worker, for OCBA, and the number of blocks they were drawn in.
+_worker_sample_paths = []
+_worker_num_sample_path_blocks = 0
+
+
 # -------------------
 
 # ENUMERATION
@@ -50,11 +70,42 @@ def meio_by_enumeration(network, base_stock_levels=None, truncation_lo=None,
 						truncation_hi=None, discretization_step=None,
 						discretization_num=None, groups=None, objective_function=None,
 						sim_num_trials=10, sim_num_periods=1000, sim_rand_seed=None,
-						progress_bar=True, print_solutions=False):
+						progress_bar=True, print_solutions=False, workers=None,
+						chunk_size=None, top_k=None, crn=False, ocba=False, ocba_target_pcs=0.95,
+						ocba_initial_trials=5, ocba_increment=None, ocba_max_trials=None):
 	"""Optimize the MEIO instance by enumerating the combinations of values of the
 	base-stock levels. Evaluate each combination using the provided objective
 	function, or simulation if not provided.
 
+	The combinations are generated lazily, and only the best solution found so far
+	(plus the ``top_k`` best, if requested) is kept in memory, so large grids can be
+	enumerated.
+
+	If ``workers`` is provided, the combinations are sent to a pool of ``workers``
+	processes in chunks of ``chunk_size`` combinations. ``network`` and
+	``objective_function`` are sent to each worker process once, so ``objective_function``
+	must be picklable (e.g., a module-level function, not a ``lambda``). The results are
+	identical to those obtained with ``workers=None``, including how ties are broken, but
+	``network`` is not modified and ``print_solutions`` prints the solutions as each chunk is
+	completed.
+
+	If ``crn`` is ``True`` and simulation is used, the demands and disruption states of the
+	``sim_num_trials`` trials are drawn once, using :func:`stockpyl.sim.generate_sample_paths`,
+	and replayed for every solution, so the solutions are compared under common random numbers.
+
+	If ``ocba`` is ``True`` and simulation is used, the trials are allocated to the solutions
+	adaptively, using the optimal computing budget allocation (OCBA) procedure of Chen et al. (2000),
+	instead of simulating ``sim_num_trials`` trials of every solution. Every solution is first simulated
+	for ``ocba_initial_trials`` trials. Then, in each round, ``ocba_increment`` more trials are allocated
+	among the solutions, mostly to the best solutions and to those whose costs are hard to distinguish
+	from the best; solutions that are clearly worse get no more trials. The procedure stops when the
+	(approximate, Bonferroni) probability of correct selection reaches ``ocba_target_pcs`` or when
+	``ocba_max_trials`` trials have been simulated in total. The cost of each solution is the mean over
+	its trials. Trial ``r`` of every solution replays the same sample path (see
+	:func:`stockpyl.sim.generate_sample_paths`), drawn with ``sim_rand_seed``, so ``crn`` is implied,
+	and each solution is compared with the best one using the differences between their costs on
+	their common trials.
+
 	Parameters
 	----------
 	network : |class_network|
@@ -102,6 +153,32 @@ def meio_by_enumeration(network, base_stock_levels=None, truncation_lo=None,
 		Display a progress bar? Ignored if ``print_solutions`` is ``True``.
 	print_solutions : bool, optional
 		Print each solution and its cost?
+	workers : int, optional
+		Number of worker processes to evaluate the solutions on. If ``None`` (the default),
+		the solutions are evaluated in the current process.
+	chunk_size : int, optional
+		Number of solutions (or, if ``ocba`` is ``True``, trials) sent to a worker process at a time.
+		Ignored if ``workers`` is ``None``. If omitted, it is set automatically.
+	top_k : int, optional
+		If provided, the ``top_k`` best solutions found are also returned.
+	crn : bool, optional
+		Evaluate all solutions using the same sample paths (common random numbers)? Ignored if
+		``objective_function`` is provided. Default = ``False``.
+	ocba : bool, optional
+		Allocate the simulation trials adaptively using OCBA? Ignored if ``objective_function`` is
+		provided. Default = ``False``.
+	ocba_target_pcs : float, optional
+		Target probability of correct selection. Default = 0.95.
+	ocba_initial_trials : int, optional
+		Number of trials of every solution before trials are allocated adaptively. Default = 5.
+	ocba_increment : int, optional
+		Number of trials allocated in each round. If omitted, it is set to 10% of the number of
+		solutions. If ``workers`` is provided, it is raised to at least ``4 * workers * chunk_size``
+		(or ``4 * workers`` if ``chunk_size`` is omitted), so that each round gives every worker
+		several chunks of trials.
+	ocba_max_trials : int, optional
+		Maximum total number of trials. If omitted, it is set to ``sim_num_trials`` times the number
+		of solutions, i.e., the number of trials used without OCBA.
 
 	Returns
 	-------
@@ -109,9 +186,40 @@ def meio_by_enumeration(network, base_stock_levels=None, truncation_lo=None,
 		Dict of best base-stock levels found.
 	best_cost : float
 		Best cost found.
+	top_solutions : list
+		List of (``S``, ``cost``) tuples for the ``top_k`` best solutions found, sorted
+		by cost (ties in the order the solutions were enumerated). Only returned if
+		``top_k`` is provided.
+
+	Raises
+	------
+	ValueError
+		If ``workers`` is not ``None`` or a positive integer.
+	ValueError
+		If ``chunk_size`` is not ``None`` or a positive integer.
+	ValueError
+		If ``top_k`` is not ``None`` or a positive integer.
+	ValueError
+		If ``ocba`` is ``True`` and ``ocba_target_pcs``, ``ocba_initial_trials``, ``ocba_increment``, or
+		``ocba_max_trials`` is invalid.
 
 	"""
 
+	# Validate parameters.
+	if workers is not None and (not is_integer(workers) or workers < 1):
+		raise ValueError("workers must be None or a positive integer")
+	if chunk_size is not None and (not is_integer(chunk_size) or chunk_size < 1):
+		raise ValueError("chunk_size must be None or a positive integer")
+	if top_k is not None and (not is_integer(top_k) or top_k < 1):
+		raise ValueError("top_k must be None or a positive integer")
+	if ocba:
+		if not 0 < ocba_target_pcs < 1:
+			raise ValueError("ocba_target_pcs must be between 0 and 1")
+		if not is_integer(ocba_initial_trials) or ocba_initial_trials < 2:
+			raise ValueError("ocba_initial_trials must be an integer >= 2")
+		if ocba_increment is not None and (not is_integer(ocba_increment) or ocba_increment < 1):
+			raise ValueError("ocba_increment must be None or a positive integer")
+
 	# Build dictionary indicating which optimization group each node is assigned to.
 	# (Group indices will not be consecutive; some will be empty.)
 	# Note that every set contains a node with the same index as the set.
@@ -139,54 +247,66 @@ def meio_by_enumeration(network, base_stock_levels=None, truncation_lo=None,
 	S_dict = truncate_and_discretize(nodes_to_optimize, nto_base_stock_levels, nto_truncation_lo,
 								nto_truncation_hi, nto_discretization_step, nto_discretization_num)
 
-	# Get Cartesian product of all base-stock levels. The line below creates a
-	# list of dicts, each of which is one of the enumerated solutions and gives
-	# the base-stock levels for each node.
+	# Generate the Cartesian product of all base-stock levels lazily. Each item is a
+	# complete dict of base-stock levels (not just for nodes_to_optimize).
 	# See https://stackoverflow.com/a/40623158/3453768.
-	enumerated_solutions = list((dict(zip(S_dict, x)) for x in product(*S_dict.values())))
+	num_solutions = math.prod(len(levels) for levels in S_dict.values())
+	enumerated_solutions = (_complete_solution(dict(zip(S_dict, x)), network.node_indices, opt_group)
+							for x in product(*S_dict.values()))
 
 	# Do progress bar?
 	do_bar = progress_bar and not print_solutions
 
+	# Draw sample paths for common random numbers, if requested.
+	if crn and objective_function is None and not ocba:
+		sample_paths = generate_sample_paths(network, sim_num_trials, sim_num_periods, rand_seed=sim_rand_seed)
+	else:
+		sample_paths = None
+
+	# Evaluate the solutions, either here or on a process pool. Either way, the costs
+	# are produced in the order in which the solutions are enumerated.
+	if ocba and objective_function is None:
+		if ocba_max_trials is None:
+			ocba_max_trials = sim_num_trials * num_solutions
+		if not is_integer(ocba_max_trials) or ocba_max_trials < ocba_initial_trials * num_solutions:
+			raise ValueError("ocba_max_trials must be an integer >= ocba_initial_trials times the number of solutions")
+		if ocba_increment is None:
+			ocba_increment = max(1, num_solutions // 10)
+		if workers is not None and workers > 1:
+			ocba_increment = max(ocba_increment, 4 * workers * (chunk_size or 1))
+		mean_costs = _ocba_mean_costs(network, S_dict, opt_group, sim_num_periods, sim_rand_seed, ocba_target_pcs,
+									  ocba_initial_trials, ocba_increment, ocba_max_trials, workers, chunk_size,
+									  do_bar)
+		evaluated_solutions = zip(enumerated_solutions, mean_costs)
+		do_bar = False
+	elif workers is None:
+		evaluated_solutions = ((S_complete, _evaluate_base_stock_levels(network, S_complete,
+							   objective_function, sim_num_trials, sim_num_periods, sim_rand_seed,
+							   sample_paths))
+							   for S_complete in enumerated_solutions)
+	else:
+		if chunk_size is None:
+			chunk_size = max(1, min(num_solutions // (4 * workers), 1000))
+		evaluated_solutions = _evaluate_solutions_in_pool(network, enumerated_solutions, objective_function,
+														  sim_num_trials, sim_num_periods, sim_rand_seed,
+														  sample_paths, workers, chunk_size)
+
 	# Initialize progress bar. (If not requested, then this will disable it.)
-	pbar = tqdm(total=len(enumerated_solutions), disable=not do_bar)
+	pbar = tqdm(total=num_solutions, disable=not do_bar)
 
-	# Initialize best-solution tracker.
+	# Initialize best-solution tracker and top-k heap. The heap is a min-heap of
+	# (-cost, -index, S) tuples, so its root is the worst of the top_k solutions
+	# (and, among ties, the one enumerated last).
+	best_S = None
 	best_cost = np.inf
+	top_heap = []
 
-	# Loop through enumerated solutions. (Each one only contains nodes in nodes_to_optimize.)
-	for S in enumerated_solutions:
+	# Loop through evaluated solutions.
+	for i, (S_complete, mean_cost) in enumerate(evaluated_solutions):
 
 		# Update progress bar.
 		pbar.update()
 
-		# Determine complete dict of base-stock levels (not just for nodes_to_optimize).
-		S_complete = {n_ind: S[opt_group[n_ind]] for n_ind in network.node_indices}
-		# for n_ind in network.node_indices:
-		# 	if n_ind in nodes_to_optimize:
-		# 		S_complete[n_ind] = S[n_ind]
-		# 	else:
-		# 		S_complete[n_ind] = S[opt_group[n_ind]]
-
-		# Was an objective function provided?
-		if objective_function is not None:
-			mean_cost = objective_function(S_complete)
-		else:
-			# Set base-stock levels for all nodes.
-			for n in network.nodes:
-				if n.inventory_policy.type == 'BS':
-					n.inventory_policy.base_stock_level = S_complete[n.index]
-				else:
-					n.inventory_policy.local_base_stock_level = S_complete[n.index]
-			# Run multiple trials of simulation to evaluate solution.
-			mean_cost, _ = run_multiple_trials(network, sim_num_trials, sim_num_periods,
-											   sim_rand_seed, progress_bar=False)
-
-		# Compare to best solution found so far.
-		if mean_cost < best_cost:
-			best_cost = mean_cost
-			best_S = S_complete
-
 		# Print solution, if requested.
 		if print_solutions:
 			print_str = "S = {} cost = {}".format(S_complete, mean_cost)
@@ -194,12 +314,166 @@ def meio_by_enumeration(network, base_stock_levels=None, truncation_lo=None,
 				print_str += ' *'
 			print(print_str)
 
+		# Compare to best solution found so far.
+		if mean_cost < best_cost:
+			best_cost = mean_cost
+			best_S = S_complete
+
+		# Update top-k heap.
+		if top_k is not None:
+			if len(top_heap) < top_k:
+				heapq.heappush(top_heap, (-mean_cost, -i, S_complete))
+			elif (-mean_cost, -i) > top_heap[0][:2]:
+				heapq.heappushpop(top_heap, (-mean_cost, -i, S_complete))
+
 	# Close progress bar.
 	pbar.close()
 
+	if top_k is not None:
+		top_solutions = [(S, -neg_cost) for neg_cost, _, S in sorted(top_heap, reverse=True)]
+		return best_S, best_cost, top_solutions
+
 	return best_S, best_cost
 
 
+# -------------------
+
+# OBJECTIVE CACHE
+
+class ObjectiveCache(object):
+	"""An ``ObjectiveCache`` object stores the costs of the solutions evaluated by
+	:func:`meio_by_coordinate_descent`, so that solutions that are revisited (e.g., in later
+	sweeps) are not re-evaluated.
+
+	The solutions are keyed by their base-stock levels, rounded to the nearest multiple of
+	``resolution`` (if provided). In that case, :func:`meio_by_coordinate_descent` evaluates
+	the rounded base-stock levels, so every solution with the same key has the same cost.
+
+	If ``max_size`` is provided, the least recently used solutions are discarded once the
+	cache contains more than ``max_size`` solutions. If ``filename`` is provided, the cache is
+	loaded from the file, if it exists, and :func:`meio_by_coordinate_descent` saves it to the file
+	when it finishes. A cache should only be reused for the same network, objective function,
+	and simulation settings.
+
+	Parameters
+	----------
+	resolution : float, optional
+		Base-stock levels are rounded to the nearest multiple of ``resolution``. If omitted, they
+		are not rounded.
+	max_size : int, optional
+		Maximum number of solutions to store. If omitted, the number is unlimited.
+	filename : str, optional
+		Path of the file to load the cache from and save it to.
+
+	Attributes
+	----------
+	resolution : float
+		Base-stock levels are rounded to the nearest multiple of ``resolution``.
+	max_size : int
+		Maximum number of solutions to store.
+	filename : str
+		Path of the file to load the cache from and save it to.
+	hits : int
+		Number of lookups that found the solution in the cache.
+	misses : int
+		Number of lookups that did not find the solution in the cache.
+
+	Raises
+	------
+	ValueError
+		If ``resolution`` is not ``None`` or a positive number.
+	ValueError
+		If ``max_size`` is not ``None`` or a positive integer.
+	ValueError
+		If the file was saved with a different ``resolution``.
+	"""
+
+	def __init__(self, resolution=None, max_size=None, filename=None):
+		"""ObjectiveCache constructor method.
+		"""
+		if resolution is not None and not resolution > 0:
+			raise ValueError("resolution must be None or a positive number")
+		if max_size is not None and (not is_integer(max_size) or max_size < 1):
+			raise ValueError("max_size must be None or a positive integer")
+
+		self.resolution = resolution
+		self.max_size = max_size
+		self.filename = filename
+		self.hits = 0
+		self.misses = 0
+		self._costs = OrderedDict()
+
+		# Load cache from file, if it exists.
+		if filename is not None and os.path.exists(filename):
+			self.load()
+
+	def __len__(self):
+		return len(self._costs)
+
+	def quantize(self, S):
+		"""Return a copy of the dict ``S`` of base-stock levels, rounded to the nearest
+		multiple of ``resolution``.
+		"""
+		if self.resolution is None:
+			return dict(S)
+		return {n_ind: round(S_n / self.resolution) * self.resolution for n_ind, S_n in S.items()}
+
+	def key(self, S):
+		"""Return the key of the dict ``S`` of base-stock levels.
+		"""
+		if self.resolution is None:
+			return tuple(sorted(S.items()))
+		return tuple(sorted((n_ind, round(S_n / self.resolution)) for n_ind, S_n in S.items()))
+
+	def get(self, S):
+		"""Return the cost of the dict ``S`` of base-stock levels, or ``None`` if it is not
+		in the cache. Updates ``hits`` and ``misses``.
+		"""
+		key = self.key(S)
+		if key in self._costs:
+			self.hits += 1
+			self._costs.move_to_end(key)
+			return self._costs[key]
+		self.misses += 1
+		return None
+
+	def put(self, S, cost):
+		"""Store the cost of the dict ``S`` of base-stock levels, discarding the least
+		recently used solution if the cache is full.
+		"""
+		key = self.key(S)
+		self._costs[key] = cost
+		self._costs.move_to_end(key)
+		if self.max_size is not None and len(self._costs) > self.max_size:
+			self._costs.popitem(last=False)
+
+	def clear(self):
+		"""Remove all solutions from the cache and reset ``hits`` and ``misses``.
+		"""
+		self._costs.clear()
+		self.hits = 0
+		self.misses = 0
+
+	def save(self):
+		"""Save the cache to ``filename``.
+		"""
+		with open(self.filename, 'wb') as f:
+			pickle.dump({'resolution': self.resolution, 'costs': list(self._costs.items())}, f)
+
+	def load(self):
+		"""Load the cache from ``filename``, replacing its contents (but not ``hits`` and ``misses``).
+		"""
+		with open(self.filename, 'rb') as f:
+			contents = pickle.load(f)
+		if contents['resolution'] != self.resolution:
+			raise ValueError("the cache in {} was saved with resolution = {}".format(self.filename,
+																					  contents['resolution']))
+		self._costs = OrderedDict(contents['costs'])
+		if self.max_size is not None:
+			while len(self._costs) > self.max_size:
+				self._costs.popitem(last=False)
+
+
 # -------------------
 
 # COORDINATE DESCENT
@@ -208,11 +482,31 @@ def meio_by_coordinate_descent(network, initial_solution=None,
 							   search_lo=None, search_hi=None,
 							   groups=None, objective_function=None,
 							   sim_num_trials=10, sim_num_periods=1000, sim_rand_seed=None,
-							   tol=1e-2, line_search_tol=1e-4, verbose=False):
+							   tol=1e-2, line_search_tol=1e-4, verbose=False, crn=False, cache=None,
+							   line_search='golden_section', line_search_resample=0):
 	"""Optimize the MEIO instance by coordinate descent on the
 	base-stock levels. Evaluate each solution using the provided objective
 	function, or simulation if not provided.
 
+	If ``crn`` is ``True`` and simulation is used, the demands and disruption states of the
+	``sim_num_trials`` trials are drawn once, using :func:`stockpyl.sim.generate_sample_paths`,
+	and replayed for every solution, so the solutions are compared under common random numbers.
+
+	If ``cache`` is provided, the cost of each solution is stored in it, and solutions that are
+	already in the cache (e.g., from earlier sweeps or earlier calls) are not re-evaluated. If
+	the cache has a ``resolution``, the base-stock levels are rounded to multiples of it, both
+	when evaluating solutions and in ``best_S``. The cache's ``hits`` and ``misses`` attributes
+	count the lookups.
+
+	If ``line_search`` is ``'fibonacci'``, each line search is a Fibonacci search over the integer
+	base-stock levels in the search range (see :func:`stockpyl.optimization.fibonacci_search`),
+	which needs far fewer evaluations than a golden-section search and never evaluates fractional
+	base-stock levels. ``line_search_tol`` is then ignored. If the objective is noisy (e.g.,
+	simulation without ``sim_rand_seed`` or ``crn``), set ``line_search_resample`` to re-evaluate
+	the base-stock levels next to each line search's minimizer and choose among them by their mean costs.
+	A ``cache`` would return the same cost for every re-evaluation, so ``line_search_resample`` cannot
+	be used with one.
+
 	Parameters
 	----------
 	network : |class_network|
@@ -252,7 +546,20 @@ def meio_by_coordinate_descent(network, initial_solution=None,
 		Tolerance to use for line search (golden section search) component of algorithm.
 	verbose: bool, optional
 		Set to True to print messages at each iteration.
-		
+	crn : bool, optional
+		Evaluate all solutions using the same sample paths (common random numbers)? Ignored if
+		``objective_function`` is provided. Default = ``False``.
+	cache : :class:`ObjectiveCache`, optional
+		Cache of solution costs to use and fill. If omitted, every solution is evaluated. Cannot be
+		combined with ``line_search_resample``.
+	line_search : str, optional
+		Line search to use: ``'golden_section'`` (the default) or ``'fibonacci'`` (integer
+		base-stock levels only).
+	line_search_resample : int, optional
+		Number of additional evaluations of each base-stock level next to the minimizer of each
+		line search. Ignored unless ``line_search`` is ``'fibonacci'``. Must be 0 if ``cache``
+		is provided. Default = 0.
+
 	Returns
 	-------
 	best_S : dict
@@ -260,8 +567,21 @@ def meio_by_coordinate_descent(network, initial_solution=None,
 	best_cost : float
 		Best cost found.
 
+	Raises
+	------
+	ValueError
+		If ``line_search`` is not ``'golden_section'`` or ``'fibonacci'``.
+	ValueError
+		If ``cache`` is provided and ``line_search_resample`` > 0.
+
 	"""
 
+	if line_search not in ('golden_section', 'fibonacci'):
+		raise ValueError("line_search must be 'golden_section' or 'fibonacci'")
+	if cache is not None and line_search_resample > 0:
+		raise ValueError("line_search_resample cannot be used with a cache, since re-evaluations "
+						 "would return the cached cost")
+
 	# Build dictionary indicating which optimization group each node is assigned to.
 	# (Group indices will not be consecutive; some will be empty.)
 	# Note that every set contains a node with the same index as the set.
@@ -291,21 +611,24 @@ def meio_by_coordinate_descent(network, initial_solution=None,
 	else:
 		nto_initial_solution = {n_ind: initial_solution[n_ind] for n_ind in nodes_to_optimize}
 
-	# Shortcut to objective function.
+	# Draw sample paths for common random numbers, if requested.
+	if crn and objective_function is None:
+		sample_paths = generate_sample_paths(network, sim_num_trials, sim_num_periods, rand_seed=sim_rand_seed)
+	else:
+		sample_paths = None
+
+	# Shortcut to objective function. (Look up the solution in the cache first, if provided.)
 	def obj_fcn(S):
-		if objective_function is not None:
-			return objective_function(S)
-		else:
-			# Set base-stock levels for all nodes.
-			for n in network.nodes:
-				if n.inventory_policy.type == 'BS':
-					n.inventory_policy.base_stock_level = S[n.index]
-				else:
-					n.inventory_policy.local_base_stock_level = S[n.index]
-			# Run multiple trials of simulation to evaluate solution.
-			cost, _ = run_multiple_trials(network, sim_num_trials, sim_num_periods, sim_rand_seed,
-												  progress_bar=False)
-			return cost
+		if cache is None:
+			return _evaluate_base_stock_levels(network, S, objective_function, sim_num_trials, sim_num_periods,
+											   sim_rand_seed, sample_paths)
+		S = cache.quantize(S)
+		cost = cache.get(S)
+		if cost is None:
+			cost = _evaluate_base_stock_levels(network, S, objective_function, sim_num_trials, sim_num_periods,
+											   sim_rand_seed, sample_paths)
+			cache.put(S, cost)
+		return cost
 
 	# Initialize current solution and cost.
 	current_soln_complete = {n_ind: nto_initial_solution[opt_group[n_ind]] for n_ind in network.node_indices}
@@ -325,14 +648,18 @@ def meio_by_coordinate_descent(network, initial_solution=None,
 		# Loop through all groups, optimizing base-stock level for each in turn.
 		for g in group_list:
 
-			# Optimize base-stock level for group using golden-section search.
+			# Optimize base-stock level for group using golden-section or Fibonacci search.
 			def f(Sn):
 				S = current_soln_complete.copy()
 				for n_ind in g:
 					S[n_ind] = Sn
 				return obj_fcn(S)
 #			f = lambda Sn: obj_fcn({i.index: Sn if i.index == n.index else current_soln[i.index] for i in network.nodes})
-			best_Sn, best_cost = optimization.golden_section_search(f, nto_lo[min(g)], nto_hi[min(g)], tol=line_search_tol, verbose=False)
+			if line_search == 'fibonacci':
+				best_Sn, best_cost = optimization.fibonacci_search(f, nto_lo[min(g)], nto_hi[min(g)],
+																   resample=line_search_resample, verbose=False)
+			else:
+				best_Sn, best_cost = optimization.golden_section_search(f, nto_lo[min(g)], nto_hi[min(g)], tol=line_search_tol, verbose=False)
 
 			# Replace group base-stock levels in current_solution with new values.
 			for n_ind in g:
@@ -350,6 +677,12 @@ def meio_by_coordinate_descent(network, initial_solution=None,
 			current_cost = best_cost
 			t += 1
 
+	# Round solution and save cache, if provided.
+	if cache is not None:
+		current_soln_complete = cache.quantize(current_soln_complete)
+		if cache.filename is not None:
+			cache.save()
+
 	return current_soln_complete, best_cost
 
 
@@ -516,3 +849,281 @@ def _base_stock_group_assignments(node_indices, groups=None):
 	return opt_group, group_list
 
 
+def _complete_solution(S, node_indices, opt_group):
+	"""Return the complete dict of base-stock levels for the nodes in ``node_indices``,
+	given the dict ``S`` of base-stock levels for the nodes that are optimized (one per
+	optimization group).
+	"""
+	return {n_ind: S[opt_group[n_ind]] for n_ind in node_indices}
+
+
+def _set_base_stock_levels(network, S_complete):
+	"""Set the base-stock levels of all nodes in ``network`` to those in ``S_complete``.
+	"""
+	for n in network.nodes:
+		if n.inventory_policy.type == 'BS':
+			n.inventory_policy.base_stock_level = S_complete[n.index]
+		else:
+			n.inventory_policy.local_base_stock_level = S_complete[n.index]
+
+
+def _evaluate_base_stock_levels(network, S_complete, objective_function, sim_num_trials,
+								sim_num_periods, sim_rand_seed, sample_paths=None):
+	"""Evaluate the base-stock levels in ``S_complete`` using ``objective_function``, or
+	simulation if ``objective_function`` is ``None``. If ``sample_paths`` is provided, the
+	simulation replays them. Return the expected cost per period.
+	"""
+	# Was an objective function provided?
+	if objective_function is not None:
+		return objective_function(S_complete)
+
+	# Set base-stock levels for all nodes.
+	_set_base_stock_levels(network, S_complete)
+
+	# Run multiple trials of simulation to evaluate solution.
+	mean_cost, _ = run_multiple_trials(network, sim_num_trials, sim_num_periods,
+									   sim_rand_seed, progress_bar=False, sample_paths=sample_paths)
+
+	return mean_cost
+
+
+def _evaluate_solutions_in_pool(network, solutions, objective_function, sim_num_trials,
+								sim_num_periods, sim_rand_seed, sample_paths, workers, chunk_size):
+	"""Evaluate the base-stock levels generated by ``solutions`` on a pool of ``workers``
+	processes, ``chunk_size`` solutions at a time. Yield (``S_complete``, ``cost``) tuples
+	in the order in which ``solutions`` generates them.
+
+	At most ``2 * workers`` chunks are pending at a time, so ``solutions`` is consumed
+	only as fast as the pool can evaluate it.
+	"""
+	with ProcessPoolExecutor(max_workers=workers, initializer=_initialize_enumeration_worker,
+							 initargs=(network, objective_function, sim_num_trials, sim_num_periods,
+									   sim_rand_seed, sample_paths)) as executor:
+		pending = deque()
+		while True:
+			# Submit chunks until the queue is full or the solutions are exhausted.
+			while len(pending) < 2 * workers:
+				chunk = list(islice(solutions, chunk_size))
+				if not chunk:
+					break
+				pending.append((chunk, executor.submit(_evaluate_chunk_in_worker, chunk)))
+			if not pending:
+				return
+
+			# Wait for the oldest chunk.
+			chunk, future = pending.popleft()
+			yield from zip(chunk, future.result())
+
+
+def _initialize_enumeration_worker(network, objective_function, sim_num_trials, sim_num_periods,
+								   sim_rand_seed, sample_paths):
+	"""Store the network and evaluation settings in a worker process of
+	:func:`meio_by_enumeration`.
+	"""
+	global _worker_network, _worker_evaluation_args, _worker_num_sample_path_blocks
+	_worker_network = network
+	_worker_sample_paths.clear()
+	_worker_num_sample_path_blocks = 0
+	_worker_evaluation_args = (objective_function, sim_num_trials, sim_num_periods, sim_rand_seed,
+							   sample_paths)
+
+
+def _evaluate_chunk_in_worker(chunk):
+	"""Evaluate a list of dicts of base-stock levels in a worker process of
+	:func:`meio_by_enumeration`. Return the list of costs.
+	"""
+	return [_evaluate_base_stock_levels(_worker_network, S_complete, *_worker_evaluation_args)
+			for S_complete in chunk]
+
+
+def _simulate_trial_cost(network, S_complete, sim_num_periods, sample_path):
+	"""Simulate one trial of the base-stock levels in ``S_complete``, replaying ``sample_path``.
+	Return the average cost per period.
+	"""
+	_set_base_stock_levels(network, S_complete)
+
+	return simulation(network, sim_num_periods, progress_bar=False, sample_path=sample_path) / sim_num_periods
+
+
+def _ocba_mean_costs(network, S_dict, opt_group, sim_num_periods, sim_rand_seed, target_pcs,
+					 initial_trials, increment, max_trials, workers, chunk_size, progress_bar):
+	"""Allocate simulation trials to the solutions enumerated from ``S_dict`` using OCBA, as
+	described in :func:`meio_by_enumeration`. Return a list containing the mean cost of each
+	solution, in the order in which the solutions are enumerated.
+
+	Solutions are identified by their position in the enumeration, so they are not stored.
+	Trial ``r`` of every solution replays sample path ``r``, so the solutions are compared with
+	the current best solution using the differences between their costs on their common trials.
+	The sample paths are drawn as they are needed, in blocks, from the initial disruption states.
+	Worker processes receive only the number of paths and the seed of each block, and draw the
+	blocks themselves, so the paths are not sent with the trials.
+	"""
+	levels = list(S_dict.values())
+	shape = tuple(len(node_levels) for node_levels in levels)
+	num_solutions = math.prod(shape)
+
+	def solution(i):
+		position = np.unravel_index(i, shape)
+		S = {n_ind: levels[j][position[j]] for j, n_ind in enumerate(S_dict)}
+		return _complete_solution(S, network.node_indices, opt_group)
+
+	# Sample paths, drawn in blocks with seeds spawned from sim_rand_seed. Each block is a
+	# (number of paths, seed) tuple. (The paths themselves are drawn here only if there is no pool.)
+	seed_sequence = np.random.SeedSequence(sim_rand_seed)
+	disruption_states = {n.index: n.disruption_process.disrupted for n in network.nodes
+						 if n.disruption_process is not None}
+	blocks = []
+	sample_paths = []
+
+	def extend_sample_paths(num_paths, executor):
+		num_drawn = sum(num_block_paths for num_block_paths, _ in blocks)
+		if num_drawn < num_paths:
+			blocks.append((max(num_paths - num_drawn, initial_trials), seed_sequence.spawn(1)[0].generate_state(4)))
+			if executor is None:
+				sample_paths.extend(_draw_sample_path_block(network, disruption_states, sim_num_periods,
+															*blocks[-1]))
+
+	# Number of trials and cost of each trial of each solution. (costs[i, r] is NaN if solution i
+	# has not been simulated for trial r.)
+	num_trials = np.zeros(num_solutions, dtype=int)
+	costs = np.full((num_solutions, 2 * initial_trials), np.nan)
+
+	pbar = tqdm(total=max_trials, disable=not progress_bar)
+
+	def run_trials(allocation, executor):
+		# Simulate allocation[i] more trials of each solution i.
+		nonlocal costs
+		new_num_trials = num_trials + allocation
+		extend_sample_paths(int(np.max(new_num_trials)), executor)
+		if np.max(new_num_trials) > costs.shape[1]:
+			costs = np.hstack((costs, np.full((num_solutions, max(costs.shape[1], int(np.max(new_num_trials))
+																	 - costs.shape[1])), np.nan)))
+		tasks = [(i, r) for i in np.flatnonzero(allocation) for r in range(num_trials[i], new_num_trials[i])]
+		if executor is None:
+			trial_costs = (_simulate_trial_cost(network, solution(i), sim_num_periods, sample_paths[r])
+						   for i, r in tasks)
+		else:
+			size = chunk_size or max(1, min(len(tasks) // (4 * workers), 1000))
+			chunks = [[(solution(i), r) for i, r in tasks[k:k + size]] for k in range(0, len(tasks), size)]
+			trial_costs = chain.from_iterable(executor.map(_simulate_trials_in_worker,
+														   [(blocks, disruption_states, chunk) for chunk in chunks]))
+		for (i, r), cost in zip(tasks, trial_costs):
+			costs[i, r] = cost
+			pbar.update()
+		num_trials[:] = new_num_trials
+
+	def allocate(executor):
+		# Simulate initial trials, then allocate increments until the target PCS or the budget is reached.
+		run_trials(np.full(num_solutions, initial_trials), executor)
+		while True:
+			means = np.nansum(costs, axis=1) / num_trials
+			b = int(np.argmin(means))
+			diff_means, diff_variances, num_common = _paired_differences(costs, num_trials, b)
+			if _ocba_probability_of_correct_selection(diff_means, diff_variances, num_common, b) >= target_pcs:
+				break
+			budget = min(increment, max_trials - int(num_trials.sum()))
+			if budget <= 0:
+				break
+			run_trials(_ocba_allocation(diff_means, diff_variances, num_trials, b, budget), executor)
+
+	if workers is None or workers == 1:
+		allocate(None)
+	else:
+		with ProcessPoolExecutor(max_workers=workers, initializer=_initialize_enumeration_worker,
+								 initargs=(network, None, 1, sim_num_periods, None, None)) as executor:
+			allocate(executor)
+
+	pbar.close()
+
+	return (np.nansum(costs, axis=1) / num_trials).tolist()
+
+
+def _paired_differences(costs, num_trials, b):
+	"""Return the means and variances of the differences between the costs of each solution
+	and those of solution ``b`` on their common trials, and the numbers of common trials.
+	"""
+	num_common = np.minimum(num_trials, num_trials[b])
+	common = np.arange(costs.shape[1]) < num_common[:, None]
+	diffs = np.where(common, costs - costs[b], 0)
+	diff_means = diffs.sum(axis=1) / num_common
+	diff_variances = np.where(common, diffs - diff_means[:, None], 0) ** 2
+	diff_variances = diff_variances.sum(axis=1) / (num_common - 1)
+
+	return diff_means, diff_variances, num_common
+
+
+def _ocba_probability_of_correct_selection(diff_means, diff_variances, num_common, b):
+	"""Return the approximate (Bonferroni) probability that solution ``b`` is the best, i.e.,
+	1 minus the sum over the other solutions of the probability that their cost is smaller,
+	using normal approximations of the paired differences. Solutions whose costs equal those
+	of ``b`` on every common trial are not counted.
+	"""
+	diffs = np.delete(diff_means, b)
+	sds = np.sqrt(np.delete(diff_variances / num_common, b))
+	with np.errstate(divide='ignore', invalid='ignore'):
+		z = np.where(sds > 0, diffs / sds, np.where(diffs >= 0, np.inf, -np.inf))
+	return 1 - float(np.sum(stats.norm.cdf(-z)))
+
+
+def _ocba_allocation(diff_means, diff_variances, num_trials, b, budget):
+	"""Return the number of additional trials to allocate to each solution, out of ``budget``,
+	using the OCBA rule of Chen et al. (2000) with paired differences: the number of trials of
+	solution :math:`i \\ne b` is proportional to :math:`(s_i/\\delta_i)^2`, where :math:`\\delta_i`
+	and :math:`s_i` are the mean and standard deviation of the differences between its costs and
+	those of the best solution :math:`b`. Solution :math:`b` is paired with every other solution,
+	so its target is the largest of the others'. The budget is allocated in proportion to the
+	shortfall of each solution from its target number of trials.
+	"""
+	scale = max(1e-9, float(np.max(np.abs(diff_means))))
+	variances = np.maximum(diff_variances, (1e-12 * scale) ** 2)
+	deltas = np.maximum(diff_means, 1e-9 * scale)
+
+	# Target proportions.
+	ratios = variances / deltas ** 2
+	ratios[b] = 0
+	ratios[b] = np.max(ratios)
+	targets = (num_trials.sum() + budget) * ratios / ratios.sum()
+
+	# Allocate budget in proportion to shortfalls, rounding down and giving the remainder to the
+	# largest fractional parts.
+	shortfalls = np.maximum(targets - num_trials, 0)
+	if shortfalls.sum() <= 0:
+		shortfalls[b] = 1
+	shares = budget * shortfalls / shortfalls.sum()
+	allocation = np.floor(shares).astype(int)
+	remainder = budget - int(allocation.sum())
+	if remainder > 0:
+		allocation[np.argsort(allocation - shares, kind='stable')[:remainder]] += 1
+
+	return allocation
+
+
+def _draw_sample_path_block(network, disruption_states, sim_num_periods, num_paths, block_seed):
+	"""Draw a block of ``num_paths`` sample paths for OCBA in :func:`meio_by_enumeration`, using
+	seed ``block_seed``, starting from the disruption states in ``disruption_states``.
+	"""
+	for n in network.nodes:
+		if n.disruption_process is not None:
+			n.disruption_process.disrupted = disruption_states[n.index]
+
+	return generate_sample_paths(network, num_paths, sim_num_periods, rand_seed=block_seed)
+
+
+def _simulate_trials_in_worker(args):
+	"""Simulate trials of dicts of base-stock levels in a worker process of
+	:func:`meio_by_enumeration`, for OCBA. ``args`` is a tuple (``blocks``, ``disruption_states``,
+	``trials``), where ``blocks`` lists the (number of paths, seed) tuples of the sample-path blocks
+	drawn so far and ``trials`` is a list of (``S_complete``, ``r``) tuples. Trial ``r`` replays
+	sample path ``r``; blocks that the worker has not drawn yet are drawn first.
+	Return the list of average costs per period.
+	"""
+	global _worker_num_sample_path_blocks
+	blocks, disruption_states, trials = args
+	sim_num_periods = _worker_evaluation_args[2]
+	for block in blocks[_worker_num_sample_path_blocks:]:
+		_worker_sample_paths.extend(_draw_sample_path_block(_worker_network, disruption_states, sim_num_periods,
+															*block))
+	_worker_num_sample_path_blocks = len(blocks)
+
+	return [_simulate_trial_cost(_worker_network, S_complete, sim_num_periods, _worker_sample_paths[r])
+			for S_complete, r in trials]
@@ -119,3 +119,121 @@ def golden_section_search(f, a, b, tol=1e-5, verbose=False):
 	f_star = f(x_star)
 
 	return x_star, f_star
+
+
+def fibonacci_search(f, a, b, resample=0, resample_width=1, verbose=False):
+	"""Fibonacci search over the integers in [``a``, ``b``]. Intended for functions
+	that are only meaningful (or only change) at integer points, such as costs of
+	integer base-stock levels, for which :func:`golden_section_search` would spend
+	evaluations on fractional points.
+
+	Given a function ``f`` with a single local minimum over the integers in
+	[``a``, ``b``], returns the integer minimizer. The interval is padded to a Fibonacci
+	number of points (the padding points are never evaluated), each iteration evaluates
+	a single new point, and each point is evaluated at most once.
+
+	If ``f`` is noisy (e.g., the mean of a simulation with an unseeded random number
+	generator), set ``resample`` to a positive number. After the search, each integer within
+	``resample_width`` of the minimizer is evaluated ``resample`` more times, and the one with
+	the smallest mean value is returned.
+
+	**Example**:
+
+	.. testsetup:: *
+
+		from stockpyl.optimization import *
+
+	.. doctest::
+
+		>>> f = lambda x: (x-2.3)**2
+		>>> x, fx = fibonacci_search(f, 1, 50)
+		>>> x
+		2
+		>>> fx
+		0.0899999999999999
+
+	Parameters
+	----------
+	f : function
+		Function to optimize. Called only with integer arguments.
+	a : float
+		Lower end of interval to optimize over.
+	b : float
+		Upper end of interval to optimize over.
+	resample : int, optional
+		Number of additional evaluations of each integer near the minimizer. Default = 0.
+	resample_width : int, optional
+		The integers within ``resample_width`` of the minimizer are resampled. Default = 1.
+	verbose : bool, optional
+		Set to True to print messages at each iteration.
+
+	Returns
+	-------
+	x_star : int
+		Optimizer of ``f``.
+	f_star : float
+		Optimal value of ``f`` (mean value, if ``resample`` > 0).
+
+	Raises
+	------
+	ValueError
+		If [``a``, ``b``] does not contain an integer.
+	ValueError
+		If ``resample`` or ``resample_width`` is not a non-negative integer.
+
+	"""
+	(a, b) = (min(a, b), max(a, b))
+	lo = int(math.ceil(a))
+	hi = int(math.floor(b))
+	if lo > hi:
+		raise ValueError("interval must contain an integer")
+	if int(resample) != resample or resample < 0:
+		raise ValueError("resample must be a non-negative integer")
+	if int(resample_width) != resample_width or resample_width < 0:
+		raise ValueError("resample_width must be a non-negative integer")
+
+	# Values of f at the points evaluated so far. Points past hi are padding and are
+	# never evaluated.
+	values = {}
+
+	def evaluate(x):
+		if x > hi:
+			return math.inf
+		if x not in values:
+			values[x] = [f(x)]
+		return values[x][0]
+
+	# Build Fibonacci numbers until the interval [lo, lo + fib[k]] covers [lo, hi].
+	fib = [1, 1, 2]
+	while fib[-1] < hi - lo:
+		fib.append(fib[-1] + fib[-2])
+	k = len(fib) - 1
+
+	# Shrink the interval [l, l + fib[k]], keeping two interior points c < d.
+	l = lo
+	while k > 2:
+		c = l + fib[k - 2]
+		d = l + fib[k - 1]
+		yc = evaluate(c)
+		yd = evaluate(d)
+		if verbose:
+			print("l = {:d} r = {:d} c = {:d} d = {:d} f(c) = {:15.8f} f(d) = {:15.8f}".format(l, l + fib[k], c, d, yc, yd))
+		if yd < yc:
+			l = c
+		k -= 1
+
+	# Evaluate the remaining points.
+	x_star = min(range(l, min(l + fib[k], hi) + 1), key=evaluate)
+
+	# Resample near the minimizer, if requested.
+	if resample > 0:
+		for x in range(max(lo, x_star - resample_width), min(hi, x_star + resample_width) + 1):
+			evaluate(x)
+			values[x].extend(f(x) for _ in range(resample))
+		x_star = min((x for x in values if abs(x - x_star) <= resample_width),
+					 key=lambda x: sum(values[x]) / len(values[x]))
+		f_star = sum(values[x_star]) / len(values[x_star])
+	else:
+		f_star = values[x_star][0]
+
+	return x_star, f_star
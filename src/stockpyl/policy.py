@@ -428,6 +428,9 @@ class Policy(object):
 			if self.type == 'FQ':
 				# Fixed-quantity policy does not need inventory position.
 				IP = None
+				# Validate product (needed for raw-material order quantities).
+				if self.node is not None:
+					_, prod_ind = self.node.validate_product(product)
 			else:
 				# Make sure node attribute is set or inventory_position is provided.
 				if self.node is None:
@@ -30,12 +30,16 @@ from tqdm import tqdm  # progress bar
 import warnings
 import datetime
 import copy
+from concurrent.futures import ProcessPoolExecutor
 
 #from stockpyl.datatypes import *
 #from stockpyl.supply_chain_network import SupplyChainNetwork
 from stockpyl.supply_chain_node import NodeStateVars
+from stockpyl.supply_chain_product import SupplyChainProduct
+from stockpyl.state_store import StateStore
 from stockpyl.sim_io import write_instance_and_states
-from stockpyl.helpers import BIG_FLOAT
+from stockpyl.sim_batch import is_batch_compatible, run_multiple_trials_batch
+from stockpyl.helpers import BIG_FLOAT, is_integer
 #from tests.instances_ssm_serial import *
 from stockpyl.instances import load_instance
 
@@ -43,15 +47,245 @@ from stockpyl.instances import load_instance
 
 # GLOBAL VARIABLES
 
-# Did we already issue a warning about backorder mismatches?
-issued_backorder_warning = False
+# Network (and its initial disruption states) used by worker processes in run_multiple_trials().
+# Set once per worker by _initialize_worker().
+_worker_network = None
+_worker_disruption_states = None
+
+
+# -------------------
+
+# SIMULATION CONTEXT
+
+class SimulationContext(object):
+	"""A |class_sim_context| object holds the state of a single simulation that is not part of
+	the network itself: its random number generator, the consistency checks to run, and whether
+	a backorder warning has already been issued. Each simulation has its own context, so several
+	simulations (of different networks) can run at the same time in one process, e.g., in
+	different threads.
+
+	The context is created by :func:`~stockpyl.sim.initialize` and stored in the network's
+	``sim_context`` attribute, and it is passed to :func:`~stockpyl.sim.step` and to the demand and
+	disruption-process calls made during the simulation.
+
+	Parameters
+	----------
+	rand_seed : int or array_like, optional
+		Seed for the random number generator. Ignored if ``rng`` is provided.
+	rng : :class:`numpy.random.Generator` or :class:`numpy.random.RandomState`, optional
+		Random number generator to use. If omitted, a new :class:`numpy.random.RandomState` seeded
+		with ``rand_seed`` is used. (This reproduces the random numbers drawn by earlier versions
+		of |sp|, which seeded the global ``numpy.random`` generator with ``rand_seed``.)
+	consistency_checks : str, optional
+		String indicating whether to run consistency checks (backorder calculations) and what to do
+		if check fails. See docstring for :func:`~stockpyl.sim.simulation` for list of currently supported strings.
+
+	Attributes
+	----------
+	rng : :class:`numpy.random.Generator` or :class:`numpy.random.RandomState`
+		Random number generator used for demands and disruptions.
+	consistency_checks : str
+		String indicating whether to run consistency checks and what to do if check fails.
+	issued_backorder_warning : bool
+		``True`` if a warning about backorder mismatches has already been issued in this simulation.
+	demand_buffer : dict
+		Dict whose keys are (node index, product index) tuples and whose values are arrays of
+		pre-sampled demands, one per period. Filled by :func:`~stockpyl.sim.initialize`.
+	disruption_buffer : dict
+		Dict whose keys are node indices and whose values are arrays of disruption states, one per
+		period, that are replayed instead of updating the nodes' disruption processes. Filled by
+		:func:`~stockpyl.sim.initialize` if a sample path is provided.
+	state_store : |class_state_store|
+		Arrays containing the state variables of all nodes in all periods (or in the most recent periods,
+		in rolling-window mode). Set by :func:`~stockpyl.sim.initialize`; ``node.state_vars`` contains views into it.
+	plan : |class_sim_plan|
+		The order in which the nodes are processed in each period. Compiled by :func:`~stockpyl.sim.initialize`
+		(or by the first call to :func:`~stockpyl.sim.step`, if the simulation was not initialized).
+	"""
+
+	def __init__(self, rand_seed=None, rng=None, consistency_checks='W'):
+		"""SimulationContext constructor method.
+		"""
+		if rng is None:
+			rng = np.random.RandomState(rand_seed)
+		self.rng = rng
+		self.consistency_checks = consistency_checks
+		self.issued_backorder_warning = False
+		self.demand_buffer = {}
+		self.disruption_buffer = {}
+		self.state_store = None
+		self.plan = None
+
+
+# -------------------
+
+# SIMULATION PLAN
+
+# Attributes whose resolved values are stored by SimulationPlan if snapshot_attributes is True.
+_SNAPSHOT_ATTRIBUTES = ['local_holding_cost', 'local_holding_cost_function', 'additional_holding_cost',
+						'stockout_cost', 'stockout_cost_function', 'in_transit_holding_cost', 'revenue',
+						'order_lead_time', 'shipment_lead_time', 'order_capacity', 'inventory_policy',
+						'inventory_capacity', 'demand_source']
+
+class SimulationPlan(object):
+	"""A |class_sim_plan| object holds the order in which :func:`~stockpyl.sim.step` processes the
+	nodes of a network, and other information about the network that does not change from period
+	to period. It is compiled once per simulation, by :func:`~stockpyl.sim.initialize`, so that
+	:func:`~stockpyl.sim.step` can process the nodes in simple loops instead of recursive depth-first
+	searches. (This also allows very deep networks to be simulated without reaching Python's
+	recursion limit.)
+
+	The orders are the same as those of the depth-first searches used by earlier versions of |sp|:
+	demands are generated in preorder and orders are placed in postorder of a depth-first search
+	of the successors, starting at the source nodes, and shipments are processed starting at the
+	source nodes, processing each node once all of its predecessors have been processed. Therefore,
+	the random numbers are drawn in the same order and the results are unchanged.
+
+	If ``snapshot_attributes`` is ``True``, the plan also stores the values of the attributes in
+	``_SNAPSHOT_ATTRIBUTES`` (costs, lead times, capacities, policies, and demand sources), as returned by
+	:meth:`~stockpyl.supply_chain_node.SupplyChainNode.get_attribute` for each node and product, in
+	arrays, and :func:`~stockpyl.sim.step` reads the attribute values from the arrays instead of resolving
+	them in every period. Changes to these attributes after the plan is compiled are therefore ignored
+	by the simulation.
+
+	Parameters
+	----------
+	network : |class_network|
+		The multi-echelon inventory network.
+	snapshot_attributes : bool, optional
+		Store the resolved attribute values in arrays? Default = ``False``.
+
+	Attributes
+	----------
+	demand_node_products : list
+		List of (node, product index) tuples for all nodes and products, in the order in which their
+		external demands are generated. (The demand sources are resolved in every period, unless
+		attributes are snapshotted, so demand sources that are replaced during the simulation are used.)
+	order_sequence : list
+		List of |class_node| objects in the order in which they receive orders and place orders (each node
+		after all of its successors).
+	shipment_sequence : list
+		List of |class_node| objects in the order in which they process shipments (each node after all of its
+		predecessors).
+	disruptable_nodes : list
+		List of |class_node| objects that have a |class_disruption_process|.
+	attribute_slots : dict
+		Dict whose keys are (node index, product index) tuples and whose values are the corresponding
+		positions in the arrays in ``attribute_values``, or ``None`` if attributes are not snapshotted.
+	attribute_values : dict
+		Dict whose keys are attribute names and whose values are arrays of the resolved attribute values,
+		or ``None`` if attributes are not snapshotted.
+	"""
+
+	def __init__(self, network, snapshot_attributes=False):
+		"""SimulationPlan constructor method.
+		"""
+		source_nodes = network.source_nodes
+
+		# Orders: depth-first search of successors, starting at source nodes.
+		demand_sequence = []
+		self.order_sequence = []
+		visited = {n.index: False for n in network.nodes}
+		for source in source_nodes:
+			if visited[source.index]:
+				continue
+			visited[source.index] = True
+			demand_sequence.append(source)
+			stack = [(source, iter(source.successors()))]
+			while stack:
+				node, successors = stack[-1]
+				for s in successors:
+					if not visited[s.index]:
+						visited[s.index] = True
+						demand_sequence.append(s)
+						stack.append((s, iter(s.successors())))
+						break
+				else:
+					# All successors have been visited.
+					stack.pop()
+					self.order_sequence.append(node)
+
+		self.demand_node_products = [(node, prod_index) for node in demand_sequence
+									 for prod_index in node.product_indices]
+
+		# Shipments: depth-first search of successors, starting at source nodes, visiting a
+		# successor only once all of its predecessors have been visited.
+		self.shipment_sequence = []
+		visited = {n.index: False for n in network.nodes}
+		for source in source_nodes:
+			if visited[source.index]:
+				continue
+			visited[source.index] = True
+			self.shipment_sequence.append(source)
+			stack = [iter(source.successors())]
+			while stack:
+				for s in stack[-1]:
+					if not visited[s.index] and all([visited[p_ind] for p_ind in s.predecessor_indices()]):
+						visited[s.index] = True
+						self.shipment_sequence.append(s)
+						stack.append(iter(s.successors()))
+						break
+				else:
+					stack.pop()
+
+		self.disruptable_nodes = [n for n in network.nodes if n.disruption_process is not None]
+
+		# Snapshot of resolved attribute values.
+		self.attribute_slots = None
+		self.attribute_values = None
+		if snapshot_attributes:
+			node_products = [(n, prod_index) for n in network.nodes for prod_index in n.product_indices]
+			self.attribute_slots = {(n.index, prod_index): slot for slot, (n, prod_index) in enumerate(node_products)}
+			self.attribute_values = {}
+			for attr in _SNAPSHOT_ATTRIBUTES:
+				values = np.empty(len(node_products), dtype=object)
+				for slot, (n, prod_index) in enumerate(node_products):
+					values[slot] = n.get_attribute(attr, prod_index)
+				self.attribute_values[attr] = values
+
+	def get_attribute(self, node, attr, product):
+		"""Return the value of the attribute ``attr`` for ``node`` and ``product``, from the snapshot if
+		it contains the attribute, or from :meth:`~stockpyl.supply_chain_node.SupplyChainNode.get_attribute`
+		otherwise.
+
+		Parameters
+		----------
+		node : |class_node|
+			The supply chain node.
+		attr : str
+			Name of attribute to get.
+		product : |class_product| or int
+			The product or its index.
+
+		Returns
+		-------
+		object
+			The value of the attribute.
+		"""
+		if self.attribute_values is not None and attr in self.attribute_values \
+				and not isinstance(product, SupplyChainProduct):
+			slot = self.attribute_slots.get((node.index, product))
+			if slot is not None:
+				return self.attribute_values[attr][slot]
+		return node.get_attribute(attr, product)
+
+
+def _get_attribute(node, attr, product, plan):
+	"""Return the value of the attribute ``attr`` for ``node`` and ``product``, using ``plan`` if
+	it is not ``None``.
+	"""
+	if plan is None:
+		return node.get_attribute(attr, product)
+	return plan.get_attribute(node, attr, product)
 
 
 # -------------------
 
 # SIMULATION
 
-def simulation(network, num_periods, rand_seed=None, progress_bar=True, consistency_checks='W'):
+def simulation(network, num_periods, rand_seed=None, progress_bar=True, consistency_checks='W', rng=None,
+			   presample_demands=None, rolling_window=False, snapshot_attributes=False, collector=None,
+			   sample_path=None):
 	"""Perform the simulation for ``num_periods`` periods. Fills performance
 	measures directly into ``network``.
 
@@ -77,6 +311,24 @@ def simulation(network, num_periods, rand_seed=None, progress_bar=True, consiste
 		* 'WF': Issue warning if check fails and dump instance and simulation data to file
 		* 'E': Raise exception if check fails but do not dump instance and simulation data to file
 		* 'EF': Raise exception if check fails and dump instance and simulation data to file
+	rng : :class:`numpy.random.Generator` or :class:`numpy.random.RandomState`, optional
+		Random number generator to use for the simulation. If provided, ``rand_seed`` is ignored.
+	presample_demands : bool, optional
+		Draw all demands at the start of the simulation? See docstring for :func:`~stockpyl.sim.initialize`.
+		If ``None`` (the default), demands are pre-sampled only if doing so does not change the results.
+	rolling_window : bool, optional
+		Store the state variables only for the most recent periods? See docstring for
+		:func:`~stockpyl.sim.initialize`. Default = ``False``.
+	snapshot_attributes : bool, optional
+		Store the resolved attribute values of the nodes in arrays at the start of the simulation? See docstring for
+		:func:`~stockpyl.sim.initialize`. Default = ``False``.
+	collector : |class_stats_collector|, optional
+		Object that collects performance measures during the simulation; see |mod_sim_stats|. Its ``start()``
+		method is called after the simulation is initialized, its ``update()`` method after each period,
+		and its ``finish()`` method after the simulation is closed.
+	sample_path : dict, optional
+		Demands and disruption states to replay instead of drawing them, as generated by
+		:func:`~stockpyl.sim.generate_sample_paths`. See docstring for :func:`~stockpyl.sim.initialize`.
 
 	Returns
 	-------
@@ -92,11 +344,19 @@ def simulation(network, num_periods, rand_seed=None, progress_bar=True, consiste
 	# Initialize the simulation:
 	# 	* Check validity of the network
 	# 	* Initialize state and decision variables at each node
-	# 	* Set the numpy PRNG seed
+	# 	* Build the simulation context (PRNG, consistency checks)
 	#	* Set network.period to None
 	# NOTE: State variables are indexed up to num_periods+extra_periods; the
 	# additional slots are to allow calculations past the last period.
-	initialize(network=network, num_periods=num_periods, rand_seed=rand_seed)
+	if presample_demands is None:
+		presample_demands = not rolling_window and sample_path is None \
+							and _presampling_preserves_random_stream(network)
+	context = initialize(network=network, num_periods=num_periods, rand_seed=rand_seed, rng=rng,
+						 consistency_checks=consistency_checks, presample_demands=presample_demands,
+						 rolling_window=rolling_window, snapshot_attributes=snapshot_attributes,
+						 sample_path=sample_path)
+	if collector is not None:
+		collector.start(network)
 
 	# Initialize progress bar. (If not requested, then this will disable it.)
 	pbar = tqdm(total=num_periods, disable=not progress_bar)
@@ -113,7 +373,11 @@ def simulation(network, num_periods, rand_seed=None, progress_bar=True, consiste
 		# 	* Generate shipments
 		# 	* Update costs, pipelines, etc.
 		# 	* Increment ``network.period`` by 1
-		step(network=network, consistency_checks=consistency_checks)
+		step(network=network, context=context)
+
+		# Update statistics.
+		if collector is not None:
+			collector.update(network, network.period)
 
 	# Close progress bar.
 	pbar.close()
@@ -121,19 +385,54 @@ def simulation(network, num_periods, rand_seed=None, progress_bar=True, consiste
 	# Close down simulation:
 	# 	* Calculate the total cost over all nodes and periods.
 	total_cost = close(network=network)
+	if collector is not None:
+		collector.finish(network, total_cost, num_periods)
 
 	# Return total cost.
 	return total_cost
 
 
-def initialize(network, num_periods, rand_seed=None):
+def initialize(network, num_periods, rand_seed=None, rng=None, consistency_checks='W', presample_demands=False,
+			   rolling_window=False, snapshot_attributes=False, sample_path=None):
 	"""Initialize the simulation:
 
 		* Check validity of the network
 		* Initialize state and decision variables at each node
-		* Set the numpy PRNG seed
+		* Build the |class_sim_context| (PRNG, consistency checks) and store it in ``network.sim_context``
+		* Compile the |class_sim_plan|
+		* Pre-sample the demands, if requested
 		* Set network.period to None (will be set to 0 in first call to :func:`stockpyl.sim.step`)
 
+	If demands are pre-sampled, the demands for all ``num_periods`` periods are drawn at once for each
+	node and product, using :func:`stockpyl.demand_source.DemandSource.generate_demands`, and stored in
+	the context's demand buffer, from which :func:`stockpyl.sim.step` reads them. This is much faster than drawing
+	them one period at a time, especially for long horizons or networks with many demand nodes. But if
+	there is more than one random demand source, or if there are Markovian disruptions, the random
+	numbers are consumed in a different order, so the results differ from those obtained without pre-sampling.
+	Demands are not pre-sampled by default, since a loop that calls :func:`~stockpyl.sim.step` directly may
+	change the demand sources (or their parameters) between periods, and pre-sampled demands would not
+	reflect those changes. (:func:`~stockpyl.sim.simulation`, which does not give the caller that chance,
+	pre-samples them by default if the results are unaffected.)
+
+	If ``rolling_window`` is ``True``, the state variables are stored only for the most recent periods
+	(enough to cover the longest lead times, plus 2), in a ring buffer; see |mod_state_store|. The values of earlier
+	periods are added to running totals as they leave the window, so the total cost returned by
+	:func:`~stockpyl.sim.close` (and totals such as ``node.state_vars.total('inventory_level')``) are still
+	computed over all periods, but ``node.state_vars[t]`` is only available for periods ``t`` in the window. The memory
+	required no longer grows with ``num_periods``, which is useful for very long simulations for which only
+	aggregate results are needed. (Demands are not pre-sampled in this mode unless ``presample_demands`` is ``True``.)
+
+	If ``snapshot_attributes`` is ``True``, the costs, lead times, capacities, inventory policies, and demand sources
+	of the nodes (resolved for each product by :meth:`~stockpyl.supply_chain_node.SupplyChainNode.get_attribute`) are
+	stored in arrays in the |class_sim_plan|, and :func:`~stockpyl.sim.step` reads them from there. This avoids
+	resolving the attributes in every period, but changes to them made during the simulation are ignored.
+
+	If ``sample_path`` is provided, its demands are used as the pre-sampled demands, and its disruption states
+	replace the updates of the nodes' Markovian disruption processes, so no random numbers are drawn for
+	them. Since the random numbers drawn in a simulation do not depend on the nodes' inventory policies,
+	simulating several policies with the same sample path compares them under common random numbers. The
+	sample path must cover at least ``num_periods`` periods.
+
 	.. note:: Calling :func:`~stockpyl.sim.initialize` function, then :func:`stockpyl.sim.step` function once per
 		period, then :func:`~stockpyl.sim.close` function is equivalent to calling
 		:func:`~stockpyl.sim.simulate` function (aside from progress bar, which :func:`~stockpyl.sim.simulate`
@@ -145,8 +444,28 @@ def initialize(network, num_periods, rand_seed=None):
 		The multi-echelon inventory network.
 	num_periods : int
 		Number of periods to simulate.
-	rand_seed : int, optional
-		Random number generator seed.
+	rand_seed : int or array_like, optional
+		Random number generator seed. (Arrays of ints, such as the states generated by a
+		:class:`numpy.random.SeedSequence`, are also accepted.)
+	rng : :class:`numpy.random.Generator` or :class:`numpy.random.RandomState`, optional
+		Random number generator to use for the simulation. If provided, ``rand_seed`` is ignored.
+	consistency_checks : str, optional
+		String indicating whether to run consistency checks (backorder calculations) and what to do
+		if check fails. See docstring for :func:`~stockpyl.sim.simulation` for list of currently supported strings.
+	presample_demands : bool, optional
+		Draw all demands at the start of the simulation? Default = ``False``.
+	rolling_window : bool, optional
+		Store the state variables only for the most recent periods? Default = ``False``.
+	snapshot_attributes : bool, optional
+		Store the resolved attribute values of the nodes in arrays? Default = ``False``.
+	sample_path : dict, optional
+		Demands and disruption states to replay instead of drawing them, as generated by
+		:func:`~stockpyl.sim.generate_sample_paths`.
+
+	Returns
+	-------
+	|class_sim_context|
+		The context of the new simulation.
 
 	Raises
 	------
@@ -177,17 +496,36 @@ def initialize(network, num_periods, rand_seed=None):
 					err_str = f'The inventory_policy attribute for node {node.index} is None. You must provide a Policy object in order for the simulation to set order quantities.'
 				raise AttributeError(err_str)
 
+	# Build simulation context (including random number generator) and compile the simulation plan.
+	context = SimulationContext(rand_seed=rand_seed, rng=rng, consistency_checks=consistency_checks)
+	context.plan = SimulationPlan(network, snapshot_attributes=snapshot_attributes)
+	network.sim_context = context
+
 	# Initialize state and decision variables at each node.
 
 	# NOTE: State variables are indexed up to num_periods+extra_periods; the
 	# additional slots are to allow calculations past the last period.
 
+	# Build the arrays that hold the state variables for all nodes and periods (or, in rolling-window
+	# mode, the most recent extra_periods periods); each node's state-variable history list is a
+	# list of views into them.
+	context.state_store = StateStore(network, num_periods + extra_periods,
+									 window=extra_periods if rolling_window else None)
 	for n in network.nodes:
-		# Initialize state variable objects for state-variable history list.
-		n.state_vars = [NodeStateVars(n, t) for t in range(num_periods + extra_periods)]
-
-	# Initialize random number generator.
-	np.random.seed(rand_seed)
+		n.state_vars = context.state_store.node_state_vars(n)
+
+	# Pre-sample demands, or copy them (and the disruption states) from the sample path.
+	if sample_path is not None:
+		context.demand_buffer.update(sample_path['demands'])
+		context.disruption_buffer.update(sample_path['disruption_states'])
+		presample_demands = False
+	if presample_demands:
+		for n in network.nodes:
+			for prod_index in n.product_indices:
+				dem_src = n.get_attribute('demand_source', prod_index)
+				if dem_src is not None and dem_src.type is not None:
+					context.demand_buffer[(n.index, prod_index)] = \
+						dem_src.generate_demands(num_periods, rng=context.rng)
 
 	# Initialize state variables.
 	_initialize_state_vars(network)
@@ -195,8 +533,10 @@ def initialize(network, num_periods, rand_seed=None):
 	# Set network.period to None (will be set to 0 in first call to step()).
 	network.period = None
 
+	return context
 
-def step(network, order_quantity_override=None, consistency_checks='W'):
+
+def step(network, order_quantity_override=None, consistency_checks=None, context=None):
 	"""Execute one time period of the simulation:
 
 		* Increment ``network.period`` by 1
@@ -217,6 +557,7 @@ def step(network, order_quantity_override=None, consistency_checks='W'):
 	consistency_checks : str, optional
 		String indicating whether to run consistency checks (backorder calculations) and what to do
 		if check fails. See docstring for :func:`~stockpyl.sim.simulation` for list of currently supported strings.
+		If omitted, the value in the simulation context is used.
 	order_quantity_override : dict, optional
 		Nested dictionary such that order_quantity_override[node][pred][rm] is an order quantity (or ``None``)
 		for each node in the network, each predecessor, and each raw material the node orders from that predecessor
@@ -228,8 +569,22 @@ def step(network, order_quantity_override=None, consistency_checks='W'):
 		node, an order quantity will be calculated for that node as usual. (This option is mostly used
 		when running the simulation from outside the package, e.g., in a reinforcement learning environment;
 		it is analogous to setting the action for the current time period.)
+	context : |class_sim_context|, optional
+		The simulation context. If omitted, ``network.sim_context`` (set by :func:`~stockpyl.sim.initialize`)
+		is used.
 	"""
 
+	# Get simulation context.
+	if context is None:
+		if network.sim_context is None:
+			network.sim_context = SimulationContext()
+		context = network.sim_context
+	if consistency_checks is not None:
+		context.consistency_checks = consistency_checks
+	if context.plan is None:
+		context.plan = SimulationPlan(network)
+	plan = context.plan
+
 	# Update period counter for network.
 	if network.period is None:
 		network.period = 0
@@ -241,35 +596,33 @@ def step(network, order_quantity_override=None, consistency_checks='W'):
 
 	# UPDATE DISRUPTION STATES
 
-	_update_disruption_states(network, t)
+	_update_disruption_states(network, t, context)
 
 	# GENERATE DEMANDS AND ORDERS
 
-	# Initialize visited dict.
-	visited = {n.index: False for n in network.nodes}
-
-	# Generate demands and place orders. Use depth-first search, starting
-	# at nodes with no successors, and propagating orders upstream.
-	for n in network.source_nodes:
-		_generate_downstream_orders(n.index, network, t, visited, order_quantity_override=order_quantity_override)
+	# Generate demands. Then receive orders and place orders, processing each node after
+	# its successors, so that orders propagate upstream.
+	for node, prod_index in plan.demand_node_products:
+		dem_src = plan.get_attribute(node, 'demand_source', prod_index)
+		if dem_src is not None and dem_src.type is not None:
+			_generate_demand(node, prod_index, dem_src, t, context)
+	for node in plan.order_sequence:
+		_place_orders(node, order_quantity_override=order_quantity_override, plan=plan)
 
 	# GENERATE SHIPMENTS
 
-	# Reset visited dict.
-	visited = {n.index: False for n in network.nodes}
-
-	# Generate shipments. Use depth-first search, starting at nodes with
-	# no predecessors, and propagating shipments downstream.
-	for n in network.source_nodes:
-		_generate_downstream_shipments(n.index, network, t, visited, consistency_checks=consistency_checks)
+	# Generate shipments, processing each node after its predecessors, so that shipments
+	# propagate downstream.
+	for node in plan.shipment_sequence:
+		_process_shipments(node, t, context, plan=plan)
 
 	# UPDATE COSTS, PIPELINES, ETC.
 
 	# Set initial values for period t+1 state variables.
-	_initialize_next_period_state_vars(network, t)
+	_initialize_next_period_state_vars(network, t, plan)
 
 	# Calculate costs.
-	_calculate_period_costs(network, t)
+	_calculate_period_costs(network, t, plan=plan)
 
 
 def close(network):
@@ -294,15 +647,19 @@ def close(network):
 	"""
 
 	# Return total cost.
-	return float(np.sum([n.state_vars[t].total_cost_incurred for n in network.nodes
-						 for t in range(len(n.state_vars))]))
+	context = network.sim_context
+	if context is not None and context.state_store is not None:
+		return context.state_store.total('total_cost_incurred')
+	else:
+		return float(np.sum([n.state_vars[t].total_cost_incurred for n in network.nodes
+							 for t in range(len(n.state_vars))]))
 
 
 # -------------------
 
 # HELPER FUNCTIONS
 
-def _update_disruption_states(network, period):
+def _update_disruption_states(network, period, context):
 	"""Update disruption states for all nodes in network.
 	Record disruption states in ``state_vars``.
 
@@ -312,35 +669,90 @@ def _update_disruption_states(network, period):
 		The multi-echelon inventory network.
 	period : int
 		Time period.
+	context : |class_sim_context|
+		The simulation context.
 	"""
 
 	for n in network.nodes:
-		# Is there a disruption process object at this node?
+		# Is there a disruption process object at this node? If so, replay its state from the
+		# disruption buffer or update it.
 		if n.disruption_process is not None:
-			n.disruption_process.update_disruption_state(period)
+			disruption_buffer = context.disruption_buffer.get(n.index)
+			if disruption_buffer is not None and period < len(disruption_buffer):
+				n.disruption_process.disrupted = bool(disruption_buffer[period])
+			else:
+				n.disruption_process.update_disruption_state(period, rng=context.rng)
 
 		# Record disruption state in state_vars.
 		n.state_vars_current.disrupted = n.disrupted
 
 
-def _generate_downstream_orders(node_index, network, period, visited, order_quantity_override=None):
-	"""Generate demands and orders for all downstream nodes using depth-first-search.
-	Ignore nodes for which visited=True.
-
-	If node is currently disrupted and disruption type = 'OP' (order-pausing), order quantity
-	is forced to 0.
+def _presampling_preserves_random_stream(network):
+	"""Determine whether pre-sampling the demands draws the same random numbers, in the same order,
+	as generating them period by period. This is the case if at most one demand source is random
+	and there are no Markovian disruptions.
 
 	Parameters
 	----------
-	node_index : int
-		Index of starting node for depth-first search.
 	network : |class_network|
 		The multi-echelon inventory network.
+
+	Returns
+	-------
+	bool
+		``True`` if pre-sampling does not change the simulation results, ``False`` otherwise.
+	"""
+	num_random_sources = 0
+	for n in network.nodes:
+		if n.disruption_process is not None and n.disruption_process.random_process_type == 'M':
+			return False
+		for prod_index in n.product_indices:
+			dem_src = n.get_attribute('demand_source', prod_index)
+			if dem_src is not None and dem_src.type not in (None, 'D'):
+				num_random_sources += 1
+
+	return num_random_sources <= 1
+
+
+def _generate_demand(node, prod_index, dem_src, period, context):
+	"""Generate the external demand for a node and product and fill it in the node's
+	``inbound_order_pipeline``. The demand is read from the context's demand buffer if it was
+	pre-sampled.
+
+	Parameters
+	----------
+	node : |class_node|
+		The supply chain node.
+	prod_index : int
+		Index of the product.
+	dem_src : |class_demand_source|
+		The demand source for the node and product.
 	period : int
 		Time period.
-	visited : dict
-		Dictionary indicating whether each node in network has already been
-		visited by the depth-first search.
+	context : |class_sim_context|
+		The simulation context.
+	"""
+	# Get demand from demand buffer (or generate it, if it was not pre-sampled)
+	# and fill it in inbound_order_pipeline.
+	demand_buffer = context.demand_buffer.get((node.index, prod_index))
+	if demand_buffer is not None and period < len(demand_buffer):
+		demand = demand_buffer.item(period)
+	else:
+		demand = dem_src.generate_demand(period, rng=context.rng)
+	node.state_vars_current.inbound_order_pipeline[None][prod_index][0] = demand
+
+
+def _place_orders(node, order_quantity_override=None, plan=None):
+	"""Receive inbound orders at the node and place its orders. Must be called after
+	the node's successors have placed their orders.
+
+	If node is currently disrupted and disruption type = 'OP' (order-pausing), order quantity
+	is forced to 0.
+
+	Parameters
+	----------
+	node : |class_node|
+		The supply chain node.
 	order_quantity_override : dict, optional
 		Nested dictionary such that order_quantity_override[node][pred][rm] is an order quantity (or ``None``)
 		for each node in the network, each predecessor, and each raw material the node orders from that predecessor
@@ -352,32 +764,11 @@ def _generate_downstream_orders(node_index, network, period, visited, order_quan
 		node, an order quantity will be calculated for that node as usual. (This option is mostly used
 		when running the simulation from outside the package, e.g., in a reinforcement learning environment;
 		it is analogous to setting the action for the current time period.)
+	plan : |class_sim_plan|, optional
+		The simulation plan. If it contains an attribute snapshot, attribute values are read from it.
 	"""
-	# Did we already visit this node?
-	if visited[node_index]:
-		# We shouldn't even be here.
-		return
-
-	# Mark node as visited.
-	visited[node_index] = True
-
-	# Get the node.
-	node = network.nodes_by_index[node_index]
-
-	# Loop through products (including dummy product).
-	for prod_index in node.product_indices:
-		# Does node/product have external demand?
-		dem_src = node.get_attribute('demand_source', prod_index)
-		if dem_src is not None and dem_src.type is not None:
-			# Generate demand and fill it in inbound_order_pipeline.
-			node.state_vars_current.inbound_order_pipeline[None][prod_index][0] = \
-				dem_src.generate_demand(period)
-
-	# Call generate_downstream_orders() for all non-visited successors.
-	for s in node.successors():
-		if not visited[s.index]:
-			_generate_downstream_orders(s.index, network, period, visited,
-										order_quantity_override=order_quantity_override)
+	# Shortcut to node index.
+	node_index = node.index
 
 	# Receive inbound orders.
 	_receive_inbound_orders(node)
@@ -386,8 +777,8 @@ def _generate_downstream_orders(node_index, network, period, visited, order_quan
 	for prod_ind in node.product_indices:
 		
 		# Get lead times and product index (for convenience).
-		order_lead_time = node.get_attribute('order_lead_time', prod_ind) or 0
-		shipment_lead_time = node.get_attribute('shipment_lead_time', prod_ind) or 0
+		order_lead_time = _get_attribute(node, 'order_lead_time', prod_ind, plan) or 0
+		shipment_lead_time = _get_attribute(node, 'shipment_lead_time', prod_ind, plan) or 0
 		
 		# Determine order quantity, in FG units.
 		# Is there an order-pausing disruption?
@@ -396,10 +787,10 @@ def _generate_downstream_orders(node_index, network, period, visited, order_quan
 			pass
 		else:
 			# Shortcut to the policy.
-			policy = node.get_attribute('inventory_policy', product=prod_ind)
+			policy = _get_attribute(node, 'inventory_policy', prod_ind, plan)
 
 			# Determine node/product's order capacity.
-			order_capac = node.get_attribute('order_capacity', product=prod_ind) or BIG_FLOAT
+			order_capac = _get_attribute(node, 'order_capacity', prod_ind, plan) or BIG_FLOAT
 
 			# Get order quantities for all raw materials (expressed in units of RM).
 			# Dict returned also contains an order quantity for the FG, which will be used
@@ -461,9 +852,9 @@ def _generate_downstream_orders(node_index, network, period, visited, order_quan
 					node.state_vars_current.on_order_by_predecessor[p_index][rm_index] += rm_OQ
 
 		
-def _generate_downstream_shipments(node_index, network, period, visited, consistency_checks='W'):
-	"""Generate shipments to all downstream nodes using depth-first-search.
-	Ignore nodes for which visited=True.
+def _process_shipments(node, period, context, plan=None):
+	"""Receive inbound shipments at the node and generate its outbound shipments. Must be called
+	after the node's predecessors have generated their shipments.
 
 	If downstream node is currently disrupted and its disruption type = 'SP' (shipment-pausing),
 	no items are shipped to that node. Those items are placed in disrupted-items inventory.
@@ -472,31 +863,16 @@ def _generate_downstream_shipments(node_index, network, period, visited, consist
 
 	Parameters
 	----------
-	node_index : int
-		Index of starting node for depth-first search.
-	network : |class_network|
-		The multi-echelon inventory network.
+	node : |class_node|
+		The supply chain node.
 	period : int
 		Time period.
-	visited : dict
-		Dictionary indicating whether each node in network has already been
-		visited by the depth-first search.
-	consistency_checks : str, optional
-		String indicating whether to run consistency checks (backorder calculations) and what to do
-		if check fails. For currently supported strings, see docstring for simulation().
+	context : |class_sim_context|
+		The simulation context, which specifies the consistency checks to run.
+	plan : |class_sim_plan|, optional
+		The simulation plan. If it contains an attribute snapshot, attribute values are read from it.
 
 	"""
-	# Did we already visit this node?
-	if visited[node_index]:
-		# We shouldn't even be here.
-		return
-
-	# Mark node as visited.
-	visited[node_index] = True
-
-	# Shortcuts.
-	node = network.nodes_by_index[node_index]
-
 	# Remember starting IL (as dict by product).
 	starting_inventory_level = copy.deepcopy(node.state_vars_current.inventory_level)
 
@@ -505,23 +881,16 @@ def _generate_downstream_shipments(node_index, network, period, visited, consist
 	_receive_inbound_shipments(node)
 
 	# Convert raw materials to finished goods. (Returns dict by)
-	new_finished_goods = _raw_materials_to_finished_goods(node)
+	new_finished_goods = _raw_materials_to_finished_goods(node, plan=plan)
 
 	# Process outbound shipments.
-	_process_outbound_shipments(node, starting_inventory_level, new_finished_goods,
-								consistency_checks=consistency_checks)
+	_process_outbound_shipments(node, starting_inventory_level, new_finished_goods, context, plan=plan)
 
 	# Calculate fill rate (cumulative in periods 0,...,t).
 	_calculate_fill_rate(node, period)
 
 	# Propagate shipment downstream (i.e., add to successors' inbound_shipment_pipeline).
-	_propagate_shipment_downstream(node)
-
-	# Call generate_downstream_shipments() for all successors for which all predecessors
-	# have now been processed.
-	for s in node.successors():
-		if all([visited[p_ind] for p_ind in s.predecessor_indices()]):
-			_generate_downstream_shipments(s.index, network, period, visited, consistency_checks=consistency_checks)
+	_propagate_shipment_downstream(node, plan=plan)
 
 
 def _initialize_state_vars(network):
@@ -585,10 +954,7 @@ def _receive_inbound_orders(node):
 		The supply chain node.
 	"""
 	# Loop through successor nodes.
-	for s in node.successors(include_external=True):
-		# Shortcut to successor node index.
-		s_index = s.index if s is not None else None
-
+	for s_index in node.successor_indices(include_external=True):
 		# Loop through products at this node.
 		for prod_index in node.product_indices:
 			# Set inbound_order from pipeline.
@@ -600,7 +966,7 @@ def _receive_inbound_orders(node):
 			node.state_vars_current.demand_cumul[prod_index] += node.state_vars_current.inbound_order[s_index][prod_index]
 
 
-def _initialize_next_period_state_vars(network, period):
+def _initialize_next_period_state_vars(network, period, plan=None):
 	"""Set initial values for state variables in period ``period`` + 1.
 
 		* Update shipment and order pipelines by "advancing" them by 1 period \
@@ -618,78 +984,20 @@ def _initialize_next_period_state_vars(network, period):
 		The multi-echelon inventory network.
 	period : int
 		The current time period.
+	plan : |class_sim_plan|, optional
+		The simulation plan. If omitted, all nodes are checked for disruptions.
 	"""
 
-	# Loop through nodes.
-	for n in network.nodes:
-		# Loop through predecessors.
-		for p in n.predecessors(include_external=True):
-			# Shortcut to predecessor index.
-			p_index = p.index if p is not None else None
-			# Loop through raw materials at predecessor.
-			for rm_index in (p.product_indices if p is not None else [n._external_supplier_dummy_product.index]):
-
-				if rm_index in n.raw_materials_by_product('all', return_indices=True, network_BOM=True) and \
-					p in n.raw_material_suppliers_by_raw_material(rm_index, network_BOM=True):
-			
-					# Is there a transit-pausing disruption?
-					if n.disrupted and n.disruption_process.disruption_type == 'TP':
-						# Yes; items in shipment pipeline stay where they are.
-						n.state_vars[period + 1].inbound_shipment_pipeline[p_index][rm_index] = \
-							n.state_vars[period].inbound_shipment_pipeline[p_index][rm_index].copy()
-					else:
-						# No; items in shipment pipeline advance by 1 slot.
-						# Copy items from slot 0 in period t to t+1. (Normally, this will equal 0, but it can
-						# be non-zero if there was a type-RP disruption.)
-						n.state_vars[period + 1].inbound_shipment_pipeline[p_index][rm_index][0] = \
-							n.state_vars[period].inbound_shipment_pipeline[p_index][rm_index][0]
-						# Add items from slot s+1 in period t to slot s in period t+1.
-						for s in range(len(n.state_vars[period].inbound_shipment_pipeline[p_index][rm_index]) - 1):
-							n.state_vars[period + 1].inbound_shipment_pipeline[p_index][rm_index][s] += \
-								n.state_vars[period].inbound_shipment_pipeline[p_index][rm_index][s + 1]
-				
-		# Loop through successors.
-		for s in n.successor_indices(include_external=True):
-			# Loop through products at this node.
-			for prod_index in n.product_indices:
-				n.state_vars[period + 1].inbound_order_pipeline[s][prod_index] = \
-					n.state_vars[period].inbound_order_pipeline[s][prod_index][1:] + [0]
+	# Find nodes with transit-pausing disruptions; items in their shipment pipelines stay where they are.
+	disruptable_nodes = plan.disruptable_nodes if plan is not None else network.nodes
+	transit_paused_nodes = [n.index for n in disruptable_nodes
+							if n.disrupted and n.disruption_process.disruption_type == 'TP']
 
-		# Set next period's starting IL, BO, IDI, ODI, RM, PFG, and OO.
-		# Loop through products at node.
-		for prod_index in n.product_indices:
-			n.state_vars[period + 1].inventory_level[prod_index] = n.state_vars[period].inventory_level[prod_index]
-			n.state_vars[period + 1].pending_finished_goods[prod_index] = n.state_vars[period].pending_finished_goods[prod_index]
-			# Loop through successors.
-			for s_index in n.successor_indices(include_external=True):
-				n.state_vars[period + 1].backorders_by_successor[s_index][prod_index] = \
-					n.state_vars[period].backorders_by_successor[s_index][prod_index]
-			for s_index in n.successor_indices(include_external=False):
-				n.state_vars[period + 1].outbound_disrupted_items[s_index][prod_index] = \
-					n.state_vars[period].outbound_disrupted_items[s_index][prod_index]
-		# Loop through predecessors.
-		for p in n.predecessors(include_external=True):
-			p_index = p.index if p is not None else None
-			# Loop through raw materials at predecessor.
-			for rm_index in (p.product_indices if p is not None else [n._external_supplier_dummy_product.index]):
-				if rm_index in n.raw_materials_by_product('all', return_indices=True, network_BOM=True) and \
-					p in n.raw_material_suppliers_by_raw_material(rm_index, network_BOM=True):
-					n.state_vars[period + 1].on_order_by_predecessor[p_index][rm_index] = \
-						n.state_vars[period].on_order_by_predecessor[p_index][rm_index]
-					n.state_vars[period + 1].raw_material_inventory[rm_index] = \
-						n.state_vars[period].raw_material_inventory[rm_index]
-					n.state_vars[period + 1].inbound_disrupted_items[p_index][rm_index] = \
-						n.state_vars[period].inbound_disrupted_items[p_index][rm_index]
-
-		# Set demand_met_from_stock_cumul and demand_cumul.
-		for prod_index in n.product_indices:
-			n.state_vars[period + 1].demand_met_from_stock_cumul[prod_index] = \
-				n.state_vars[period].demand_met_from_stock_cumul[prod_index]
-			n.state_vars[period + 1].demand_cumul[prod_index] = \
-				n.state_vars[period].demand_cumul[prod_index]
+	# Advance pipelines and carry over ending values for all nodes at once.
+	network.sim_context.state_store.advance(period, transit_paused_nodes)
 
 
-def _calculate_period_costs(network, period):
+def _calculate_period_costs(network, period, plan=None):
 	"""Calculate costs and revenues for one period and store them in n.state_vars[period].
 
 	Parameters
@@ -698,6 +1006,8 @@ def _calculate_period_costs(network, period):
 		The multi-echelon inventory network.
 	period : int
 		The time period.
+	plan : |class_sim_plan|, optional
+		The simulation plan. If it contains an attribute snapshot, attribute values are read from it.
 	"""
 
 	# Loop through nodes.
@@ -715,11 +1025,11 @@ def _calculate_period_costs(network, period):
 			items_held = max(0, n.state_vars[period].inventory_level[prod_index]) + \
 							n._get_state_var_total('outbound_disrupted_items', period, product=prod_index)
 			try:
-				n.state_vars[period].holding_cost_incurred += n.get_attribute('local_holding_cost_function', prod_index)(items_held)
+				n.state_vars[period].holding_cost_incurred += _get_attribute(n, 'local_holding_cost_function', prod_index, plan)(items_held)
 			except TypeError:
-				n.state_vars[period].holding_cost_incurred += (n.get_attribute('local_holding_cost', prod_index) or 0) * items_held
+				n.state_vars[period].holding_cost_incurred += (_get_attribute(n, 'local_holding_cost', prod_index, plan) or 0) * items_held
 				if n.state_vars_current.excess_inventory[prod_index] > 0:
-					if n.inventory_capacity is not None and n.inventory_capacity.inventory_capacity_type == 'HC':						n.state_vars[period].holding_cost_incurred += (n.get_attribute('additional_holding_cost', prod_index) or 0) \
+					if n.inventory_capacity is not None and n.inventory_capacity.inventory_capacity_type == 'HC':						n.state_vars[period].holding_cost_incurred += (_get_attribute(n, 'additional_holding_cost', prod_index, plan) or 0) \
 						* n.state_vars_current.excess_inventory[prod_index]
 
 
@@ -736,27 +1046,27 @@ def _calculate_period_costs(network, period):
 					p = preds[0]
 					# Calculate raw material holding cost.
 					n.state_vars[period].holding_cost_incurred += \
-						(p.get_attribute('local_holding_cost', rm_index) or 0) * \
+						(_get_attribute(p, 'local_holding_cost', rm_index, plan) or 0) * \
 						(n.state_vars[period].raw_material_inventory[rm_index] \
 							+ n.state_vars[period].inbound_disrupted_items[p.index][rm_index]) 
 	
 			# Stockout cost.
 			try:
 				n.state_vars[period].stockout_cost_incurred += \
-					n.get_attribute('stockout_cost_function', prod_index)(n.state_vars[period].inventory_level[prod_index])
+					_get_attribute(n, 'stockout_cost_function', prod_index, plan)(n.state_vars[period].inventory_level[prod_index])
 			except TypeError:
 				n.state_vars[period].stockout_cost_incurred += \
-					(n.get_attribute('stockout_cost', prod_index) or 0) * max(0, -n.state_vars[period].inventory_level[prod_index])
+					(_get_attribute(n, 'stockout_cost', prod_index, plan) or 0) * max(0, -n.state_vars[period].inventory_level[prod_index])
 			# In-transit holding cost.
-			if n.get_attribute('in_transit_holding_cost', prod_index) is None:
-				h = n.get_attribute('local_holding_cost', prod_index) or 0
+			if _get_attribute(n, 'in_transit_holding_cost', prod_index, plan) is None:
+				h = _get_attribute(n, 'local_holding_cost', prod_index, plan) or 0
 			else:
-				h = n.get_attribute('in_transit_holding_cost', prod_index) or 0
+				h = _get_attribute(n, 'in_transit_holding_cost', prod_index, plan) or 0
 			n.state_vars[period].in_transit_holding_cost_incurred += \
 				h * float(np.sum([n.state_vars[period].in_transit_to(s, prod_index) \
 					  for s in n.customers_by_product(product=prod_index, network_BOM=True) if s is not None]))
 			# Revenue.
-			n.state_vars[period].revenue_earned = (n.get_attribute('revenue', prod_index) or 0) * \
+			n.state_vars[period].revenue_earned = (_get_attribute(n, 'revenue', prod_index, plan) or 0) * \
 												float(np.sum([n.state_vars[period].outbound_shipment[s_index][prod_index] \
 																for s_index in n.successor_indices(include_external=True)]))
 		
@@ -835,7 +1145,7 @@ def _receive_inbound_shipments(node):
 				node.state_vars_current.inbound_disrupted_items[p_index][rm_index] += IDI
 
 
-def _raw_materials_to_finished_goods(node):
+def _raw_materials_to_finished_goods(node, plan=None):
 	"""Process raw materials to convert them to finished goods:
 
 		* Remove items from raw material inventory.
@@ -845,6 +1155,8 @@ def _raw_materials_to_finished_goods(node):
 	----------
 	node : |class_node|
 		The supply chain node.
+	plan : |class_sim_plan|, optional
+		The simulation plan. If it contains an attribute snapshot, attribute values are read from it.
 
 	Returns
 	-------
@@ -865,8 +1177,8 @@ def _raw_materials_to_finished_goods(node):
 		# Shortcut to lead times. Note: This assumes that all products that use this RM have the
 		# same lead times. Currently no way to distinguish among products if they have different lead times.
 		prod = node.products_by_raw_material(rm_index)[0]
-		OLT = node.get_attribute('order_lead_time', prod) or 0
-		SLT = node.get_attribute('shipment_lead_time', prod) or 0
+		OLT = _get_attribute(node, 'order_lead_time', prod, plan) or 0
+		SLT = _get_attribute(node, 'shipment_lead_time', prod, plan) or 0
 
 		# Determine number of units of this raw material available (in units of the RM).
 		avail_rm = node.state_vars_current.raw_material_inventory[rm_index]
@@ -924,7 +1236,7 @@ def _raw_materials_to_finished_goods(node):
 	return new_finished_goods
 
 
-def _process_outbound_shipments(node, starting_inventory_level, new_finished_goods, consistency_checks='W'):
+def _process_outbound_shipments(node, starting_inventory_level, new_finished_goods, context, plan=None):
 	"""Process outbound shipments for the node:
 
 		* Determine outbound shipments. Demands are satisfied in order of \
@@ -947,11 +1259,15 @@ def _process_outbound_shipments(node, starting_inventory_level, new_finished_goo
 	new_finished_goods : dict
 		Dict whose keys are indices of products at ``node`` and whose values are 
 		the corresponding number of new finished goods added to inventory this period.
-	consistency_checks : str, optional
-		String indicating whether to run consistency checks (backorder calculations) and what to do
-		if check fails. For currently supported strings, see docstring for simulation().
+	context : |class_sim_context|
+		The simulation context, which specifies the consistency checks to run and records
+		whether a backorder warning has already been issued.
+	plan : |class_sim_plan|, optional
+		The simulation plan. If it contains an attribute snapshot, attribute values are read from it.
 	"""
 
+	consistency_checks = context.consistency_checks
+
 	# Loop through products at this node.
 	for prod_index in node.product_indices:
 
@@ -960,8 +1276,7 @@ def _process_outbound_shipments(node, starting_inventory_level, new_finished_goo
 		current_on_hand = max(0.0, starting_inventory_level[prod_index]) + new_finished_goods[prod_index]
 		current_backorders = max(0.0, -starting_inventory_level[prod_index])
 
-		global issued_backorder_warning
-		if consistency_checks in ('W', 'WF', 'E', 'EF') and not issued_backorder_warning:
+		if consistency_checks in ('W', 'WF', 'E', 'EF') and not context.issued_backorder_warning:
 			# Double-check BO calculations.
 			current_backorders_check = node._get_state_var_total('backorders_by_successor', node.network.period, product=prod_index)
 			if not np.isclose(current_backorders, current_backorders_check):
@@ -989,7 +1304,7 @@ def _process_outbound_shipments(node, starting_inventory_level, new_finished_goo
 				warning_msg += "\x1b[0m"  # reset color
 				if consistency_checks in ('W', 'WF'):
 					warnings.warn(warning_msg)
-					issued_backorder_warning = True
+					context.issued_backorder_warning = True
 				if consistency_checks in ('E', 'EF'):
 					raise ValueError(warning_msg)
 
@@ -1044,7 +1359,7 @@ def _process_outbound_shipments(node, starting_inventory_level, new_finished_goo
 
 			# Update IL and BO.
 			node.state_vars_current.inventory_level[prod_index] -= node.state_vars_current.inbound_order[s_index][prod_index]
-			inventory_capacity = node.get_attribute('inventory_capacity', prod_index)
+			inventory_capacity = _get_attribute(node, 'inventory_capacity', prod_index, plan)
 			if inventory_capacity is None:
 				capacity_value = None
 			elif hasattr(inventory_capacity, "inventory_capacity"):
@@ -1086,13 +1401,15 @@ def _calculate_fill_rate(node, period):
 			node.state_vars_current.fill_rate[prod_index] = 1.0
 
 
-def _propagate_shipment_downstream(node):
+def _propagate_shipment_downstream(node, plan=None):
 	"""Propagate shipment downstream, i.e., add it to successors' ``inbound_shipment_pipeline``.
 
 	Parameters
 	----------
 	node : |class_node|
 		The supply chain node.
+	plan : |class_sim_plan|, optional
+		The simulation plan. If it contains an attribute snapshot, attribute values are read from it.
 
 	Returns
 	-------
@@ -1115,7 +1432,7 @@ def _propagate_shipment_downstream(node):
 					if prod_index in s.raw_materials_by_product(product=FG_index, return_indices=True, network_BOM=True) and \
 						node.index in s.raw_material_suppliers_by_raw_material(raw_material=prod_index, return_indices=True, network_BOM=True):
 						# Get lead time for this product.
-						shipment_lead_time = (s.get_attribute('shipment_lead_time', product=FG_index) or 0)
+						shipment_lead_time = (_get_attribute(s, 'shipment_lead_time', FG_index, plan) or 0)
 
 				s.state_vars_current.inbound_shipment_pipeline[node.index][prod_index][shipment_lead_time] \
 					+= node.state_vars_current.outbound_shipment[s.index][prod_index]
@@ -1125,15 +1442,40 @@ def _propagate_shipment_downstream(node):
 
 # SIMULATION STUFF
 
-def run_multiple_trials(network, num_trials, num_periods, rand_seed=None, progress_bar=True):
+def run_multiple_trials(network, num_trials, num_periods, rand_seed=None, progress_bar=True, batch=False,
+						workers=None, collector=None, sample_paths=None):
 	"""Run ``num_trials`` trials of the simulation, each with  ``num_periods``
 	periods. Return mean and SEM of average cost per period across all trials.
 
 	(To build :math:`\\alpha`-confidence interval, use
 	``mean_cost`` :math:`\\pm z_{1-(1-\\alpha)/2} \\times` ``sem_cost``.)
 
+	If ``batch`` is ``True`` and the network is supported by the batch engine in
+	|mod_sim_batch| (see :func:`stockpyl.sim_batch.is_batch_compatible`), all trials are
+	simulated together using NumPy arrays. The results are the same as those of the
+	trial-by-trial simulation, but ``network`` will not contain state variables for the trials.
+	If the network is not supported, the trial-by-trial simulation is used.
+
+	If ``workers`` is provided, each trial gets an independent random number stream,
+	spawned from a :class:`numpy.random.SeedSequence` initialized with ``rand_seed``, and
+	the trials are distributed among ``workers`` processes. ``network`` is sent to each
+	worker process once. The results are identical for any number of workers (but differ
+	from those obtained with ``workers=None``, which seeds the trials sequentially). If the batch
+	engine is used, however, no worker processes are started: all trials are still simulated
+	together in the current process, and ``workers`` only determines how the trials are seeded
+	(so the results are the same as those obtained with ``workers`` and ``batch=False``).
+
+	If ``collector`` is provided, it is passed to :func:`~stockpyl.sim.simulation` for every trial, so
+	it accumulates performance measures over all trials; see |mod_sim_stats|. The batch engine does not
+	fill the state variables, so it is not used if ``collector`` is provided.
+
+	If ``sample_paths`` is provided, trial ``i`` replays the demands and disruption states in
+	``sample_paths[i]`` instead of drawing them, and ``rand_seed`` is ignored. Generate the sample paths once,
+	using :func:`~stockpyl.sim.generate_sample_paths`, to evaluate several inventory policies under common
+	random numbers. The batch engine is not used if ``sample_paths`` is provided.
+
 	Note: After trials, ``network`` will contain state variables for the
-	most recent trial.
+	most recent trial (unless the batch engine is used or ``workers`` > 1).
 
 	Parameters
 	----------
@@ -1147,6 +1489,16 @@ def run_multiple_trials(network, num_trials, num_periods, rand_seed=None, progre
 		Random number generator seed.
 	progress_bar : bool, optional
 		Display a progress bar?
+	batch : bool, optional
+		Use the batch engine, if the network supports it? Default = ``False``.
+	workers : int, optional
+		Number of worker processes to run the trials on. If ``None`` (the default), the trials
+		are run in the current process and seeded sequentially. If the batch engine is used, the
+		trials are run in the current process regardless, seeded as described above.
+	collector : |class_stats_collector|, optional
+		Object that collects performance measures during the trials. Cannot be used if ``workers`` > 1.
+	sample_paths : list, optional
+		List of ``num_trials`` sample paths, as generated by :func:`~stockpyl.sim.generate_sample_paths`.
 
 	Returns
 	-------
@@ -1154,29 +1506,94 @@ def run_multiple_trials(network, num_trials, num_periods, rand_seed=None, progre
 		Mean of average cost per period across all trials.
 	sem_cost : float
 		Standard error of average cost per period across all trials.
+
+	Raises
+	------
+	ValueError
+		If ``workers`` is not ``None`` or a positive integer.
+	ValueError
+		If ``collector`` is provided and ``workers`` > 1.
+	ValueError
+		If ``sample_paths`` is provided and does not contain ``num_trials`` sample paths.
 	"""
 
+	if sample_paths is not None and len(sample_paths) != num_trials:
+		raise ValueError("sample_paths must contain num_trials sample paths")
+
+	# Spawn one independent seed per trial, if workers were requested.
+	if workers is not None:
+		if not is_integer(workers) or workers < 1:
+			raise ValueError("workers must be None or a positive integer")
+		if collector is not None and workers > 1:
+			raise ValueError("collector cannot be used if workers > 1")
+		trial_seeds = [ss.generate_state(4) for ss in np.random.SeedSequence(rand_seed).spawn(num_trials)]
+	else:
+		trial_seeds = None
+
+	# Use batch engine, if requested and supported.
+	if batch and collector is None and sample_paths is None and is_batch_compatible(network):
+		return run_multiple_trials_batch(network, num_trials, num_periods, rand_seed=rand_seed,
+										 progress_bar=progress_bar, trial_seeds=trial_seeds)
+
 	# Initialize list of average costs.
 	average_costs = []
 
 	# Initialize progress bar. (If not requested, then this will disable it.)
 	pbar = tqdm(total=num_trials, disable=not progress_bar)
 
-	# Initialize random number generator seed. The idea for now is to initialize
-	# it with rand_seed (which is possibly None); then, for each trial, initialize it by generating a
-	# randint. This is because calling np.random.seed(None) is very slow
+	if workers is not None or sample_paths is not None:
+		# Run trials with independent seeds or sample paths, either here or on a process pool. Record
+		# the initial disruption states so that every trial starts from them, regardless of which trials
+		# were run before it in the same process.
+		disruption_states = _get_disruption_states(network)
+		if trial_seeds is None:
+			trial_seeds = [None] * num_trials
+		if sample_paths is None:
+			sample_paths = [None] * num_trials
+		if workers is None or workers == 1:
+			for trial_seed, sample_path in zip(trial_seeds, sample_paths):
+				pbar.update()
+				average_costs.append(_simulate_trial(network, num_periods, trial_seed, disruption_states,
+													 collector=collector, sample_path=sample_path))
+		else:
+			chunksize = max(1, num_trials // (4 * workers))
+			with ProcessPoolExecutor(max_workers=workers, initializer=_initialize_worker,
+									 initargs=(network,)) as executor:
+				for average_cost in executor.map(_simulate_trial_in_worker,
+												 [(num_periods, trial_seed, sample_path) for trial_seed, sample_path
+												  in zip(trial_seeds, sample_paths)],
+												 chunksize=chunksize):
+					pbar.update()
+					average_costs.append(average_cost)
+
+		# Close progress bar.
+		pbar.close()
+
+		# Calculate mean and SEM of average cost.
+		mean_cost = float(np.mean(average_costs))
+		sem_cost = float(stats.sem(average_costs, ddof=0))
+
+		return mean_cost, sem_cost
+
+	# Initialize random number generator seed. The idea for now is to draw the first trial's
+	# seed from a PRNG seeded with rand_seed (which is possibly None); then, for each subsequent
+	# trial, draw the seed from the previous trial's PRNG. This is because seeding with None is very slow
 	# (it was the bottleneck of the simulation when running multiple trials)
 	# so I'm generating seeds pseudo-randomly. Not sure this is the best approach.
-	np.random.seed(rand_seed)
+	trial_seed = np.random.RandomState(rand_seed).randint(1, 10000)
 
 	# Run trials.
 	for t in range(num_trials):
 		# Update progress bar.
 		pbar.update()
 
-		total_cost = simulation(network, num_periods, rand_seed=np.random.randint(1, 10000), progress_bar=False)
+		rng = np.random.RandomState(trial_seed)
+		total_cost = simulation(network, num_periods, progress_bar=False, rng=rng, collector=collector)
 		average_costs.append(total_cost / num_periods)
 
+		# Draw next trial's seed.
+		trial_seed = rng.randint(1, 10000)
+
 	# Close progress bar.
 	pbar.close()
 
@@ -1185,3 +1602,102 @@ def run_multiple_trials(network, num_trials, num_periods, rand_seed=None, progre
 	sem_cost = float(stats.sem(average_costs, ddof=0))
 
 	return mean_cost, sem_cost
+
+
+def generate_sample_paths(network, num_trials, num_periods, rand_seed=None):
+	"""Draw the demands and disruption states of ``num_trials`` trials of ``num_periods`` periods
+	each, to be replayed by :func:`~stockpyl.sim.run_multiple_trials` (or :func:`~stockpyl.sim.simulation`).
+
+	The random numbers drawn in a simulation do not depend on the nodes' inventory policies, so
+	replaying the same sample paths when evaluating several policies compares them under common random
+	numbers: the differences in their costs are due to the policies, not to sampling noise.
+
+	The demands of each node and product are drawn for all trials at once, using
+	:func:`stockpyl.demand_source.DemandSource.generate_demands`. The disruption states of nodes with
+	Markovian disruption processes are drawn starting from their current states. (Explicit disruption
+	processes are deterministic, so they are not stored.)
+
+	Parameters
+	----------
+	network : |class_network|
+		The multi-echelon inventory network.
+	num_trials : int
+		Number of trials to draw sample paths for.
+	num_periods : int
+		Number of periods per trial.
+	rand_seed : int, optional
+		Random number generator seed.
+
+	Returns
+	-------
+	sample_paths : list
+		List of ``num_trials`` dicts, each of which contains a ``'demands'`` dict, whose keys are (node index,
+		product index) tuples and whose values are arrays of demands, one per period, and a ``'disruption_states'``
+		dict, whose keys are node indices and whose values are arrays of disruption states, one per period.
+	"""
+
+	rng = np.random.RandomState(rand_seed)
+	sample_paths = [{'demands': {}, 'disruption_states': {}} for _ in range(num_trials)]
+
+	# Draw demands.
+	for n in network.nodes:
+		for prod_index in n.product_indices:
+			dem_src = n.get_attribute('demand_source', prod_index)
+			if dem_src is not None and dem_src.type is not None:
+				demands = dem_src.generate_demands(num_periods, size=num_trials, rng=rng)
+				for i in range(num_trials):
+					sample_paths[i]['demands'][(n.index, prod_index)] = demands[i]
+
+	# Draw disruption states. (In each period, the disruption state is updated before anything else
+	# happens, so the state in period t is the transition from the state in period t-1.)
+	for n in network.nodes:
+		dp = n.disruption_process
+		if dp is not None and dp.random_process_type == 'M':
+			u = rng.random_sample((num_trials, num_periods))
+			disrupted = np.full(num_trials, bool(dp.disrupted))
+			states = np.empty((num_trials, num_periods), dtype=bool)
+			for t in range(num_periods):
+				disrupted = np.where(disrupted, u[:, t] <= 1 - dp.recovery_probability,
+									 u[:, t] <= dp.disruption_probability)
+				states[:, t] = disrupted
+			for i in range(num_trials):
+				sample_paths[i]['disruption_states'][n.index] = states[i]
+
+	return sample_paths
+
+
+def _get_disruption_states(network):
+	"""Return a dict whose keys are node indices and whose values are the nodes' current
+	disruption states (``None`` for nodes without a |class_disruption_process|).
+	"""
+	return {n.index: (n.disruption_process.disrupted if n.disruption_process is not None else None)
+			for n in network.nodes}
+
+
+def _simulate_trial(network, num_periods, trial_seed, disruption_states, collector=None, sample_path=None):
+	"""Simulate one trial, starting from the disruption states in ``disruption_states``.
+	Return the average cost per period.
+	"""
+	for n in network.nodes:
+		if n.disruption_process is not None:
+			n.disruption_process.disrupted = disruption_states[n.index]
+
+	return simulation(network, num_periods, rand_seed=trial_seed, progress_bar=False,
+					  collector=collector, sample_path=sample_path) / num_periods
+
+
+def _initialize_worker(network):
+	"""Store the network in a worker process of :func:`run_multiple_trials`.
+	"""
+	global _worker_network, _worker_disruption_states
+	_worker_network = network
+	_worker_disruption_states = _get_disruption_states(network)
+
+
+def _simulate_trial_in_worker(args):
+	"""Simulate one trial in a worker process of :func:`run_multiple_trials`. ``args``
+	is a tuple (``num_periods``, ``trial_seed``, ``sample_path``).
+	"""
+	num_periods, trial_seed, sample_path = args
+	return _simulate_trial(_worker_network, num_periods, trial_seed, _worker_disruption_states,
+						   sample_path=sample_path)
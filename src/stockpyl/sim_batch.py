@@ -0,0 +1,564 @@
+"""
+.. include:: ../../globals.inc
+
+Overview
+--------
+
+The |mod_sim_batch| module contains a batch-replication engine that simulates many independent trials
+of a multi-echelon inventory system at once. Instead of building a |class_state_vars| object for every
+node and period and walking the nested state-variable dicts one trial at a time, the engine keeps the state
+of all ``R`` replications in NumPy arrays and advances them together, one period at a time.
+
+The engine produces the same per-trial costs as calling :func:`stockpyl.sim.simulation` once per trial
+(as :func:`stockpyl.sim.run_multiple_trials` does), including the sequence of random demands. It supports
+the following networks:
+
+	* Every node handles a single product, and every raw material has a single supplier with an NBOM of 1.
+	* Every node has a base-stock (``'BS'``), |ss| (``'sS'``), |rq| (``'rQ'``), fixed-quantity (``'FQ'``),
+	  or echelon base-stock (``'EBS'``) inventory policy.
+	* There are no disruptions, no inventory capacities, and no holding or stockout cost functions.
+
+Use :func:`is_batch_compatible` to check whether a network can be simulated by the batch engine.
+:func:`stockpyl.sim.run_multiple_trials` uses the engine when called with ``batch=True`` and falls back
+to the trial-by-trial simulation for networks that the engine does not support.
+
+.. note:: |node_stage|
+
+.. note:: The batch engine does not fill the state variables of ``network``; it only returns costs.
+
+
+API Reference
+-------------
+
+
+"""
+
+import numpy as np
+from scipy import stats
+from tqdm import tqdm  # progress bar
+
+from stockpyl.helpers import BIG_FLOAT
+
+
+# -------------------
+
+# CONSTANTS
+
+# Inventory policy types supported by the batch engine.
+BATCH_POLICY_TYPES = ('BS', 'sS', 'rQ', 'FQ', 'EBS')
+
+
+# -------------------
+
+# BATCH SIMULATION
+
+def is_batch_compatible(network):
+	"""Determine whether ``network`` can be simulated by the batch engine. See the module overview
+	for the list of supported features.
+
+	Parameters
+	----------
+	network : |class_network|
+		The multi-echelon inventory network.
+
+	Returns
+	-------
+	bool
+		``True`` if the batch engine supports ``network``, ``False`` otherwise.
+	"""
+	for n in network.nodes:
+		# Single-product nodes only.
+		if n.is_multiproduct:
+			return False
+		prod_ind = n.product_indices[0]
+
+		# Supported policy types only.
+		policy = n.get_attribute('inventory_policy', product=prod_ind)
+		if policy is None or policy.type not in BATCH_POLICY_TYPES:
+			return False
+
+		# No disruptions, capacities, or cost functions.
+		if n.disruption_process is not None and n.disruption_process.random_process_type is not None:
+			return False
+		if n.inventory_capacity is not None or n.get_attribute('inventory_capacity', prod_ind) is not None:
+			return False
+		if n.get_attribute('local_holding_cost_function', prod_ind) is not None or \
+			n.get_attribute('stockout_cost_function', prod_ind) is not None:
+			return False
+
+		# One supplier per raw material, with NBOM = 1.
+		for rm_index in n.raw_materials_by_product(product=prod_ind, return_indices=True, network_BOM=True):
+			suppliers = n.raw_material_suppliers_by_raw_material(raw_material=rm_index, return_indices=True, network_BOM=True)
+			if len(suppliers) != 1:
+				return False
+			if n.NBOM(product=prod_ind, predecessor=suppliers[0], raw_material=rm_index) != 1:
+				return False
+
+	return True
+
+
+def batch_simulation(network, num_trials, num_periods, rand_seed=None, progress_bar=False, trial_seeds=None):
+	"""Simulate ``num_trials`` independent trials of ``num_periods`` periods each, advancing all
+	trials together. Return the total cost of each trial.
+
+	Trial ``r`` uses the same random demands as the ``r``-th trial of
+	:func:`stockpyl.sim.run_multiple_trials` with the same ``rand_seed``, so the costs returned
+	equal the costs of the trial-by-trial simulation. If ``trial_seeds`` is provided, trial ``r``
+	is seeded with ``trial_seeds[r]`` instead (and ``rand_seed`` is ignored).
+
+	Parameters
+	----------
+	network : |class_network|
+		The multi-echelon inventory network.
+	num_trials : int
+		Number of trials to simulate.
+	num_periods : int
+		Number of periods to simulate.
+	rand_seed : int, optional
+		Random number generator seed.
+	progress_bar : bool, optional
+		Display a progress bar? (The progress bar counts periods, not trials.)
+	trial_seeds : list, optional
+		List of ``num_trials`` seeds, one per trial.
+
+	Returns
+	-------
+	ndarray
+		Array of length ``num_trials`` containing the total cost over all nodes and periods in each trial.
+
+	Raises
+	------
+	ValueError
+		If network contains a directed cycle.
+	ValueError
+		If the network is not supported by the batch engine (see :func:`is_batch_compatible`).
+	"""
+	# Validate network.
+	if network.has_directed_cycle():
+		raise ValueError("network may not contain a directed cycle")
+	if not is_batch_compatible(network):
+		raise ValueError("network is not supported by the batch engine; use stockpyl.sim.run_multiple_trials() instead")
+
+	# Determine processing order of the nodes (the same as in the trial-by-trial simulation), and
+	# generate demands. (SimulationPlan is imported here since stockpyl.sim imports this module.)
+	from stockpyl.sim import SimulationPlan
+	plan = SimulationPlan(network)
+	demand_nodes = [n for n, _ in plan.demand_node_products if n.has_external_customer]
+	demands = _generate_batch_demands(demand_nodes, num_trials, num_periods, rand_seed, trial_seeds=trial_seeds)
+
+	# Build state arrays.
+	batch = _BatchState(network, num_trials, num_periods)
+
+	# Initialize progress bar. (If not requested, then this will disable it.)
+	pbar = tqdm(total=num_periods, disable=not progress_bar)
+
+	# MAIN LOOP
+
+	for t in range(num_periods):
+		# Update progress bar.
+		pbar.update()
+
+		# Set external demands for period t.
+		for k, n in enumerate(demand_nodes):
+			batch.inbound_order[n.index][None] = demands[:, k, t]
+
+		# Generate orders, downstream nodes first; then generate shipments, upstream nodes first.
+		for n in plan.order_sequence:
+			batch.place_orders(n)
+		for n in plan.shipment_sequence:
+			batch.ship(n)
+
+		# Calculate costs and advance pipelines.
+		batch.calculate_period_costs(t)
+		batch.advance_pipelines()
+
+	# Close progress bar.
+	pbar.close()
+
+	# Total cost over all nodes and periods, by trial.
+	return np.sum(batch.total_cost_incurred, axis=(1, 2))
+
+
+def run_multiple_trials_batch(network, num_trials, num_periods, rand_seed=None, progress_bar=True, trial_seeds=None):
+	"""Run ``num_trials`` trials of the simulation using the batch engine, each with ``num_periods``
+	periods. Return mean and SEM of average cost per period across all trials.
+
+	Results equal those of :func:`stockpyl.sim.run_multiple_trials` with the same ``rand_seed``
+	(or, if ``trial_seeds`` is provided, with the same per-trial seeds).
+
+	Parameters
+	----------
+	network : |class_network|
+		The multi-echelon inventory network.
+	num_trials : int
+		Number of trials to simulate.
+	num_periods : int
+		Number of periods to simulate.
+	rand_seed : int, optional
+		Random number generator seed.
+	progress_bar : bool, optional
+		Display a progress bar?
+	trial_seeds : list, optional
+		List of ``num_trials`` seeds, one per trial.
+
+	Returns
+	-------
+	mean_cost : float
+		Mean of average cost per period across all trials.
+	sem_cost : float
+		Standard error of average cost per period across all trials.
+
+	Raises
+	------
+	ValueError
+		If the network is not supported by the batch engine (see :func:`is_batch_compatible`).
+	"""
+	total_costs = batch_simulation(network, num_trials, num_periods, rand_seed=rand_seed,
+								   progress_bar=progress_bar, trial_seeds=trial_seeds)
+	average_costs = total_costs / num_periods
+
+	# Calculate mean and SEM of average cost.
+	mean_cost = float(np.mean(average_costs))
+	sem_cost = float(stats.sem(average_costs, ddof=0))
+
+	return mean_cost, sem_cost
+
+
+# -------------------
+
+# HELPER FUNCTIONS
+
+def _generate_batch_demands(demand_nodes, num_trials, num_periods, rand_seed=None, trial_seeds=None):
+	"""Generate external demands for all trials and periods.
+
+	Reproduces the random number stream of :func:`stockpyl.sim.run_multiple_trials`: the first
+	trial's seed is drawn from a PRNG seeded with ``rand_seed``, each subsequent trial's seed is
+	drawn from the previous trial's PRNG, and within a trial the demands are drawn period by period,
+	node by node. If ``trial_seeds`` is provided, each trial is seeded with its own entry instead.
+
+	Parameters
+	----------
+	demand_nodes : list
+		Nodes with external demand, in the order in which the simulation generates their demands.
+	num_trials : int
+		Number of trials.
+	num_periods : int
+		Number of periods.
+	rand_seed : int, optional
+		Random number generator seed.
+	trial_seeds : list, optional
+		List of ``num_trials`` seeds, one per trial.
+
+	Returns
+	-------
+	ndarray
+		Array of shape (``num_trials``, ``len(demand_nodes)``, ``num_periods``) of demands.
+	"""
+	demands = np.zeros((num_trials, len(demand_nodes), num_periods))
+	demand_sources = [n.get_attribute('demand_source', n.product_indices[0]) for n in demand_nodes]
+
+	# If at most one demand source is random, each trial's demands can be drawn a whole path at a
+	# time without changing the random number stream; otherwise, draw them period by period.
+	vectorize = sum(ds.type != 'D' for ds in demand_sources) <= 1
+
+	seed = np.random.RandomState(rand_seed).randint(1, 10000)
+	for r in range(num_trials):
+		if trial_seeds is None:
+			rng = np.random.RandomState(seed)
+		else:
+			rng = np.random.RandomState(trial_seeds[r])
+		if vectorize:
+			for k, ds in enumerate(demand_sources):
+				demands[r, k, :] = ds.generate_demands(num_periods, rng=rng)
+		else:
+			for t in range(num_periods):
+				for k, ds in enumerate(demand_sources):
+					demands[r, k, t] = ds.generate_demand(t, rng=rng)
+		seed = rng.randint(1, 10000)
+
+	return demands
+
+
+class _BatchState(object):
+	"""Array-based state of all trials of a batch simulation. Quantities that are indexed by
+	successor or predecessor in |class_state_vars| are stored in dicts keyed by node index and
+	then by successor or predecessor index (``None`` for the external customer or supplier);
+	each value is an array with one entry (or one row, for pipelines) per trial.
+
+	Parameters
+	----------
+	network : |class_network|
+		The multi-echelon inventory network.
+	num_trials : int
+		Number of trials.
+	num_periods : int
+		Number of periods.
+	"""
+
+	def __init__(self, network, num_trials, num_periods):
+		self.network = network
+		self.num_trials = num_trials
+		R = num_trials
+
+		# Per-node parameters.
+		self.product = {}
+		self.policy = {}
+		self.order_capacity = {}
+		self.order_lead_time = {}
+		self.shipment_lead_time = {}
+		self.successors = {}
+		self.suppliers = {}
+		self.customers = {}
+		self.echelon_descendants = {}
+		self.echelon_in_transit = {}
+		self.echelon_sinks = {}
+
+		# State variables.
+		self.inventory_level = {}
+		self.pending_finished_goods = {}
+		self.inbound_order = {}
+		self.inbound_order_pipeline = {}
+		self.backorders_by_successor = {}
+		self.outbound_shipment = {}
+		self.inbound_shipment_pipeline = {}
+		self.on_order_by_predecessor = {}
+		self.raw_material_inventory = {}
+		self.order_quantity = {}
+
+		# Costs, indexed by (trial, node, period).
+		self.node_position = {n.index: i for i, n in enumerate(network.nodes)}
+		self.total_cost_incurred = np.zeros((R, len(network.nodes), num_periods))
+
+		sink_indices = [n.index for n in network.sink_nodes]
+
+		for n in network.nodes:
+			prod_ind = n.product_indices[0]
+			self.product[n.index] = prod_ind
+			self.policy[n.index] = n.get_attribute('inventory_policy', product=prod_ind)
+			self.order_capacity[n.index] = n.get_attribute('order_capacity', product=prod_ind) or BIG_FLOAT
+			self.order_lead_time[n.index] = n.get_attribute('order_lead_time', prod_ind) or 0
+			self.shipment_lead_time[n.index] = n.get_attribute('shipment_lead_time', prod_ind) or 0
+			self.successors[n.index] = n.successor_indices(include_external=True)
+			self.customers[n.index] = [s.index for s in n.customers_by_product(product=prod_ind, network_BOM=True)
+									   if s is not None]
+			# (predecessor, raw material) pairs; each raw material has a single supplier.
+			self.suppliers[n.index] = [
+				(n.raw_material_suppliers_by_raw_material(raw_material=rm_index, return_indices=True, network_BOM=True)[0], rm_index)
+				for rm_index in n.raw_materials_by_product(product=prod_ind, return_indices=True, network_BOM=True)
+			]
+
+			# Echelon structure (for echelon base-stock policies).
+			if self.policy[n.index].type == 'EBS':
+				desc = n.descendants
+				desc_indices = [d.index for d in desc]
+				self.echelon_descendants[n.index] = desc_indices
+				self.echelon_in_transit[n.index] = [(d.index, p.index) for d in desc for p in d.predecessors()
+													if p.index == n.index or p.index in desc_indices]
+				self.echelon_sinks[n.index] = [d_ind for d_ind in desc_indices + [n.index] if d_ind in sink_indices]
+
+			# Initial inventory level.
+			init_IL = n.get_attribute('initial_inventory_level', prod_ind)
+			if init_IL is None:
+				init_IL = self.policy[n.index].get_order_quantity(product=prod_ind, include_raw_materials=False,
+																  inventory_position=0)
+			self.inventory_level[n.index] = np.full(R, init_IL, dtype=float)
+			self.pending_finished_goods[n.index] = np.zeros(R)
+
+			# Successor-indexed state variables.
+			self.inbound_order[n.index] = {s_ind: np.zeros(R) for s_ind in self.successors[n.index]}
+			self.backorders_by_successor[n.index] = {s_ind: np.zeros(R) for s_ind in self.successors[n.index]}
+			self.outbound_shipment[n.index] = {s_ind: np.zeros(R) for s_ind in self.successors[n.index]}
+			self.inbound_order_pipeline[n.index] = {}
+			for s in n.successors():
+				OLT = s.get_attribute('order_lead_time', s.product_indices[0]) or 0
+				self.inbound_order_pipeline[n.index][s.index] = np.zeros((R, OLT + 1))
+				# Initial orders.
+				for l in range(s.get_attribute('order_lead_time', prod_ind) or 0):
+					self.inbound_order_pipeline[n.index][s.index][:, l] = s.get_attribute('initial_orders', prod_ind) or 0
+
+			# Predecessor-indexed state variables.
+			self.inbound_shipment_pipeline[n.index] = {}
+			self.on_order_by_predecessor[n.index] = {}
+			self.raw_material_inventory[n.index] = {}
+			self.order_quantity[n.index] = {}
+			init_shipments = n.get_attribute('initial_shipments', prod_ind) or 0
+			init_orders = n.get_attribute('initial_orders', prod_ind) or 0
+			for p_ind, _ in self.suppliers[n.index]:
+				pipeline = np.zeros((R, self.order_lead_time[n.index] + self.shipment_lead_time[n.index] + 1))
+				for l in range(n.shipment_lead_time or 0):
+					pipeline[:, l] = init_shipments
+				self.inbound_shipment_pipeline[n.index][p_ind] = pipeline
+				self.on_order_by_predecessor[n.index][p_ind] = np.full(R,
+					init_shipments * self.shipment_lead_time[n.index] + init_orders * self.order_lead_time[n.index], dtype=float)
+				self.raw_material_inventory[n.index][p_ind] = np.zeros(R)
+				self.order_quantity[n.index][p_ind] = np.zeros(R)
+
+	def _inventory_position(self, node):
+		"""Return the local or echelon inventory position at ``node`` (depending on its policy type),
+		before demand is subtracted, for all trials.
+		"""
+		n_ind = node.index
+		suppliers = self.suppliers[n_ind]
+
+		if self.policy[n_ind].type == 'EBS':
+			# Echelon on-hand inventory at node and downstream, plus in-transit inventory between them,
+			# minus backorders at downstream sink nodes.
+			IP = np.maximum(0, self.inventory_level[n_ind])
+			for d_ind in self.echelon_descendants[n_ind]:
+				IP = IP + np.maximum(0, self.inventory_level[d_ind])
+			for d_ind, p_ind in self.echelon_in_transit[n_ind]:
+				IP = IP + np.sum(self.inbound_shipment_pipeline[d_ind][p_ind], axis=1)
+			for d_ind in self.echelon_sinks[n_ind]:
+				IP = IP - np.maximum(0, -self.inventory_level[d_ind])
+			# On-order and raw material inventory, averaged over raw materials.
+			OO = np.sum([self.on_order_by_predecessor[n_ind][p_ind] for p_ind, _ in suppliers], axis=0)
+			RMI = np.sum([self.raw_material_inventory[n_ind][p_ind] for p_ind, _ in suppliers], axis=0)
+			return IP + OO / len(suppliers) + RMI / len(suppliers)
+		else:
+			# Local IP: IL plus the number of units that can be made from the pipeline.
+			pipeline = np.min([self.raw_material_inventory[n_ind][p_ind] + self.on_order_by_predecessor[n_ind][p_ind]
+							   for p_ind, _ in suppliers], axis=0)
+			return self.inventory_level[n_ind] + pipeline
+
+	def _order_quantity(self, node, inventory_position):
+		"""Return the order quantity at ``node`` for all trials, given the inventory position
+		after demand is subtracted.
+		"""
+		policy = self.policy[node.index]
+		IP = inventory_position
+		if policy.type in ('BS', 'EBS'):
+			OQ = np.maximum(0.0, policy.base_stock_level - IP)
+		elif policy.type == 'sS':
+			OQ = np.where(IP <= policy.reorder_point, policy.order_up_to_level - IP, 0.0)
+		elif policy.type == 'rQ':
+			OQ = np.where(IP <= policy.reorder_point, policy.order_quantity, 0.0)
+		else:
+			OQ = np.full(self.num_trials, policy.order_quantity, dtype=float)
+
+		return np.minimum(OQ, self.order_capacity[node.index])
+
+	def place_orders(self, node):
+		"""Receive inbound orders at ``node`` and place its orders to its predecessors.
+		"""
+		n_ind = node.index
+
+		# Receive inbound orders. (Inbound orders from the external customer are set by the caller.)
+		demand = 0
+		for s_ind in self.successors[n_ind]:
+			if s_ind is not None:
+				pipeline = self.inbound_order_pipeline[n_ind][s_ind]
+				self.inbound_order[n_ind][s_ind] = pipeline[:, 0].copy()
+				pipeline[:, 0] = 0
+			demand = demand + self.inbound_order[n_ind][s_ind]
+
+		# Determine order quantity.
+		IP = self._inventory_position(node) - demand
+		OQ = self._order_quantity(node, IP)
+		self.pending_finished_goods[n_ind] = self.pending_finished_goods[n_ind] + OQ
+
+		# Place orders for all raw materials.
+		OLT = self.order_lead_time[n_ind]
+		for p_ind, _ in self.suppliers[n_ind]:
+			if p_ind is not None:
+				self.inbound_order_pipeline[p_ind][n_ind][:, OLT] += OQ
+			else:
+				self.inbound_shipment_pipeline[n_ind][None][:, OLT + self.shipment_lead_time[n_ind]] += OQ
+			self.order_quantity[n_ind][p_ind] = OQ
+			self.on_order_by_predecessor[n_ind][p_ind] = self.on_order_by_predecessor[n_ind][p_ind] + OQ
+
+	def ship(self, node):
+		"""Receive inbound shipments at ``node``, convert raw materials to finished goods,
+		and ship to successors.
+		"""
+		n_ind = node.index
+		starting_inventory_level = self.inventory_level[n_ind].copy()
+
+		# Receive inbound shipments.
+		for p_ind, _ in self.suppliers[n_ind]:
+			pipeline = self.inbound_shipment_pipeline[n_ind][p_ind]
+			ready_to_receive = pipeline[:, 0].copy()
+			pipeline[:, 0] = 0
+			self.raw_material_inventory[n_ind][p_ind] = self.raw_material_inventory[n_ind][p_ind] + ready_to_receive
+			self.on_order_by_predecessor[n_ind][p_ind] = self.on_order_by_predecessor[n_ind][p_ind] - ready_to_receive
+
+		# Convert raw materials to finished goods.
+		num_to_make = np.min([np.maximum(0, self.raw_material_inventory[n_ind][p_ind])
+							  for p_ind, _ in self.suppliers[n_ind]], axis=0)
+		for p_ind, _ in self.suppliers[n_ind]:
+			self.raw_material_inventory[n_ind][p_ind] = self.raw_material_inventory[n_ind][p_ind] - num_to_make
+		self.inventory_level[n_ind] = self.inventory_level[n_ind] + num_to_make
+		self.pending_finished_goods[n_ind] = self.pending_finished_goods[n_ind] - num_to_make
+
+		# Determine outbound shipments. (Satisfy demand in order of successor node index.)
+		current_on_hand = np.maximum(0.0, starting_inventory_level) + num_to_make
+		for s_ind in self.successors[n_ind]:
+			BO = self.backorders_by_successor[n_ind][s_ind]
+			IO = self.inbound_order[n_ind][s_ind]
+			OS = np.minimum(current_on_hand, BO + IO)
+			BO_OS = np.minimum(OS, BO)
+			non_BO_OS = OS - BO_OS
+			self.outbound_shipment[n_ind][s_ind] = OS
+			current_on_hand = current_on_hand - OS
+			self.inventory_level[n_ind] = self.inventory_level[n_ind] - IO
+			self.backorders_by_successor[n_ind][s_ind] = BO - BO_OS + np.maximum(0, IO - non_BO_OS)
+
+			# Propagate shipment downstream.
+			if s_ind is not None:
+				self.inbound_shipment_pipeline[s_ind][n_ind][:, self.shipment_lead_time[s_ind]] += OS
+
+	def calculate_period_costs(self, period):
+		"""Calculate costs for all nodes and trials in ``period``.
+		"""
+		for n in self.network.nodes:
+			n_ind = n.index
+			prod_ind = self.product[n_ind]
+			IL = self.inventory_level[n_ind]
+
+			# Finished goods holding cost.
+			holding_cost = (n.get_attribute('local_holding_cost', prod_ind) or 0) * np.maximum(0, IL)
+			# Raw materials holding cost (excluding external supplier).
+			for p_ind, rm_index in self.suppliers[n_ind]:
+				if p_ind is not None:
+					p = self.network.nodes_by_index[p_ind]
+					holding_cost = holding_cost + \
+						(p.get_attribute('local_holding_cost', rm_index) or 0) * self.raw_material_inventory[n_ind][p_ind]
+
+			# Stockout cost.
+			stockout_cost = (n.get_attribute('stockout_cost', prod_ind) or 0) * np.maximum(0, -IL)
+
+			# In-transit holding cost.
+			if n.get_attribute('in_transit_holding_cost', prod_ind) is None:
+				h = n.get_attribute('local_holding_cost', prod_ind) or 0
+			else:
+				h = n.get_attribute('in_transit_holding_cost', prod_ind) or 0
+			in_transit = 0
+			for s_ind in self.customers[n_ind]:
+				in_transit = in_transit + np.sum(self.inbound_shipment_pipeline[s_ind][n_ind], axis=1)
+			in_transit_holding_cost = h * in_transit
+
+			# Revenue.
+			revenue = (n.get_attribute('revenue', prod_ind) or 0) * \
+				np.sum([self.outbound_shipment[n_ind][s_ind] for s_ind in self.successors[n_ind]], axis=0)
+
+			# Fixed cost.
+			fixed_cost = n.fixed_cost or 0
+			if fixed_cost > 0:
+				order_qty = np.sum([self.order_quantity[n_ind][p_ind] for p_ind, _ in self.suppliers[n_ind]], axis=0)
+				fixed_cost_incurred = np.where(order_qty > 0, fixed_cost, 0.0)
+			else:
+				fixed_cost_incurred = 0
+
+			# Total cost.
+			self.total_cost_incurred[:, self.node_position[n_ind], period] = \
+				holding_cost + stockout_cost + in_transit_holding_cost + fixed_cost_incurred - revenue
+
+	def advance_pipelines(self):
+		"""Advance shipment and order pipelines by one period.
+		"""
+		for n_ind in self.inbound_shipment_pipeline:
+			for pipeline in self.inbound_shipment_pipeline[n_ind].values():
+				pipeline[:, :-1] = pipeline[:, 1:]
+				pipeline[:, -1] = 0
+			for pipeline in self.inbound_order_pipeline[n_ind].values():
+				pipeline[:, :-1] = pipeline[:, 1:]
+				pipeline[:, -1] = 0
@@ -366,7 +366,7 @@ def write_instance_and_states(network, filepath, instance_name=None, num_periods
 		# Change network's demands to deterministic, with the demands given in the state history.
 		if node.demand_source is not None and node.demand_source.type is not None:
 			# Create new demand source.
-			demand_list = [node.state_vars[t].inbound_order[None] for t in range(num_periods_to_save)]
+			demand_list = [dict(node.state_vars[t].inbound_order[None]) for t in range(num_periods_to_save)]
 			node.demand_source = DemandSource(
 				type='D',
 				demand_list=demand_list
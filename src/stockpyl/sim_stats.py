@@ -0,0 +1,455 @@
+"""
+.. include:: ../../globals.inc
+
+Overview
+--------
+
+The |mod_sim_stats| module contains a statistics collector that computes performance measures
+while a simulation is running, rather than by looping through ``node.state_vars`` after the
+simulation is finished. Pass a |class_stats_collector| to :func:`stockpyl.sim.simulation` or
+:func:`stockpyl.sim.run_multiple_trials` via the ``collector`` parameter; after each period, the collector
+updates one |class_running_statistic| per node, product, and performance measure. (In
+:func:`~stockpyl.sim.run_multiple_trials`, the statistics are accumulated over all trials.)
+
+Each |class_running_statistic| uses a constant amount of memory, regardless of the number of periods
+or trials: the mean and variance are updated using Welford's algorithm, and the quantiles are estimated
+using the P\\ :sup:`2` algorithm of Jain and Chlamtac (1985), which keeps five markers per quantile. This makes
+the collector suitable for long simulations, including those that use ``rolling_window=True``, for which the
+state variables for earlier periods are not kept.
+
+The following performance measures are collected:
+
+	* ``'total_cost'``: the total cost incurred at the node in each period (indexed by node only)
+	* ``'inventory_level'``: the ending inventory level of each product in each period
+	* ``'backorders'``: the ending backorders of each product in each period
+	* ``'fill_rate'``: the fraction of each period's demand for each product that is met from stock,
+	  in periods with positive demand
+
+The overall fill rate (total demand met from stock divided by total demand) is returned by
+:meth:`StatisticsCollector.fill_rate`, and the average cost per period of each simulation is
+recorded in :attr:`StatisticsCollector.trial_cost`.
+
+.. note:: |node_stage|
+
+A collector can be any object that has ``start()``, ``update()``, and ``finish()`` methods with the same
+signatures as those of |class_stats_collector|, so other performance measures can be collected by
+subclassing |class_stats_collector| or by writing a new class. If the simulation is run by calling
+:func:`stockpyl.sim.initialize` and :func:`stockpyl.sim.step` directly, call these methods after
+:func:`~stockpyl.sim.initialize`, after each :func:`~stockpyl.sim.step`, and after :func:`~stockpyl.sim.close`,
+respectively.
+
+.. code-block:: python
+
+	>>> from stockpyl.sim import simulation
+	>>> from stockpyl.sim_stats import StatisticsCollector
+	>>> from stockpyl.instances import load_instance
+	>>> network = load_instance("example_6_1")
+	>>> collector = StatisticsCollector()
+	>>> T = simulation(network, 1000, rand_seed=42, progress_bar=False, collector=collector)
+	>>> stat = collector.statistic('inventory_level', 1)
+	>>> stat.mean, stat.standard_deviation, stat.quantile(0.95)
+	(1.1253035771642548, 1.1499696274589095, 2.8645656005716673)
+	>>> collector.fill_rate(1)
+	0.9775698395691759
+
+
+API Reference
+-------------
+
+
+"""
+
+import math
+
+from stockpyl.helpers import is_integer
+
+
+# -------------------
+
+# CONSTANTS
+
+# Quantiles estimated by default.
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Performance measures collected by StatisticsCollector.
+MEASURES = ('total_cost', 'inventory_level', 'backorders', 'fill_rate')
+
+
+# -------------------
+
+# RUNNING STATISTICS
+
+class RunningStatistic(object):
+	"""A |class_running_statistic| object keeps summary statistics (count, mean, variance, minimum,
+	maximum, and quantile estimates) for a stream of observations, using a constant amount of memory.
+
+	Parameters
+	----------
+	quantiles : iterable of float, optional
+		The quantiles to estimate, each in (0, 1). Default = ``DEFAULT_QUANTILES``.
+
+	Attributes
+	----------
+	count : int
+		Number of observations.
+	mean : float
+		Mean of the observations.
+	min : float
+		Smallest observation (``None`` if there are no observations).
+	max : float
+		Largest observation (``None`` if there are no observations).
+
+	Raises
+	------
+	ValueError
+		If any quantile is not in (0, 1).
+	"""
+
+	def __init__(self, quantiles=DEFAULT_QUANTILES):
+		"""RunningStatistic constructor method.
+		"""
+		self.count = 0
+		self.mean = 0.0
+		self.min = None
+		self.max = None
+		# Sum of squared deviations from the mean (Welford's algorithm).
+		self._sum_sq_dev = 0.0
+		self._quantile_estimators = {q: _P2Quantile(q) for q in quantiles}
+
+	@property
+	def variance(self):
+		"""Sample variance of the observations (``nan`` if there are fewer than 2). Read only."""
+		if self.count < 2:
+			return float('nan')
+		return self._sum_sq_dev / (self.count - 1)
+
+	@property
+	def standard_deviation(self):
+		"""Sample standard deviation of the observations (``nan`` if there are fewer than 2). Read only."""
+		return math.sqrt(self.variance)
+
+	@property
+	def quantiles(self):
+		"""List of the quantiles that are estimated. Read only."""
+		return list(self._quantile_estimators.keys())
+
+	def add(self, value):
+		"""Add an observation.
+
+		Parameters
+		----------
+		value : float
+			The observation.
+		"""
+		value = float(value)
+		self.count += 1
+		delta = value - self.mean
+		self.mean += delta / self.count
+		self._sum_sq_dev += delta * (value - self.mean)
+		if self.min is None or value < self.min:
+			self.min = value
+		if self.max is None or value > self.max:
+			self.max = value
+		for estimator in self._quantile_estimators.values():
+			estimator.add(value)
+
+	def quantile(self, q):
+		"""Return the estimate of the ``q``-th quantile of the observations (``nan`` if there are no observations).
+		The estimate is exact if there are 5 or fewer observations.
+
+		Parameters
+		----------
+		q : float
+			The quantile. Must be one of the quantiles passed to the constructor.
+
+		Returns
+		-------
+		float
+			The quantile estimate.
+
+		Raises
+		------
+		ValueError
+			If ``q`` is not one of the quantiles that are estimated.
+		"""
+		if q not in self._quantile_estimators:
+			raise ValueError(f'{q} is not one of the quantiles that are estimated')
+		return self._quantile_estimators[q].value()
+
+	def to_dict(self):
+		"""Return a dict containing the summary statistics.
+
+		Returns
+		-------
+		dict
+			Dict with keys ``'count'``, ``'mean'``, ``'standard_deviation'``, ``'min'``, ``'max'``, and
+			``'quantiles'`` (a dict whose keys are the quantiles and whose values are their estimates).
+		"""
+		return {
+			'count': self.count,
+			'mean': self.mean,
+			'standard_deviation': self.standard_deviation,
+			'min': self.min,
+			'max': self.max,
+			'quantiles': {q: self.quantile(q) for q in self.quantiles}
+		}
+
+
+class _P2Quantile(object):
+	"""Estimate of a single quantile using the P^2 algorithm (Jain and Chlamtac, "The P^2 Algorithm
+	for Dynamic Calculation of Quantiles and Histograms Without Storing Observations," 1985).
+	"""
+
+	def __init__(self, p):
+		if not 0 < p < 1:
+			raise ValueError('quantiles must be in (0, 1)')
+		self.p = p
+		# Marker heights, actual positions, desired positions, and increments in desired positions.
+		self.heights = []
+		self.positions = [1, 2, 3, 4, 5]
+		self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+		self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+	def add(self, value):
+		heights = self.heights
+		if len(heights) < 5:
+			heights.append(value)
+			heights.sort()
+			return
+
+		# Find cell k such that heights[k] <= value < heights[k+1], adjusting extreme markers.
+		if value < heights[0]:
+			heights[0] = value
+			k = 0
+		elif value >= heights[4]:
+			heights[4] = value
+			k = 3
+		else:
+			k = 0
+			while value >= heights[k + 1]:
+				k += 1
+
+		# Update positions.
+		positions = self.positions
+		for i in range(k + 1, 5):
+			positions[i] += 1
+		for i in range(5):
+			self.desired[i] += self.increments[i]
+
+		# Adjust heights of middle markers, if necessary.
+		for i in range(1, 4):
+			d = self.desired[i] - positions[i]
+			if (d >= 1 and positions[i + 1] - positions[i] > 1) or (d <= -1 and positions[i - 1] - positions[i] < -1):
+				d = 1 if d > 0 else -1
+				height = self._parabolic(i, d)
+				if not heights[i - 1] < height < heights[i + 1]:
+					height = heights[i] + d * (heights[i + d] - heights[i]) / (positions[i + d] - positions[i])
+				heights[i] = height
+				positions[i] += d
+
+	def _parabolic(self, i, d):
+		q, n = self.heights, self.positions
+		return q[i] + d / (n[i + 1] - n[i - 1]) * (
+			(n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+			+ (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+	def value(self):
+		heights = self.heights
+		if len(heights) == 0:
+			return float('nan')
+		if len(heights) < 5 or self.positions[4] == 5:
+			# Exact quantile of the (at most 5) observations, interpolated linearly.
+			h = (len(heights) - 1) * self.p
+			lo = int(math.floor(h))
+			hi = min(lo + 1, len(heights) - 1)
+			return heights[lo] + (h - lo) * (heights[hi] - heights[lo])
+		return heights[2]
+
+
+# -------------------
+
+# STATISTICS COLLECTOR
+
+class StatisticsCollector(object):
+	"""A |class_stats_collector| object computes performance measures for each node and product during a
+	simulation. See the module overview for the measures that are collected.
+
+	Parameters
+	----------
+	quantiles : iterable of float, optional
+		The quantiles to estimate for each performance measure. Default = ``DEFAULT_QUANTILES``.
+
+	Attributes
+	----------
+	statistics : dict
+		Dict whose keys are (measure, node index, product index) tuples and whose values are the
+		corresponding |class_running_statistic| objects. (The product index is ``None`` for ``'total_cost'``.)
+	trial_cost : |class_running_statistic|
+		Statistics of the average cost per period of each simulation (trial).
+	num_trials : int
+		Number of simulations (trials) that have been completed.
+	"""
+
+	def __init__(self, quantiles=DEFAULT_QUANTILES):
+		"""StatisticsCollector constructor method.
+		"""
+		self.quantiles = tuple(quantiles)
+		self.statistics = {}
+		self.trial_cost = RunningStatistic(self.quantiles)
+		self.num_trials = 0
+		# Total demand and demand met from stock, by (node index, product index), over all trials.
+		self._demand_total = {}
+		self._demand_met_from_stock_total = {}
+		# Cumulative demand as of the most recent period of the current trial, by (node index, product index).
+		self._last_demand_cumul = {}
+
+	def start(self, network):
+		"""Prepare to collect statistics for a new simulation of ``network``. Called after the simulation is initialized.
+
+		Parameters
+		----------
+		network : |class_network|
+			The multi-echelon inventory network.
+		"""
+		self._last_demand_cumul = {}
+
+	def update(self, network, period):
+		"""Update the statistics using the state variables of all nodes in ``period``. Called after each period
+		of the simulation.
+
+		Parameters
+		----------
+		network : |class_network|
+			The multi-echelon inventory network.
+		period : int
+			The period that was just simulated.
+		"""
+		for node in network.nodes:
+			state_vars = node.state_vars[period]
+			self._add('total_cost', node.index, None, state_vars.total_cost_incurred)
+
+			for prod_index in node.product_indices:
+				IL = state_vars.inventory_level[prod_index]
+				self._add('inventory_level', node.index, prod_index, IL)
+				self._add('backorders', node.index, prod_index, max(0, -IL))
+
+				# Demand in this period = change in cumulative demand.
+				key = (node.index, prod_index)
+				demand_cumul = state_vars.demand_cumul[prod_index]
+				demand = demand_cumul - self._last_demand_cumul.get(key, 0)
+				self._last_demand_cumul[key] = demand_cumul
+				if demand > 0:
+					met_from_stock = state_vars.demand_met_from_stock[prod_index]
+					self._add('fill_rate', node.index, prod_index, met_from_stock / demand)
+					self._demand_total[key] = self._demand_total.get(key, 0) + demand
+					self._demand_met_from_stock_total[key] = self._demand_met_from_stock_total.get(key, 0) + met_from_stock
+
+	def finish(self, network, total_cost, num_periods):
+		"""Record the results of a completed simulation. Called after the simulation is closed.
+
+		Parameters
+		----------
+		network : |class_network|
+			The multi-echelon inventory network.
+		total_cost : float
+			Total cost over all nodes and periods.
+		num_periods : int
+			Number of periods that were simulated.
+		"""
+		self.trial_cost.add(total_cost / num_periods)
+		self.num_trials += 1
+
+	def _add(self, measure, node_index, prod_index, value):
+		"""Add ``value`` to the statistic for ``measure``, ``node_index``, and ``prod_index``, creating it if necessary.
+		"""
+		key = (measure, node_index, prod_index)
+		stat = self.statistics.get(key)
+		if stat is None:
+			stat = RunningStatistic(self.quantiles)
+			self.statistics[key] = stat
+		stat.add(value)
+
+	def _parse_key(self, measure, node, product):
+		"""Return the (node index, product index) pair for ``measure``, ``node``, and ``product``.
+		"""
+		if measure not in MEASURES:
+			raise ValueError(f'{measure} is not a supported measure')
+		node_index = node if node is None or is_integer(node) else node.index
+		if measure == 'total_cost':
+			return node_index, None
+		prod_index = product if product is None or is_integer(product) else product.index
+		if prod_index is None:
+			# Determine product automatically.
+			prod_indices = set(key[2] for key in self.statistics if key[0] == measure and key[1] == node_index)
+			if len(prod_indices) != 1:
+				raise ValueError('product cannot be None unless node has exactly 1 product.')
+			prod_index = prod_indices.pop()
+		return node_index, prod_index
+
+	def statistic(self, measure, node, product=None):
+		"""Return the |class_running_statistic| for ``measure`` at ``node`` and ``product``.
+
+		Parameters
+		----------
+		measure : str
+			The performance measure (``'total_cost'``, ``'inventory_level'``, ``'backorders'``, or ``'fill_rate'``).
+		node : |class_node| or int
+			The node, as a |class_node| object or index.
+		product : |class_product| or int, optional
+			The product, as a |class_product| object or index. May be ``None`` if the node has a single product.
+			Ignored for ``'total_cost'``.
+
+		Returns
+		-------
+		|class_running_statistic|
+			The statistic. If no observations were collected, the statistic has ``count`` = 0.
+
+		Raises
+		------
+		ValueError
+			If ``measure`` is not a supported measure, or if ``product`` is ``None`` and the node has more than 1 product.
+		"""
+		node_index, prod_index = self._parse_key(measure, node, product)
+		stat = self.statistics.get((measure, node_index, prod_index))
+		if stat is None:
+			stat = RunningStatistic(self.quantiles)
+		return stat
+
+	def fill_rate(self, node, product=None):
+		"""Return the overall fill rate at ``node`` for ``product``, i.e., the total demand met from stock divided by
+		the total demand, over all periods and trials. Returns 1.0 if there was no demand.
+
+		Parameters
+		----------
+		node : |class_node| or int
+			The node, as a |class_node| object or index.
+		product : |class_product| or int, optional
+			The product, as a |class_product| object or index. May be ``None`` if the node has a single product.
+
+		Returns
+		-------
+		float
+			The fill rate.
+
+		Raises
+		------
+		ValueError
+			If ``product`` is ``None`` and the node has more than 1 product.
+		"""
+		key = self._parse_key('inventory_level', node, product)
+		demand = self._demand_total.get(key, 0)
+		if demand > 0:
+			return self._demand_met_from_stock_total[key] / demand
+		else:
+			return 1.0
+
+	def summary(self):
+		"""Return a dict containing the summary statistics for all measures, nodes, and products.
+
+		Returns
+		-------
+		dict
+			Dict whose keys are (measure, node index, product index) tuples and whose values are dicts returned
+			by :meth:`RunningStatistic.to_dict`.
+		"""
+		return {key: stat.to_dict() for key, stat in self.statistics.items()}
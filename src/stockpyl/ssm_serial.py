@@ -54,6 +54,14 @@ from stockpyl.newsvendor import *
 from stockpyl.supply_chain_network import serial_system
 
 
+# Maximum number of (y, d) pairs to evaluate at once in _expected_C_hat().
+_GATHER_BLOCK_SIZE = 2 ** 20
+
+# Cache of discretized lead-time demand distributions, used by _discretized_lead_time_demand().
+_ltd_discretization_cache = {}
+_LTD_DISCRETIZATION_CACHE_SIZE = 256
+
+
 ### OPTIMIZATION ###
 
 def optimize_base_stock_levels(num_nodes=None, node_order_in_system=None, node_order_in_lists=None,
@@ -261,79 +269,9 @@ def optimize_base_stock_levels(num_nodes=None, node_order_in_system=None, node_o
 	h = [0] + [echelon_holding_cost_dict[j] for j in range(1, N+1)]
 	p = stockout_cost
 
-	# Build "sum of lead-time demand" distribution (LTD distribution in
-	# which L = sum of all lead times)
-	sum_ltd_dist = demand_source.lead_time_demand_distribution(sum(L))
-
-	# Get truncation bounds for sum-of-lead-time demand distribution.
-	# If support is finite, use support; otherwise, use F^{-1}(.).
-	if sum_ltd_dist.a == float("-inf"):
-		sum_ltd_lo = sum_ltd_dist.ppf(sum_ltd_lower_tail_prob)
-	else:
-		# interval(1) gives lo and hi end of interval that contains 100% of
-		# probability area, i.e., 0th and 100th percentile, which for uniform
-		# distribution is the entire support.
-		sum_ltd_lo = sum_ltd_dist.interval(1)[0]
-	if sum_ltd_dist.b == float("inf"):
-		sum_ltd_hi = sum_ltd_dist.ppf(1 - sum_ltd_upper_tail_prob)
-	else:
-		sum_ltd_hi = sum_ltd_dist.interval(1)[1]
-
-	# Is demand distribution discrete (integer)?
-	if demand_source.type in ('P', 'UD'):
-		discrete_distribution = True
-	elif demand_source.type == 'CD' and np.all([is_integer(d) for d in demand_source.demand_list]):
-		discrete_distribution = True
-	else:
-		discrete_distribution = False
-
-	# Determine x (inventory level) array (truncated and discretized).
-	# If demand distribution is discrete, discretize to integers; otherwise,
-	# use x_num to determine granularity.
-	if x is None:
-		# x-range = [sum_ltd_lo-sum_ltd_mean, sum_ltd_hi].
-		x_lo = sum_ltd_lo - sum_ltd_hi # originally used sum_ltd_dist.mean() here but I think sum_ltd_hi is more accurate
-		x_hi = sum_ltd_hi
-		# Ensure x >= largest echelon BS level, if provided.
-		if S is not None:
-			x_hi = max(x_hi, max(S.values()))
-		# Build x range. Is demand distribution discrete?
-		if discrete_distribution:
-			# x_lo and h_hi should already be integers, but cast them anyway.
-			x_lo    = round(x_lo)
-			x_delta = int(1)
-			x_num   = round(x_hi-x_lo)
-		elif x_num and x_hi > x_lo:
-			x_lo    = float(x_lo)
-			x_delta = float((x_hi-x_lo)/x_num)
-		else:
-			x_lo    = float((x_lo+x_hi)*0.5)
-			x_delta = float(1)
-			x_num   = int()
-		x_hi = x_num*x_delta+x_lo
-		x = np.array([x_ind*x_delta+x_lo for x_ind in range(x_num+1)])
-	elif x.size > 1:
-		x_lo    = np.min(x)
-		x_hi    = np.max(x)
-		x_delta = abs(x[1]-x[0])
-		x_num   = int((x_hi-x_lo)/x_delta)
-	else:
-		x_lo    = x[0]
-		x_hi    = x_lo
-		x_delta = int(1)
-		x_num   = int()
-
-	# Extended x array (used for approximate C-hat function).
-	x_ext_num = math.ceil(sum_ltd_hi/x_delta)
-	# x_ext_lo = np.min(x) - (mu * sum(L) +
-	# 						d.max() * sigma * np.sqrt(sum(L)))
-	# x_ext_hi = np.max(x) + (mu * sum(L) +
-	# 						d.max() * sigma * np.sqrt(sum(L)))
-	x_ext = np.array([x_ext_ind*x_delta+x_lo for x_ext_ind in range(-x_ext_num, x_num+x_ext_num+1)])
-
-	# Index dictionaries to find nearest entry for matching value faster
-	index_x     = {x    [ind]: ind for ind in range(x    .size)}
-	index_x_ext = {x_ext[ind]: ind for ind in range(x_ext.size)}
+	# Build x (inventory level) arrays.
+	x, x_ext, discrete_distribution = _inventory_level_arrays(demand_source, L, x, x_num,
+		sum_ltd_lower_tail_prob, sum_ltd_upper_tail_prob, None if S is None else max(S.values()))
 
 	# Initialize arrays. (0th element is ignored since we are assuming stages
 	# are numbered starting at 1. C_bar is an exception since C_bar[0] is
@@ -364,76 +302,16 @@ def optimize_base_stock_levels(num_nodes=None, node_order_in_system=None, node_o
 		# C_hat_lim2 is never used since y-d is never greater than the y range;
 		# however, it is here so it can be plotted.
 		if j > 1:
-			C_hat_lim2[j, :] = h[j] * x_ext + C[j-1, find_nearest(x, S_star[j-1], True, index_x)]
+			C_hat_lim2[j, :] = h[j] * x_ext + C[j-1, _nearest_indices(x, S_star[j-1])]
 		else:
 			C_hat_lim2[j, :] = h[j] * x_ext
 
-		# Get lead-time demand distribution.
-		ltd_dist = demand_source.lead_time_demand_distribution(L[j])
-
-		# Get truncation bounds for lead-time demand distribution.
-		# If support is finite, use support; otherwise, use F^{-1}(.).
-		if ltd_dist.a == float("-inf"):
-			d_lo = max(ltd_dist.ppf(ltd_lower_tail_prob), float())
-		else:
-			d_lo = max(ltd_dist.interval(1)[0], float())
-		if ltd_dist.b == float("inf"):
-			d_hi = max(ltd_dist.ppf(float(1)-ltd_upper_tail_prob), d_lo)
-		else:
-			d_hi = max(ltd_dist.interval(1)[1], d_lo)
-
-		# Determine d (lead-time demand) array (truncated and discretized).
-		if discrete_distribution:
-			d_lo    = round(d_lo)
-			d_delta = int(1)
-			num     = round(d_hi-d_lo)
-		elif d_num and d_hi > d_lo:
-			d_lo    = float(d_lo)
-			d_delta = float((d_hi-d_lo)/d_num)
-			num     = d_num
-		else:
-			d_lo    = float((d_lo+d_hi)*0.5)
-			d_delta = float(1)
-			num     = int()
-		d_hi = num*d_delta+d_lo
-		d = np.array([d_ind*d_delta+d_lo for d_ind in range(num+1) if (ltd_dist.cdf((d_ind+0.5)*d_delta+d_lo) if d_ind != num else float(1)) > (ltd_dist.cdf((d_ind-0.5)*d_delta+d_lo) if d_ind else float())])
-
-		# Calculate discretized cdf array.
-		fd = np.array([(ltd_dist.cdf(d[ind]+d_delta*float(0.5)) if ind+1 != d.size else float(1))-(ltd_dist.cdf(d[ind]-d_delta*float(0.5)) if ind else float()) for ind in range(d.size)])
-		#fd = ltd_dist.cdf(d+d_delta/2) - ltd_dist.cdf(d-d_delta/2)
+		# Get discretized lead-time demand distribution.
+		d, fd = _discretized_lead_time_demand(demand_source, L[j], ltd_lower_tail_prob, ltd_upper_tail_prob,
+											  d_num, discrete_distribution)
 
 		# Calculate C.
-		for y in x:
-
-			# Get index of closest element of x to y.
-			the_x = index_x[y]
-
-			# Loop through demands and calculate expected cost.
-			# This method uses the following result (see Problem 6.13):
-			# lim_{y -> -infty} C_j(y) = -(p + h'_{j+1})(y - sum_{i=1}^j E[D_i])
-			# lim_{y -> +infty} C_j(y) = h_j(y - E[D_j]) + C_{j-1}(S*_{j-1})
-
-			the_cost = np.zeros(d.size)
-
-			for d_ind in range(d.size):
-				# Calculate y - d.
-				y_minus_d = y - d[d_ind]
-
-				# Calculate cost -- use approximate value of C-hat if y-d is
-				# outside of x-range.
-				if y_minus_d < x_lo:
-					the_cost[d_ind] = \
-						C_hat_lim1[j, find_nearest(x_ext, y_minus_d, True, index_x_ext)]
-				elif y_minus_d > x_hi: # THIS SHOULD NEVER HAPPEN
-					print('WARNING: y > x + d', flush=True)
-					the_cost[d_ind] = \
-						C_hat_lim2[j, find_nearest(x_ext, y_minus_d, True, index_x_ext)]
-				else:
-					the_cost[d_ind] = \
-						C_hat[j, find_nearest(x, y_minus_d, True, index_x)]
-
-			# Calculate expected cost.
-			C[j, the_x] = np.dot(fd, the_cost)
+		C[j, :] = _expected_C_hat(x, x_ext, C_hat[j, :], C_hat_lim1[j, :], C_hat_lim2[j, :], d, fd)
 
 		# Did user specify S?
 		if S is None:
@@ -443,10 +321,10 @@ def optimize_base_stock_levels(num_nodes=None, node_order_in_system=None, node_o
 		else:
 			# Yes -- use specified S.
 			S_star[j] = S[j]
-		C_star[j] = C[j, find_nearest(x, S_star[j], True, index_x)]
+		C_star[j] = C[j, _nearest_indices(x, S_star[j])]
 
 		# Calculate C_bar
-		C_bar[j, :] = C[j, find_nearest(x, np.minimum(S_star[j], x), True, index_x)]
+		C_bar[j, :] = C[j, _nearest_indices(x, np.minimum(S_star[j], x))]
 
 	# Plot functions.
 	if plots:
@@ -456,8 +334,8 @@ def optimize_base_stock_levels(num_nodes=None, node_order_in_system=None, node_o
 		axes[0, 0].set_title('C-hat')
 		axes[0, 0].legend(list(map(str, range(1, N+1))))
 		k = N
-		axes[0, 0].plot(x, C_hat_lim1[k, find_nearest(x_ext, x, True, index_x_ext)], ':')
-		axes[0, 0].plot(x, C_hat_lim2[k, find_nearest(x_ext, x, True, index_x_ext)], ':')
+		axes[0, 0].plot(x, C_hat_lim1[k, _nearest_indices(x_ext, x)], ':')
+		axes[0, 0].plot(x, C_hat_lim2[k, _nearest_indices(x_ext, x)], ':')
 		# C_bar.
 		axes[0, 1].plot(x, np.transpose(C_bar))
 		axes[0, 1].set_title('C-bar')
@@ -858,6 +736,150 @@ def expected_holding_cost(echelon_S,
 	return holding_cost
 
 
+def expected_cost_batch(S_matrix,
+						num_nodes=None, echelon_holding_cost=None, lead_time=None,
+						stockout_cost=None, demand_mean=None, demand_standard_deviation=None,
+						demand_source=None, network=None,
+						x_num=1000, d_num=100,
+						ltd_lower_tail_prob=1-stats.norm.cdf(4),
+						ltd_upper_tail_prob=1-stats.norm.cdf(4),
+						sum_ltd_lower_tail_prob=1-stats.norm.cdf(4),
+						sum_ltd_upper_tail_prob=1-stats.norm.cdf(8)):
+	"""Calculate expected costs of multiple solutions.
+
+	This is equivalent to calling :func:`~stockpyl.ssm_serial.expected_cost` once for each
+	solution, but the parameters are validated, and the x-array and lead-time demand distributions
+	are built, only once. The :math:`g_j(\\cdot)` function is calculated once for each distinct
+	combination of :math:`S_1,\\ldots,S_{j-1}` among the solutions (rather than once per solution),
+	and :math:`g_N(\\cdot)` is evaluated only at each solution's :math:`S_N`.
+
+	All of the solutions share one x-array, which is extended to include the largest base-stock
+	level in ``S_matrix``. If this is larger than the range that
+	:func:`~stockpyl.ssm_serial.expected_cost` would use for a given solution, the discretization,
+	and therefore the cost, may differ slightly from that returned by
+	:func:`~stockpyl.ssm_serial.expected_cost`.
+
+	For parameter descriptions, see docstring for :func:`~stockpyl.ssm_serial.optimize_base_stock_levels`.
+
+	Parameters
+	----------
+	S_matrix : ndarray or list
+		2-D array (or list of lists) of echelon base-stock levels to be evaluated, with one row per
+		solution; ``S_matrix[k][j-1]`` is the echelon base-stock level of node ``j`` in solution ``k``.
+		Alternatively, a list of dicts of echelon base-stock levels, as in
+		:func:`~stockpyl.ssm_serial.expected_cost`.
+	other parameters :
+		See :func:`~stockpyl.ssm_serial.optimize_base_stock_levels`.
+
+	Returns
+	-------
+	costs : ndarray
+		Expected cost of system under each solution.
+
+
+	Raises
+	------
+	ValueError
+		If ``S_matrix`` does not have one column per node, or if it contains ``None``.
+	ValueError
+		If ``stockout_cost`` is ``None`` or if ``echelon_holding_cost``
+		or ``lead_time`` is ``None`` for any node.
+	ValueError
+		If ``demand_mean`` or ``demand_standard_deviation`` is ``None`` and 
+		``demand_source`` is ``None``.
+	ValueError
+		If ``stockout_cost`` < 0 or if ``lead_time`` < 0 for any node.
+		
+
+	**Equations Used**: See :func:`optimize_base_stock_levels`.
+
+
+	**Example** (Example 6.1):
+
+	.. testsetup:: *
+
+		from stockpyl.ssm_serial import *
+
+	.. doctest::
+
+		>>> expected_cost_batch(
+		...		S_matrix=[[6.5144388073261155, 12.012332294949644, 22.700237234889784], [6, 12, 23]],
+		... 	num_nodes=3, 
+		... 	echelon_holding_cost=[2, 2, 3], 
+		... 	lead_time=[2, 1, 1], 
+		... 	stockout_cost=37.12, 
+		... 	demand_mean=5, 
+		... 	demand_standard_deviation=1
+		...	)
+		array([47.64109993, 48.36382417])
+	"""
+
+	# Validate data and re-index to N, ..., 1.
+	_, num_nodes, echelon_holding_cost_dict, lead_time_dict, stockout_cost, demand_source \
+		= _preprocess_parameters(num_nodes, None, None, echelon_holding_cost, lead_time, stockout_cost,
+		demand_mean, demand_standard_deviation, demand_source, network)
+
+	# Get shortcuts to some parameters (for convenience).
+	N = num_nodes
+	mu = demand_source.demand_distribution.mean()
+	L = [0] + [lead_time_dict[j] for j in range(1, N+1)]
+	h = [0] + [echelon_holding_cost_dict[j] for j in range(1, N+1)]
+	p = stockout_cost
+
+	# Convert S_matrix to an array and validate it.
+	if len(S_matrix) > 0 and isinstance(S_matrix[0], dict):
+		S_matrix = [[echelon_S.get(j) for j in range(1, N+1)] for echelon_S in S_matrix]
+	S_matrix = np.array(S_matrix, dtype=float)
+	if S_matrix.size == 0:
+		return np.zeros(0)
+	if S_matrix.ndim != 2 or S_matrix.shape[1] != N: raise ValueError("S_matrix must have one column per node")
+	if np.any(np.isnan(S_matrix)): raise ValueError("S_matrix cannot contain None")
+	K = S_matrix.shape[0]
+
+	# Build x (inventory level) arrays.
+	x, x_ext, discrete_distribution = _inventory_level_arrays(demand_source, L, None, x_num,
+		sum_ltd_lower_tail_prob, sum_ltd_upper_tail_prob, np.max(S_matrix))
+
+	# The solutions are partitioned into groups that have the same S_1, ..., S_{j-1}; group[k] is
+	# the group of solution k, and row g of C_bar (and of C_star) contains C_bar_{j-1} (and
+	# C*_{j-1}) for group g. Initially, all solutions are in one group.
+	group = np.zeros(K, dtype=int)
+	C_bar = ((p + sum(h)) * np.maximum(-x, 0))[np.newaxis, :]
+	C_star = np.zeros(1)
+
+	# Loop through stages.
+	for j in range(1, N+1):
+
+		# Calculate C_hat and approximate C-hat functions.
+		C_hat = h[j] * x + C_bar
+		C_hat_lim1 = -(p + sum(h)) * (x_ext - mu * sum(L[1:j]))
+		for i in range(1, j+1):
+			C_hat_lim1 += h[i] * (x_ext - mu * sum(L[i:j]))
+		C_hat_lim2 = h[j] * x_ext + C_star[:, np.newaxis]
+
+		# Get discretized lead-time demand distribution.
+		d, fd = _discretized_lead_time_demand(demand_source, L[j], ltd_lower_tail_prob, ltd_upper_tail_prob,
+											  d_num, discrete_distribution)
+
+		if j == N:
+			# Evaluate C_N at each solution's S_N only.
+			y = x[_nearest_indices(x, S_matrix[:, N-1])]
+			return _expected_C_hat_at(x, x_ext, C_hat, C_hat_lim1, C_hat_lim2, d, fd, y, group)
+
+		# Calculate C for each group.
+		C = np.array([_expected_C_hat(x, x_ext, C_hat[g, :], C_hat_lim1, C_hat_lim2[g, :], d, fd)
+					  for g in range(C_hat.shape[0])])
+
+		# Split the groups by S_j and calculate C_star and C_bar for the new groups.
+		_, first, new_group = np.unique(np.column_stack((group, S_matrix[:, j-1])), axis=0,
+										return_index=True, return_inverse=True)
+		parent = group[first]
+		group = new_group.reshape(-1)
+		S_j = S_matrix[first, j-1]
+		C_star = C[parent, _nearest_indices(x, S_j)]
+		C_bar = C[parent[:, np.newaxis], _nearest_indices(x, np.minimum(S_j[:, np.newaxis], x))]
+
+
 ### HELPER FUNCTIONS ###
 
 def _preprocess_parameters(num_nodes=None, node_order_in_system=None, node_order_in_lists=None,
@@ -946,4 +968,368 @@ def _preprocess_parameters(num_nodes=None, node_order_in_system=None, node_order
 	if any(L is None for L in lead_time_dict.values()): raise ValueError("lead_time cannot be None for any node")
 	if any(l < 0 for l in lead_time_dict.values()): raise ValueError("lead_time must be non-negative for every node")
 	
-	return old_to_new_dict, num_nodes, echelon_holding_cost_dict, lead_time_dict, stockout_cost, demand_source
\ No newline at end of file
+	return old_to_new_dict, num_nodes, echelon_holding_cost_dict, lead_time_dict, stockout_cost, demand_source
+
+
+def _inventory_level_arrays(demand_source, L, x, x_num, sum_ltd_lower_tail_prob, sum_ltd_upper_tail_prob,
+							S_max=None):
+	"""Determine the truncated, discretized x (inventory level) array and the extended x array used
+	by :func:`optimize_base_stock_levels` and :func:`expected_cost_batch`.
+
+	Parameters
+	----------
+	demand_source : |class_demand_source|
+		The demand source for a single period.
+	L : list
+		Lead times, indexed from 1 (``L[0]`` is ignored).
+	x : ndarray
+		x-array to use, or ``None`` to determine automatically.
+	x_num : int
+		Number of discretization intervals to use for ``x`` range.
+	sum_ltd_lower_tail_prob : float
+		Lower tail probability to use when truncating "sum-of-lead-times" demand distribution.
+	sum_ltd_upper_tail_prob : float
+		Upper tail probability to use when truncating "sum-of-lead-times" demand distribution.
+	S_max : float, optional
+		Largest echelon base-stock level to be evaluated, if any; the x-array is extended to include it.
+
+	Returns
+	-------
+	x : ndarray
+		The x-array.
+	x_ext : ndarray
+		The extended x-array.
+	discrete_distribution : bool
+		``True`` if the demand distribution is discrete (integer).
+	"""
+
+	# Build "sum of lead-time demand" distribution (LTD distribution in
+	# which L = sum of all lead times)
+	sum_ltd_dist = demand_source.lead_time_demand_distribution(sum(L))
+
+	# Get truncation bounds for sum-of-lead-time demand distribution.
+	# If support is finite, use support; otherwise, use F^{-1}(.).
+	if sum_ltd_dist.a == float("-inf"):
+		sum_ltd_lo = sum_ltd_dist.ppf(sum_ltd_lower_tail_prob)
+	else:
+		# interval(1) gives lo and hi end of interval that contains 100% of
+		# probability area, i.e., 0th and 100th percentile, which for uniform
+		# distribution is the entire support.
+		sum_ltd_lo = sum_ltd_dist.interval(1)[0]
+	if sum_ltd_dist.b == float("inf"):
+		sum_ltd_hi = sum_ltd_dist.ppf(1 - sum_ltd_upper_tail_prob)
+	else:
+		sum_ltd_hi = sum_ltd_dist.interval(1)[1]
+
+	# Is demand distribution discrete (integer)?
+	if demand_source.type in ('P', 'UD'):
+		discrete_distribution = True
+	elif demand_source.type == 'CD' and np.all([is_integer(d) for d in demand_source.demand_list]):
+		discrete_distribution = True
+	else:
+		discrete_distribution = False
+
+	# Determine x (inventory level) array (truncated and discretized).
+	# If demand distribution is discrete, discretize to integers; otherwise,
+	# use x_num to determine granularity.
+	if x is None:
+		# x-range = [sum_ltd_lo-sum_ltd_mean, sum_ltd_hi].
+		x_lo = sum_ltd_lo - sum_ltd_hi # originally used sum_ltd_dist.mean() here but I think sum_ltd_hi is more accurate
+		x_hi = sum_ltd_hi
+		# Ensure x >= largest echelon BS level, if provided.
+		if S_max is not None:
+			x_hi = max(x_hi, S_max)
+		# Build x range. Is demand distribution discrete?
+		if discrete_distribution:
+			# x_lo and h_hi should already be integers, but cast them anyway.
+			x_lo    = round(x_lo)
+			x_delta = int(1)
+			x_num   = round(x_hi-x_lo)
+		elif x_num and x_hi > x_lo:
+			x_lo    = float(x_lo)
+			x_delta = float((x_hi-x_lo)/x_num)
+		else:
+			x_lo    = float((x_lo+x_hi)*0.5)
+			x_delta = float(1)
+			x_num   = int()
+		x_hi = x_num*x_delta+x_lo
+		x = np.array([x_ind*x_delta+x_lo for x_ind in range(x_num+1)])
+	elif x.size > 1:
+		x_lo    = np.min(x)
+		x_hi    = np.max(x)
+		x_delta = abs(x[1]-x[0])
+		x_num   = int((x_hi-x_lo)/x_delta)
+	else:
+		x_lo    = x[0]
+		x_hi    = x_lo
+		x_delta = int(1)
+		x_num   = int()
+
+	# Extended x array (used for approximate C-hat function).
+	x_ext_num = math.ceil(sum_ltd_hi/x_delta)
+	# x_ext_lo = np.min(x) - (mu * sum(L) +
+	# 						d.max() * sigma * np.sqrt(sum(L)))
+	# x_ext_hi = np.max(x) + (mu * sum(L) +
+	# 						d.max() * sigma * np.sqrt(sum(L)))
+	x_ext = np.array([x_ext_ind*x_delta+x_lo for x_ext_ind in range(-x_ext_num, x_num+x_ext_num+1)])
+
+	return x, x_ext, discrete_distribution
+
+
+def _discretized_lead_time_demand(demand_source, lead_time, lower_tail_prob, upper_tail_prob, d_num,
+								  discrete_distribution):
+	"""Return the truncated, discretized lead-time demand distribution used by :func:`optimize_base_stock_levels`,
+	as an array ``d`` of lead-time demand values and an array ``fd`` of their probabilities.
+
+	The arrays are cached, keyed by the parameters of ``demand_source`` and the remaining arguments, so
+	stages with equal lead times and repeated calls (e.g., from :func:`expected_cost`) reuse them.
+	The cached arrays are read-only.
+
+	Parameters
+	----------
+	demand_source : |class_demand_source|
+		The demand source for a single period.
+	lead_time : float or int
+		The lead time.
+	lower_tail_prob : float
+		Lower tail probability to use when truncating the lead-time demand distribution.
+	upper_tail_prob : float
+		Upper tail probability to use when truncating the lead-time demand distribution.
+	d_num : int
+		Number of discretization intervals to use for the lead-time demand range (ignored if
+		``discrete_distribution`` is ``True``).
+	discrete_distribution : bool
+		``True`` if the demand distribution is discrete (integer), in which case the lead-time
+		demand is discretized to integers.
+
+	Returns
+	-------
+	d : ndarray
+		Lead-time demand values.
+	fd : ndarray
+		Probabilities of the lead-time demand values.
+	"""
+	key = (tuple(tuple(v) if isinstance(v, (list, tuple, np.ndarray)) else v
+				 for v in (getattr(demand_source, attr) for attr in DemandSource._DEFAULT_VALUES.keys())),
+		   lead_time, lower_tail_prob, upper_tail_prob, d_num, discrete_distribution)
+	if key in _ltd_discretization_cache:
+		return _ltd_discretization_cache[key]
+
+	# Get lead-time demand distribution.
+	ltd_dist = demand_source.lead_time_demand_distribution(lead_time)
+
+	# Get truncation bounds for lead-time demand distribution.
+	# If support is finite, use support; otherwise, use F^{-1}(.).
+	if ltd_dist.a == float("-inf"):
+		d_lo = max(ltd_dist.ppf(lower_tail_prob), float())
+	else:
+		d_lo = max(ltd_dist.interval(1)[0], float())
+	if ltd_dist.b == float("inf"):
+		d_hi = max(ltd_dist.ppf(float(1)-upper_tail_prob), d_lo)
+	else:
+		d_hi = max(ltd_dist.interval(1)[1], d_lo)
+
+	# Determine d (lead-time demand) array (truncated and discretized).
+	if discrete_distribution:
+		d_lo    = round(d_lo)
+		d_delta = int(1)
+		num     = round(d_hi-d_lo)
+	elif d_num and d_hi > d_lo:
+		d_lo    = float(d_lo)
+		d_delta = float((d_hi-d_lo)/d_num)
+		num     = d_num
+	else:
+		d_lo    = float((d_lo+d_hi)*0.5)
+		d_delta = float(1)
+		num     = int()
+
+	# Keep the values whose interval [d-d_delta/2, d+d_delta/2) has positive probability.
+	# (The first interval extends to -infinity and the last to +infinity.)
+	d_ind = np.arange(num+1)
+	F_upper = np.append(_cdf_array(ltd_dist, (d_ind[:-1]+0.5)*d_delta+d_lo), float(1))
+	F_lower = np.insert(_cdf_array(ltd_dist, (d_ind[1:]-0.5)*d_delta+d_lo), 0, float())
+	d = (d_ind*d_delta+d_lo)[F_upper > F_lower]
+
+	# Calculate discretized cdf array.
+	F_upper = _cdf_array(ltd_dist, d+d_delta*float(0.5))
+	F_lower = _cdf_array(ltd_dist, d-d_delta*float(0.5))
+	if d.size > 0:
+		F_upper[-1] = float(1)
+		F_lower[0] = float()
+	fd = F_upper - F_lower
+
+	d.flags.writeable = False
+	fd.flags.writeable = False
+	if len(_ltd_discretization_cache) >= _LTD_DISCRETIZATION_CACHE_SIZE:
+		_ltd_discretization_cache.clear()
+	_ltd_discretization_cache[key] = (d, fd)
+
+	return d, fd
+
+
+def _cdf_array(distribution, values):
+	"""Evaluate the cdf of ``distribution`` at each entry of ``values`` with a single vectorized call, or
+	one entry at a time if the distribution's cdf only accepts scalars.
+
+	Parameters
+	----------
+	distribution : rv_continuous or rv_discrete
+		The distribution.
+	values : ndarray
+		The values at which to evaluate the cdf.
+
+	Returns
+	-------
+	ndarray
+		The cdf values, as floats.
+	"""
+	try:
+		return np.asarray(distribution.cdf(values), dtype=float)
+	except (ValueError, TypeError):
+		return np.array([distribution.cdf(v) for v in values], dtype=float)
+
+
+def _nearest_indices(array, values):
+	"""Return the indices of the entries in the sorted array ``array`` that are closest to each of the
+	entries in ``values`` (or to ``values``, if it is a singleton). Ties are broken in favor of the larger entry.
+	This is a vectorized version of :func:`stockpyl.helpers.find_nearest` for sorted arrays.
+
+	Parameters
+	----------
+	array : ndarray
+		The sorted array to search for values in.
+	values : float or ndarray
+		The value(s) to search for.
+
+	Returns
+	-------
+	int or ndarray
+		The index or array of indices.
+	"""
+	idx = np.searchsorted(array, values, side='left')
+	lo = np.maximum(idx - 1, 0)
+	hi = np.minimum(idx, len(array) - 1)
+	use_lo = (idx > 0) & ((idx == len(array)) | (np.abs(values - array[lo]) < np.abs(values - array[hi])))
+	return np.where(use_lo, lo, hi)
+
+
+def _expected_C_hat(x, x_ext, C_hat, C_hat_lim1, C_hat_lim2, d, fd):
+	"""Calculate :math:`C_j(y) = E[\\hat{C}_j(y-D_j)]` for every ``y`` in ``x``, where the lead-time demand
+	:math:`D_j` takes the values in ``d`` with probabilities ``fd``. :math:`\\hat{C}_j(y-d)` is evaluated at the
+	entry of ``x`` nearest to ``y-d``, or, if ``y-d`` is outside of the range of ``x``, using the linear approximations
+	in ``C_hat_lim1`` and ``C_hat_lim2`` at the entry of ``x_ext`` nearest to ``y-d`` (see Problem 6.13).
+
+	If every ``d`` is a multiple of the spacing of ``x`` (e.g., if the demand distribution is discrete),
+	the expectation is calculated as a convolution of ``fd`` with :math:`\\hat{C}_j`, extended below the range
+	of ``x`` using ``C_hat_lim1``. Otherwise, :math:`\\hat{C}_j(y-d)` is gathered for all ``y`` and ``d``
+	(in blocks of ``y`` values) and multiplied by ``fd``.
+
+	Parameters
+	----------
+	x : ndarray
+		Evenly spaced, sorted x-array.
+	x_ext : ndarray
+		Extended x-array.
+	C_hat : ndarray
+		Values of :math:`\\hat{C}_j` at the entries of ``x``.
+	C_hat_lim1 : ndarray
+		Values of the approximation of :math:`\\hat{C}_j` for small ``x`` at the entries of ``x_ext``.
+	C_hat_lim2 : ndarray
+		Values of the approximation of :math:`\\hat{C}_j` for large ``x`` at the entries of ``x_ext``.
+	d : ndarray
+		Sorted, nonnegative lead-time demand values.
+	fd : ndarray
+		Probabilities of the lead-time demand values.
+
+	Returns
+	-------
+	ndarray
+		Values of :math:`C_j` at the entries of ``x``.
+	"""
+	x_lo = x[0]
+	x_hi = x[-1]
+	x_delta = x[1] - x[0] if x.size > 1 else 1
+
+	# Express d in units of x_delta.
+	offsets = np.rint(d / x_delta).astype(int)
+	if x.size > 1 and np.all(x_lo + offsets * x_delta == x_lo + d) and offsets[0] >= 0:
+		# y - d is always on the x-grid (or its extension below x_lo). Build C-hat on the grid
+		# points x_lo - max_offset * x_delta, ..., x_hi, and convolve it with the demand pmf.
+		max_offset = offsets[-1]
+		below = x_lo + np.arange(-max_offset, 0) * x_delta
+		C_hat_full = np.concatenate((C_hat_lim1[_nearest_indices(x_ext, below)], C_hat))
+		pmf = np.zeros(max_offset + 1)
+		np.add.at(pmf, offsets, fd)
+		return np.convolve(C_hat_full, pmf, mode='valid')
+
+	# General case: gather C-hat(y - d) for each block of y values.
+	C = np.zeros(x.size)
+	block_size = max(1, _GATHER_BLOCK_SIZE // max(1, d.size))
+	for start in range(0, x.size, block_size):
+		y_minus_d = x[start:start+block_size, np.newaxis] - d[np.newaxis, :]
+		cost = C_hat[_nearest_indices(x, y_minus_d)]
+		below = y_minus_d < x_lo
+		if np.any(below):
+			cost[below] = C_hat_lim1[_nearest_indices(x_ext, y_minus_d[below])]
+		above = y_minus_d > x_hi
+		if np.any(above): # THIS SHOULD NEVER HAPPEN
+			print('WARNING: y > x + d', flush=True)
+			cost[above] = C_hat_lim2[_nearest_indices(x_ext, y_minus_d[above])]
+		C[start:start+block_size] = cost @ fd
+
+	return C
+
+
+def _expected_C_hat_at(x, x_ext, C_hat, C_hat_lim1, C_hat_lim2, d, fd, y, rows):
+	"""Calculate :math:`C_j(y_k) = E[\\hat{C}_j(y_k-D_j)]` for each entry ``y_k`` of ``y``, where
+	:math:`\\hat{C}_j` is given by row ``rows[k]`` of ``C_hat`` (and of ``C_hat_lim2``). This is equivalent to
+	calling :func:`_expected_C_hat` for each row and then evaluating the result at ``y_k``, but only
+	evaluates the expectation at the required points.
+
+	Parameters
+	----------
+	x : ndarray
+		Evenly spaced, sorted x-array.
+	x_ext : ndarray
+		Extended x-array.
+	C_hat : ndarray
+		2-D array whose rows contain values of :math:`\\hat{C}_j` at the entries of ``x``.
+	C_hat_lim1 : ndarray
+		Values of the approximation of :math:`\\hat{C}_j` for small ``x`` at the entries of ``x_ext``.
+	C_hat_lim2 : ndarray
+		2-D array whose rows contain values of the approximation of :math:`\\hat{C}_j` for large ``x``
+		at the entries of ``x_ext``.
+	d : ndarray
+		Sorted, nonnegative lead-time demand values.
+	fd : ndarray
+		Probabilities of the lead-time demand values.
+	y : ndarray
+		Values at which to evaluate :math:`C_j`.
+	rows : ndarray
+		Row of ``C_hat`` and ``C_hat_lim2`` to use for each entry of ``y``.
+
+	Returns
+	-------
+	ndarray
+		Values of :math:`C_j` at the entries of ``y``.
+	"""
+	x_lo = x[0]
+	x_hi = x[-1]
+
+	C = np.zeros(len(y))
+	block_size = max(1, _GATHER_BLOCK_SIZE // max(1, d.size))
+	for start in range(0, len(y), block_size):
+		the_rows = rows[start:start+block_size, np.newaxis]
+		y_minus_d = y[start:start+block_size, np.newaxis] - d[np.newaxis, :]
+		cost = C_hat[the_rows, _nearest_indices(x, y_minus_d)]
+		below = y_minus_d < x_lo
+		if np.any(below):
+			cost[below] = C_hat_lim1[_nearest_indices(x_ext, y_minus_d[below])]
+		above = y_minus_d > x_hi
+		if np.any(above): # THIS SHOULD NEVER HAPPEN
+			print('WARNING: y > x + d', flush=True)
+			cost[above] = C_hat_lim2[np.broadcast_to(the_rows, y_minus_d.shape)[above],
+									 _nearest_indices(x_ext, y_minus_d[above])]
+		C[start:start+block_size] = cost @ fd
+
+	return C
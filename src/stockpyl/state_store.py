@@ -0,0 +1,825 @@
+# ===============================================================================
+# stockpyl - StateStore Class
+# -------------------------------------------------------------------------------
+# Author: Larry Snyder
+# License: MIT
+# ===============================================================================
+
+"""
+.. include:: ../../globals.inc
+
+Overview
+--------
+
+This module contains the |class_state_store| class, which stores the state variables of all
+of the nodes in a network during a simulation in NumPy arrays.
+
+Each state variable is stored in a single contiguous array with one row per period and one column per
+entry of the state variable, for all nodes: for example, ``inventory_level`` has one column for each
+(node, product) pair and ``backorders_by_successor`` has one column for each (node, successor, product)
+triple. Each entry of a pipeline occupies one column per slot of the pipeline. The mapping from node,
+partner, and product indices to columns is built once, when the store is created, from the keys
+of a |class_state_vars| object for each node.
+
+During the simulation, ``node.state_vars`` is a list whose elements are |class_state_vars|
+objects that are thin views into the store, so ``node.state_vars[t].inventory_level[prod]`` and
+the other state variables can be read and set as usual. The state variables that behave like dicts
+and lists are returned as dict-like and list-like views; use ``copy.deepcopy()`` (or ``to_dict()``) to
+get ordinary dicts, lists, and |class_state_vars| objects.
+
+Integer values keep their type: each array has a companion array that records whether the value
+in each cell was set to an ``int``.
+
+The store can also keep only a rolling window of the most recent periods, for very long simulations in which
+only aggregate results are needed. In this case, each array has one row per period in the window, and the
+rows are reused as a ring buffer: period ``t`` is stored in row ``t % window``. When a period leaves the window,
+its values are added to running totals, so that :meth:`StateStore.total` and ``node.state_vars.total()``
+still return totals over all periods. ``node.state_vars`` is then a |class_rolling_state_vars_list|, and only
+the periods in the window can be accessed. The memory required is proportional to the window length rather
+than the number of periods.
+
+.. note:: |node_stage|
+
+.. note:: The store is created by :func:`stockpyl.sim.initialize`; you do not need to build it yourself.
+
+
+API Reference
+-------------
+
+
+"""
+
+# ===============================================================================
+# Imports
+# ===============================================================================
+
+import numpy as np
+import copy
+from collections.abc import Mapping, MutableMapping, Sequence
+
+from stockpyl.node_state_vars import NodeStateVars
+
+
+# ===============================================================================
+# Constants
+# ===============================================================================
+
+# State variables that are dicts (possibly nested) or pipelines (dicts of dicts of lists).
+_DICT_STATE_VARS = ['inbound_shipment_pipeline', 'inbound_shipment', 'inbound_order_pipeline', 'inbound_order',
+					'outbound_shipment', 'on_order_by_predecessor', 'backorders_by_successor',
+					'outbound_disrupted_items', 'inbound_disrupted_items', 'order_quantity', 'order_quantity_fg',
+					'raw_material_inventory', 'pending_finished_goods', 'inventory_level', 'excess_inventory',
+					'demand_cumul', 'demand_met_from_stock', 'demand_met_from_stock_cumul', 'fill_rate']
+
+# State variables that have a single numeric value per node and period.
+_SCALAR_STATE_VARS = ['holding_cost_incurred', 'stockout_cost_incurred', 'in_transit_holding_cost_incurred',
+					  'fixed_cost_incurred', 'revenue_earned', 'total_cost_incurred']
+
+# State variables whose values in period t+1 start at their ending values in period t.
+_CARRIED_OVER_STATE_VARS = ['inventory_level', 'pending_finished_goods', 'backorders_by_successor',
+							'outbound_disrupted_items', 'on_order_by_predecessor', 'raw_material_inventory',
+							'inbound_disrupted_items', 'demand_met_from_stock_cumul', 'demand_cumul']
+
+# State variables that are not totaled over periods in rolling-window mode.
+_PIPELINE_STATE_VARS = ['inbound_shipment_pipeline', 'inbound_order_pipeline']
+
+
+# ===============================================================================
+# StateStore Class
+# ===============================================================================
+
+class StateStore(object):
+	"""The |class_state_store| class stores the state variables of all of the nodes in a network,
+	for all periods of a simulation, in NumPy arrays.
+
+	Parameters
+	----------
+	network : |class_network|
+		The multi-echelon inventory network.
+	num_periods : int
+		Number of periods to store (including any extra periods needed for calculations past the
+		end of the horizon).
+	window : int, optional
+		If provided, only the most recent ``window`` periods are stored, and the values of earlier
+		periods are kept only as running totals.
+
+	Attributes
+	----------
+	num_periods : int
+		Number of periods in the simulation (including extra periods).
+	window : int
+		Number of periods stored, or ``None`` if all periods are stored.
+	num_rows : int
+		Number of rows in each array (= ``window`` if not ``None`` or ``num_periods`` otherwise).
+	last_period : int
+		Last period whose state variables have been initialized.
+	node_slots : dict
+		Dict whose keys are node indices and whose values are the nodes' columns in the arrays of
+		scalar state variables.
+	columns : dict
+		``columns[attr][n]`` = nested dict with the same keys as state variable ``attr`` at node ``n``
+		whose values are the columns of the corresponding entries in ``values[attr]`` (or, for pipelines,
+		tuples (first column, length)).
+	values : dict
+		``values[attr]`` = array of shape (``num_rows``, # of columns) containing the values of state variable ``attr``.
+		Period ``t`` is stored in row ``t % num_rows``.
+	is_int : dict
+		``is_int[attr]`` = boolean array of the same shape as ``values[attr]`` indicating whether each
+		value was set to an ``int``.
+	disrupted : ndarray
+		Boolean array of shape (``num_rows``, # of nodes) containing the ``disrupted`` state variable.
+	evicted_totals : dict
+		``evicted_totals[attr]`` = array containing, for each column of ``values[attr]``, the total of
+		the values in the periods that have left the window. (Pipelines are not totaled; the
+		``disrupted`` state variable is totaled in ``evicted_totals['disrupted']``.) Empty if ``window`` is ``None``.
+	"""
+
+	def __init__(self, network, num_periods, window=None):
+		"""StateStore constructor method.
+		"""
+		if window is not None and window < 2:
+			raise ValueError('window must be at least 2')
+		self.num_periods = num_periods
+		self.window = window if window is not None and window < num_periods else None
+		self.num_rows = self.window or num_periods
+		self.last_period = 0
+		self.node_slots = {n.index: i for i, n in enumerate(network.nodes)}
+
+		# Build column maps from the keys of a template NodeStateVars object for each node.
+		self.columns = {attr: {} for attr in _DICT_STATE_VARS}
+		num_columns = {attr: 0 for attr in _DICT_STATE_VARS}
+		for n in network.nodes:
+			template = NodeStateVars(n, 0)
+			for attr in _DICT_STATE_VARS:
+				self.columns[attr][n.index], num_columns[attr] = \
+					_assign_columns(getattr(template, attr), num_columns[attr])
+
+		# Allocate arrays. (Initial values are int 0, as in NodeStateVars.)
+		self.values = {}
+		self.is_int = {}
+		for attr in _DICT_STATE_VARS:
+			self.values[attr] = np.zeros((self.num_rows, num_columns[attr]))
+			self.is_int[attr] = np.ones((self.num_rows, num_columns[attr]), dtype=bool)
+		for attr in _SCALAR_STATE_VARS:
+			self.values[attr] = np.zeros((self.num_rows, len(network.nodes)))
+			self.is_int[attr] = np.ones((self.num_rows, len(network.nodes)), dtype=bool)
+		self.disrupted = np.zeros((self.num_rows, len(network.nodes)), dtype=bool)
+
+		# Allocate running totals for periods that leave the window.
+		self.evicted_totals = {}
+		if self.window is not None:
+			for attr in _DICT_STATE_VARS + _SCALAR_STATE_VARS:
+				if attr not in _PIPELINE_STATE_VARS:
+					self.evicted_totals[attr] = np.zeros(self.values[attr].shape[1])
+			self.evicted_totals['disrupted'] = np.zeros(len(network.nodes), dtype=int)
+
+		# Build index arrays for advancing the pipelines. For each pipeline, _first_cells, _shift_cells,
+		# and _last_cells contain the first cell of each entry, every cell except the last one, and the last cell.
+		# _node_cells[attr][n] contains all cells belonging to node n.
+		self._first_cells = {}
+		self._shift_cells = {}
+		self._last_cells = {}
+		self._node_cells = {}
+		for attr in ('inbound_shipment_pipeline', 'inbound_order_pipeline'):
+			first, shift, last = [], [], []
+			self._node_cells[attr] = {}
+			for n_index, node_columns in self.columns[attr].items():
+				node_cells = []
+				for entries in node_columns.values():
+					for start, length in entries.values():
+						first.append(start)
+						shift.extend(range(start, start + length - 1))
+						last.append(start + length - 1)
+						node_cells.extend(range(start, start + length))
+				self._node_cells[attr][n_index] = np.array(node_cells, dtype=int)
+			self._first_cells[attr] = np.array(first, dtype=int)
+			self._shift_cells[attr] = np.array(shift, dtype=int)
+			self._last_cells[attr] = np.array(last, dtype=int)
+
+	# --- Views --- #
+
+	def node_state_vars(self, node):
+		"""Return a list containing a |class_state_vars| view for each period
+		for ``node`` (or, if the store keeps a rolling window, a |class_rolling_state_vars_list|).
+
+		Parameters
+		----------
+		node : |class_node|
+			The node.
+
+		Returns
+		-------
+		StateVarsList or RollingStateVarsList
+			The state variables for the node.
+		"""
+		if self.window is None:
+			return StateVarsList(self, node)
+		else:
+			return RollingStateVarsList(self, node)
+
+	def row(self, period):
+		"""Return the row of the arrays that contains period ``period``.
+
+		Parameters
+		----------
+		period : int
+			The period.
+
+		Returns
+		-------
+		int
+			The row.
+		"""
+		return period % self.num_rows
+
+	def is_stored(self, period):
+		"""Determine whether the state variables for period ``period`` are currently stored,
+		i.e., whether the period is in the window. (Always ``True`` for periods 0, ..., ``num_periods`` - 1
+		if the store does not keep a rolling window.)
+
+		Parameters
+		----------
+		period : int
+			The period.
+
+		Returns
+		-------
+		bool
+			``True`` if the period is stored, ``False`` otherwise.
+		"""
+		if self.window is None:
+			return 0 <= period < self.num_periods
+		else:
+			return max(0, self.last_period - self.window + 1) <= period <= self.last_period
+
+	# --- Period-by-Period Updates --- #
+
+	def advance(self, period, transit_paused_nodes=()):
+		"""Set initial values for the state variables in period ``period`` + 1 for all nodes at once:
+
+			* Advance the shipment and order pipelines by 1 period.
+			* Set the state variables that carry over from period to period (IL, BO, ODI, IDI, RM,
+			  PFG, OO, and the ``_cumul`` attributes) to their ending values in period ``period``.
+
+		Items in the shipment pipelines of nodes in ``transit_paused_nodes`` are not advanced.
+
+		If the store keeps a rolling window, the period that leaves the window (the one previously
+		stored in the row for period ``period`` + 1) is first added to the running totals.
+
+		Parameters
+		----------
+		period : int
+			The current period.
+		transit_paused_nodes : iterable, optional
+			Indices of nodes whose shipment pipelines should not be advanced (because of a
+			transit-pausing disruption).
+		"""
+		t = self.row(period)
+		t1 = self.row(period + 1)
+
+		# Rolling window: add the period that leaves the window to the totals and reset its row.
+		if self.window is not None:
+			if period + 1 >= self.window:
+				self._evict(t1)
+		self.last_period = max(self.last_period, period + 1)
+
+		# Carried-over state variables.
+		for attr in _CARRIED_OVER_STATE_VARS:
+			self.values[attr][t1] = self.values[attr][t]
+			self.is_int[attr][t1] = self.is_int[attr][t]
+
+		# Inbound order pipeline: slot s in period t+1 = slot s+1 in period t; last slot = 0.
+		values = self.values['inbound_order_pipeline']
+		is_int = self.is_int['inbound_order_pipeline']
+		shift = self._shift_cells['inbound_order_pipeline']
+		last = self._last_cells['inbound_order_pipeline']
+		values[t1, shift] = values[t, shift + 1]
+		is_int[t1, shift] = is_int[t, shift + 1]
+		values[t1, last] = 0
+		is_int[t1, last] = True
+
+		# Inbound shipment pipeline: slot 0 in period t+1 = slot 0 in period t (normally 0, but it can be
+		# non-zero if there was a type-RP disruption); then add slot s+1 in period t to slot s in period t+1.
+		values = self.values['inbound_shipment_pipeline']
+		is_int = self.is_int['inbound_shipment_pipeline']
+		first = self._first_cells['inbound_shipment_pipeline']
+		shift = self._shift_cells['inbound_shipment_pipeline']
+		paused_cells = [self._node_cells['inbound_shipment_pipeline'][n_index] for n_index in transit_paused_nodes]
+		if paused_cells:
+			paused = np.zeros(values.shape[1], dtype=bool)
+			for cells in paused_cells:
+				paused[cells] = True
+			first = first[~paused[first]]
+			shift = shift[~paused[shift]]
+		values[t1, first] = values[t, first]
+		is_int[t1, first] = is_int[t, first]
+		values[t1, shift] += values[t, shift + 1]
+		is_int[t1, shift] &= is_int[t, shift + 1]
+		# Paused nodes: items stay where they are.
+		for cells in paused_cells:
+			values[t1, cells] = values[t, cells]
+			is_int[t1, cells] = is_int[t, cells]
+
+	def _reset(self, row):
+		"""Set all state variables in row ``row`` to their initial values (int 0)."""
+		for attr in self.values:
+			self.values[attr][row] = 0
+			self.is_int[attr][row] = True
+		self.disrupted[row] = False
+
+	def _evict(self, row):
+		"""Add the values in row ``row`` to the running totals, then reset the row."""
+		for attr, totals in self.evicted_totals.items():
+			if attr == 'disrupted':
+				totals += self.disrupted[row]
+			else:
+				totals += self.values[attr][row]
+		self._reset(row)
+
+	def column_totals(self, attr):
+		"""Return the sum of the values in each column of state variable ``attr`` over all periods,
+		including periods that have left the window.
+
+		Parameters
+		----------
+		attr : str
+			The state variable, e.g., ``'inventory_level'`` or ``'disrupted'``. (Pipelines are not supported.)
+
+		Returns
+		-------
+		ndarray
+			The totals, one per column.
+		"""
+		if attr in _PIPELINE_STATE_VARS:
+			raise ValueError(f'{attr} cannot be totaled')
+		values = self.disrupted if attr == 'disrupted' else self.values[attr]
+		totals = values.sum(axis=0)
+		if self.window is not None:
+			totals = totals + self.evicted_totals[attr]
+		return totals
+
+	def total(self, attr):
+		"""Return the sum of scalar state variable ``attr`` over all nodes and periods, including
+		periods that have left the window. (The values are summed node by node, in the order of the
+		nodes in the network.)
+
+		Parameters
+		----------
+		attr : str
+			The state variable, e.g., ``'total_cost_incurred'``.
+
+		Returns
+		-------
+		float
+			The total.
+		"""
+		if self.window is None:
+			return float(np.sum(self.values[attr].T.ravel()))
+		else:
+			return float(np.sum(self.column_totals(attr)))
+
+
+# ===============================================================================
+# StateVarsList Class
+# ===============================================================================
+
+class StateVarsList(list):
+	"""A list containing one |class_state_vars| view per period for a node. The views are
+	lightweight objects that store only the node and period; the values of the state variables
+	are stored in the |class_state_store|.
+
+	Copies made by ``copy.deepcopy()`` are ordinary lists of ordinary |class_state_vars| objects
+	that are independent of the store.
+
+	Parameters
+	----------
+	store : |class_state_store|
+		The store that contains the state variables.
+	node : |class_node|
+		The node.
+	"""
+
+	def __init__(self, store, node):
+		"""StateVarsList constructor method.
+		"""
+		super().__init__(NodeStateVarsView(store, node, t) for t in range(store.num_periods))
+		self.store = store
+		self.node = node
+
+	def __repr__(self):
+		return f'StateVarsList(node={self.node.index}, num_periods={len(self)})'
+
+	def __deepcopy__(self, memo):
+		nsv_list = []
+		for sv in self:
+			nsv = NodeStateVars.from_dict(sv.to_dict())
+			nsv.node = copy.deepcopy(sv.node, memo)
+			nsv_list.append(nsv)
+		return nsv_list
+
+	def to_list(self):
+		"""Return a list of ordinary |class_state_vars| objects containing copies of the
+		state variables in each period.
+
+		Returns
+		-------
+		list
+			List of |class_state_vars| objects.
+		"""
+		nsv_list = []
+		for sv in self:
+			nsv = NodeStateVars.from_dict(sv.to_dict())
+			nsv.node = sv.node
+			nsv_list.append(nsv)
+		return nsv_list
+
+
+# ===============================================================================
+# RollingStateVarsList Class
+# ===============================================================================
+
+class RollingStateVarsList(Sequence):
+	"""A list-like object that gives |class_state_vars| views for a node for the periods in the
+	rolling window of a |class_state_store|. It is indexed by period, like a |class_state_vars| list,
+	but accessing a period that has left the window raises an ``IndexError``. (Periods that have not been
+	reached yet are returned as new |class_state_vars| objects with initial values.) Iterating over it yields
+	the views for the periods in the window only.
+
+	Totals over all periods (including those that have left the window) are available through
+	:meth:`total`.
+
+	Parameters
+	----------
+	store : |class_state_store|
+		The store that contains the state variables.
+	node : |class_node|
+		The node.
+	"""
+
+	def __init__(self, store, node):
+		"""RollingStateVarsList constructor method.
+		"""
+		self.store = store
+		self.node = node
+		# Most recent view for each row of the store.
+		self._views = [None] * store.num_rows
+
+	def __repr__(self):
+		return f'RollingStateVarsList(node={self.node.index}, num_periods={len(self)}, window={self.store.window})'
+
+	def __len__(self):
+		return self.store.num_periods
+
+	def __getitem__(self, period):
+		if isinstance(period, slice):
+			return [self[t] for t in range(*period.indices(len(self))) if self.store.is_stored(t)]
+		if period < 0:
+			period += len(self)
+		if self.store.last_period < period < len(self):
+			# Period has not been reached yet; its state variables still have their initial values.
+			return NodeStateVars(self.node, period)
+		if not self.store.is_stored(period):
+			raise IndexError(f'period {period} is not in the rolling window')
+		view = self._views[self.store.row(period)]
+		if view is None or view.period != period:
+			view = NodeStateVarsView(self.store, self.node, period)
+			self._views[self.store.row(period)] = view
+		return view
+
+	def __iter__(self):
+		return (self[t] for t in self.periods)
+
+	def __deepcopy__(self, memo):
+		sv_list = RollingStateVarsList(copy.deepcopy(self.store, memo), copy.deepcopy(self.node, memo))
+		memo[id(self)] = sv_list
+		return sv_list
+
+	@property
+	def periods(self):
+		"""The periods that are currently in the window. Read only.
+		"""
+		return range(max(0, self.store.last_period - self.store.window + 1), self.store.last_period + 1)
+
+	def total(self, attr):
+		"""Return the total of state variable ``attr`` for the node over all periods, including the periods
+		that have left the window.
+
+		Parameters
+		----------
+		attr : str
+			The state variable, e.g., ``'inventory_level'`` or ``'total_cost_incurred'``. (Pipelines are not supported.)
+
+		Returns
+		-------
+		float or dict
+			The total, as a number (for state variables that are not indexed by product) or a dict with the
+			same keys as the state variable.
+		"""
+		totals = self.store.column_totals(attr)
+		if attr in _SCALAR_STATE_VARS or attr == 'disrupted':
+			return totals.item(self.store.node_slots[self.node.index])
+		else:
+			return _totals_dict(self.store.columns[attr][self.node.index], totals)
+
+	def to_list(self):
+		"""Return a list of ordinary |class_state_vars| objects containing copies of the
+		state variables in each period in the window. (Their ``period`` attributes indicate
+		the periods they refer to.)
+
+		Returns
+		-------
+		list
+			List of |class_state_vars| objects.
+		"""
+		nsv_list = []
+		for sv in self:
+			nsv = NodeStateVars.from_dict(sv.to_dict())
+			nsv.node = sv.node
+			nsv_list.append(nsv)
+		return nsv_list
+
+
+# ===============================================================================
+# NodeStateVarsView Class
+# ===============================================================================
+
+def _dict_state_var_property(attr):
+	"""Return a property that gives a dict-like view of state variable ``attr``."""
+	def getter(self):
+		store = self._store
+		return _StateVarDict(store.values[attr], store.is_int[attr], self._row,
+							 store.columns[attr][self._node_index])
+
+	def setter(self, value):
+		if not isinstance(value, Mapping):
+			raise TypeError(f'{attr} must be a dict')
+		view = getter(self)
+		for key, val in value.items():
+			view[key] = val
+
+	return property(getter, setter)
+
+
+def _scalar_state_var_property(attr):
+	"""Return a property that gives the value of scalar state variable ``attr``."""
+	def getter(self):
+		store = self._store
+		value = store.values[attr].item(self._row, self._slot)
+		return int(value) if store.is_int[attr].item(self._row, self._slot) else value
+
+	def setter(self, value):
+		store = self._store
+		store.values[attr][self._row, self._slot] = value
+		store.is_int[attr][self._row, self._slot] = _is_int(value)
+
+	return property(getter, setter)
+
+
+def _disrupted_getter(self):
+	return self._store.disrupted.item(self._row, self._slot)
+
+
+def _disrupted_setter(self, value):
+	self._store.disrupted[self._row, self._slot] = value
+
+
+def _period_getter(self):
+	return self._period
+
+
+def _period_setter(self, value):
+	self._period = value
+	self._row = self._store.row(value)
+
+
+class NodeStateVarsView(NodeStateVars):
+	"""A |class_state_vars| object whose state variables are stored in a |class_state_store|.
+	The dict and list state variables are returned as dict-like and list-like views into the store;
+	setting them (or their entries) sets the values in the store.
+
+	If the store keeps a rolling window, the view reads and writes the row that holds ``period``, so
+	it refers to a later period once ``period`` has left the window.
+
+	Parameters
+	----------
+	store : |class_state_store|
+		The store that contains the state variables.
+	node : |class_node|
+		The node to which these state variables refer.
+	period : int
+		The period to which these state variables refer.
+	"""
+
+	def __init__(self, store, node, period):
+		"""NodeStateVarsView constructor method.
+		"""
+		self._store = store
+		self._node_index = node.index
+		self._slot = store.node_slots[node.index]
+		self.node = node
+		self.period = period
+
+	for _attr in _DICT_STATE_VARS:
+		locals()[_attr] = _dict_state_var_property(_attr)
+	for _attr in _SCALAR_STATE_VARS:
+		locals()[_attr] = _scalar_state_var_property(_attr)
+	del _attr
+
+	disrupted = property(_disrupted_getter, _disrupted_setter)
+	period = property(_period_getter, _period_setter)
+
+	def __deepcopy__(self, memo):
+		nsv = NodeStateVars.from_dict(self.to_dict())
+		nsv.node = copy.deepcopy(self.node, memo)
+		return nsv
+
+	def to_dict(self):
+		"""Convert the state variables to a dict. The dict-like and list-like views are
+		converted to ordinary dicts and lists.
+
+		Returns
+		-------
+		dict
+			The dict representation of the object.
+		"""
+		return {key: copy.deepcopy(value) for key, value in super().to_dict().items()}
+
+
+# ===============================================================================
+# Views of Dict and List State Variables
+# ===============================================================================
+
+class _StateVarDict(MutableMapping):
+	"""Dict-like view of a (possibly nested) dict state variable in one period. ``columns``
+	has the same keys as the state variable; its values are columns (for numeric entries),
+	tuples (first column, length) (for pipelines), or nested dicts."""
+
+	__slots__ = ('_values', '_is_int', '_row', '_columns')
+
+	def __init__(self, values, is_int, row, columns):
+		self._values = values
+		self._is_int = is_int
+		self._row = row
+		self._columns = columns
+
+	def __getitem__(self, key):
+		col = self._columns[key]
+		if col.__class__ is int:
+			value = self._values.item(self._row, col)
+			return int(value) if self._is_int.item(self._row, col) else value
+		elif col.__class__ is tuple:
+			return _StateVarPipeline(self._values, self._is_int, self._row, col[0], col[1])
+		else:
+			return _StateVarDict(self._values, self._is_int, self._row, col)
+
+	def __setitem__(self, key, value):
+		col = self._columns[key]
+		if col.__class__ is int:
+			self._values[self._row, col] = value
+			self._is_int[self._row, col] = _is_int(value)
+		else:
+			view = self[key]
+			if col.__class__ is tuple:
+				view[:] = value
+			else:
+				for k, v in value.items():
+					view[k] = v
+
+	def __delitem__(self, key):
+		raise TypeError('entries of state variables cannot be deleted')
+
+	def __iter__(self):
+		return iter(self._columns)
+
+	def __len__(self):
+		return len(self._columns)
+
+	def __contains__(self, key):
+		return key in self._columns
+
+	def __eq__(self, other):
+		if not isinstance(other, Mapping):
+			return NotImplemented
+		return self.to_dict() == dict(other.items())
+
+	def __repr__(self):
+		return repr(self.to_dict())
+
+	def __deepcopy__(self, memo):
+		return self.to_dict()
+
+	def copy(self):
+		"""Return the state variable as an ordinary dict."""
+		return self.to_dict()
+
+	def to_dict(self):
+		"""Return the state variable as an ordinary (possibly nested) dict."""
+		return {key: (value.to_plain() if isinstance(value, (_StateVarDict, _StateVarPipeline)) else value)
+				for key, value in self.items()}
+
+	to_plain = to_dict
+
+
+class _StateVarPipeline(Sequence):
+	"""List-like view of one pipeline (e.g., ``inbound_shipment_pipeline[p][rm]``) in one period."""
+
+	__slots__ = ('_values', '_is_int', '_row', '_start', '_length')
+
+	def __init__(self, values, is_int, row, start, length):
+		self._values = values
+		self._is_int = is_int
+		self._row = row
+		self._start = start
+		self._length = length
+
+	def _cell(self, index):
+		if index < 0:
+			index += self._length
+		if not 0 <= index < self._length:
+			raise IndexError('pipeline index out of range')
+		return self._start + index
+
+	def __getitem__(self, index):
+		if isinstance(index, slice):
+			return [self[i] for i in range(*index.indices(self._length))]
+		cell = self._cell(index)
+		value = self._values.item(self._row, cell)
+		return int(value) if self._is_int.item(self._row, cell) else value
+
+	def __setitem__(self, index, value):
+		if isinstance(index, slice):
+			indices = range(*index.indices(self._length))
+			value = list(value)
+			if len(value) != len(indices):
+				raise ValueError('pipeline length cannot be changed')
+			for i, v in zip(indices, value):
+				self[i] = v
+		else:
+			cell = self._cell(index)
+			self._values[self._row, cell] = value
+			self._is_int[self._row, cell] = _is_int(value)
+
+	def __len__(self):
+		return self._length
+
+	def __eq__(self, other):
+		if not isinstance(other, (Sequence, np.ndarray)) or isinstance(other, str):
+			return NotImplemented
+		return self.to_plain() == list(other)
+
+	def __add__(self, other):
+		return self.to_plain() + list(other)
+
+	def __radd__(self, other):
+		return list(other) + self.to_plain()
+
+	def __repr__(self):
+		return repr(self.to_plain())
+
+	def __deepcopy__(self, memo):
+		return self.to_plain()
+
+	def copy(self):
+		"""Return the pipeline as an ordinary list."""
+		return self.to_plain()
+
+	def to_plain(self):
+		"""Return the pipeline as an ordinary list."""
+		return self[:]
+
+
+# ===============================================================================
+# Helper Functions
+# ===============================================================================
+
+def _assign_columns(template, next_column):
+	"""Return a nested dict with the same keys as ``template`` whose values are column
+	numbers (for numeric values) or tuples (first column, length) (for lists), starting at
+	``next_column``, and the next unused column.
+	"""
+	columns = {}
+	for key, value in template.items():
+		if isinstance(value, dict):
+			columns[key], next_column = _assign_columns(value, next_column)
+		elif isinstance(value, list):
+			columns[key] = (next_column, len(value))
+			next_column += len(value)
+		else:
+			columns[key] = next_column
+			next_column += 1
+
+	return columns, next_column
+
+
+def _totals_dict(columns, totals):
+	"""Return a nested dict with the same keys as ``columns`` whose values are the entries of
+	``totals`` in the corresponding columns.
+	"""
+	return {key: (totals.item(col) if col.__class__ is int else _totals_dict(col, totals))
+			for key, col in columns.items()}
+
+
+def _is_int(value):
+	"""Determine whether ``value`` is an integer (but not a bool or float) and should be
+	returned as an ``int``."""
+	return value.__class__ is int or isinstance(value, np.integer)
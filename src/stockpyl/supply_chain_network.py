@@ -172,6 +172,17 @@ class SupplyChainNetwork(object):
 	def period(self, value):
 		self._period = value
 
+	@property
+	def sim_context(self):
+		"""The :class:`~stockpyl.sim.SimulationContext` of the simulation most recently
+		initialized on the network (or ``None``). Set by :func:`stockpyl.sim.initialize`.
+		"""
+		return self._sim_context
+
+	@sim_context.setter
+	def sim_context(self, value):
+		self._sim_context = value
+
 	@property
 	def source_nodes(self):
 		"""List of all source nodes, i.e., all nodes that have no predecessors,
@@ -246,6 +257,10 @@ class SupplyChainNetwork(object):
  		# a network, e.g., using from_dict(), in which case we should pause buidling product attributes.)
 		self._currently_building = False
 
+		# Clear the simulation context. (This is set by sim.initialize() and is not part of the
+		# network's data, so it is not in _DEFAULT_VALUES.)
+		self._sim_context = None
+
 		# Initialize node- and product-related attributes that are derived from others.
 		self._build_node_attributes()
 		self._build_product_attributes()
@@ -63,6 +63,7 @@ import copy
 import math
 
 from stockpyl.node_state_vars import NodeStateVars
+from stockpyl.state_store import StateVarsList, RollingStateVarsList
 from stockpyl import policy
 from stockpyl.supply_chain_product import SupplyChainProduct
 from stockpyl import demand_source
@@ -95,6 +96,8 @@ class SupplyChainNode(object):
 		ending IL. Function should check that IL > 0.
 	additional_holding_cost: float
 		Holidng cost charged when inventory_level > inventory_capacity, per unit per period.
+	fixed_cost : float
+		Fixed cost charged in each period in which the node places an order.
 	in_transit_holding_cost : float
 		Holding cost coefficient used to calculate in-transit holding cost for
 		shipments en route from the node to its downstream successors, if any.
@@ -205,6 +208,7 @@ class SupplyChainNode(object):
 		'local_holding_cost': None,
 		'echelon_holding_cost': None,
 		'additional_holding_cost': None,
+		'fixed_cost': None,
 		'local_holding_cost_function': None,
 		'in_transit_holding_cost': None,
 		'stockout_cost': None,
@@ -236,6 +240,32 @@ class SupplyChainNode(object):
 		'state_vars': []
 	}
 
+	def __setattr__(self, name, value):
+		super().__setattr__(name, value)
+		# Setting any attribute clears the caches used by get_attribute() and the BOM lookup functions.
+		self._clear_attribute_cache()
+		self._clear_lookup_cache()
+
+	def _clear_attribute_cache(self):
+		"""Clear the cache of attribute values resolved by :meth:`get_attribute`.
+		"""
+		self.__dict__['_attribute_cache'] = {}
+		self.__dict__['_attribute_cache_generation'] = SupplyChainProduct._attribute_generation
+
+	def _clear_lookup_cache(self):
+		"""Clear the cache of results returned by the BOM and supplier lookup functions
+		(:meth:`get_network_bill_of_materials`, :meth:`raw_materials_by_product`, etc.). This is called
+		whenever the products, predecessors, successors, or bills of materials change.
+		"""
+		self.__dict__['_lookup_cache'] = {}
+
+	@staticmethod
+	def _lookup_key(*args):
+		"""Return a key for the lookup cache, replacing any node or product objects in ``args``
+		with their indices.
+		"""
+		return tuple([arg.index if isinstance(arg, (SupplyChainNode, SupplyChainProduct)) else arg for arg in args])
+
 	@property
 	def index(self):
 		return self._index
@@ -619,6 +649,9 @@ class SupplyChainNode(object):
   		product attributes when network is currently being built and not all product/node
 		info is in place yet.)
 		"""
+		# The structure of this node or its neighbors may have changed.
+		self._clear_lookup_cache()
+
 		if self.network is not None and not self.network._currently_building:
 			self._build_network_bill_of_materials()
 			self._build_supplier_raw_material_pairs()
@@ -718,6 +751,8 @@ class SupplyChainNode(object):
 			self._product_indices.append(product.index)
 			self._products.append(product)
 			self._products_by_index[product.index] = product
+			self._clear_attribute_cache()
+			self._clear_lookup_cache()
 			if not product.is_dummy:
 				# Remove dummy product. (This also sets `dummy_product` to None.)
 				self._remove_dummy_product()
@@ -779,6 +814,9 @@ class SupplyChainNode(object):
 
 		# If anything changed, rebuild node and product attributes.
 		if changed:	
+			self._clear_attribute_cache()
+			self._clear_lookup_cache()
+
 			# Remember value of _currently_building flag, and turn it on to avoid building product attributes prematurely.
 			if self.network is not None:
 				old_currently_building = self.network._currently_building
@@ -917,6 +955,11 @@ class SupplyChainNode(object):
 			If ``predecessor`` is not a predecessor of the node.
 		"""
 
+		# Use cached result, if any.
+		key = self._lookup_key('NBOM', product, predecessor, raw_material)
+		if key in self._lookup_cache:
+			return self._lookup_cache[key]
+
 		_, prod_ind = self.validate_product(product)
 		pred_obj, pred_ind = self.validate_predecessor(predecessor, raw_material=raw_material, err_on_multiple_preds=False)
 		if pred_obj:
@@ -938,7 +981,9 @@ class SupplyChainNode(object):
 			if rm_ind is None:
 				rm_ind = self._external_supplier_dummy_product.index
 
-		return self._network_bill_of_materials[prod_ind][pred_ind][rm_ind]
+		NBOM = self._network_bill_of_materials[prod_ind][pred_ind][rm_ind]
+		self._lookup_cache[key] = NBOM
+		return NBOM
 
 	def NBOM(self, product=None, predecessor=None, raw_material=None):
 		"""A shortcut to :func:`~get_network_bill_of_materials`."""
@@ -979,6 +1024,11 @@ class SupplyChainNode(object):
 			If ``product`` is not found among the node's products, and it's not the case that ``product is None`` and
 			this is a single-product node.
 		"""
+		# Use cached result, if any.
+		key = self._lookup_key('raw_materials_by_product', product, return_indices, network_BOM)
+		if key in self._lookup_cache:
+			return list(self._lookup_cache[key])
+
 		# Validate parameters.
 		if product != 'all':
 			prod_obj, prod_ind = self.validate_product(product)
@@ -999,8 +1049,9 @@ class SupplyChainNode(object):
 										return_indices=return_indices, network_BOM=network_BOM):
 				if rm not in rms:
 					rms.append(rm)
-			
-		return rms
+
+		self._lookup_cache[key] = rms
+		return list(rms)
 
 	def raw_material_suppliers_by_product(self, product=None, return_indices=False, network_BOM=True):
 		"""Return a list of all predecessors from which a raw material must be ordered in order to
@@ -1038,6 +1089,11 @@ class SupplyChainNode(object):
 			If ``product`` is not found among the node's products, and it's not the case that ``product is None`` and
 			this is a single-product node.
 		"""
+		# Use cached result, if any.
+		key = self._lookup_key('raw_material_suppliers_by_product', product, return_indices, network_BOM)
+		if key in self._lookup_cache:
+			return list(self._lookup_cache[key])
+
 		# Validate parameters.
 		prod_obj, _ = self.validate_product(product)
 
@@ -1046,8 +1102,9 @@ class SupplyChainNode(object):
 									return_indices=return_indices, network_BOM=network_BOM):
 			if pred not in suppliers:	
 				suppliers.append(pred)
-		
-		return suppliers
+
+		self._lookup_cache[key] = suppliers
+		return list(suppliers)
 
 	def raw_material_suppliers_by_raw_material(self, raw_material=None, return_indices=False, network_BOM=True):
 		"""Return a list of all predecessors that supply the node with ``raw_material``.
@@ -1086,6 +1143,11 @@ class SupplyChainNode(object):
 			If ``raw_material`` is not found among the node's raw materials, and it's not the case
 			that ``raw_material is None`` and this node has a single raw material.
 		"""
+		# Use cached result, if any.
+		key = self._lookup_key('raw_material_suppliers_by_raw_material', raw_material, return_indices, network_BOM)
+		if key in self._lookup_cache:
+			return list(self._lookup_cache[key])
+
 		# Validate parameters.
 		rm_obj, _ = self.validate_raw_material(raw_material, network_BOM=network_BOM)
 
@@ -1098,8 +1160,9 @@ class SupplyChainNode(object):
 						suppliers.append(pred.index if pred is not None else None)
 					else:
 						suppliers.append(pred)
-	
-		return suppliers
+
+		self._lookup_cache[key] = suppliers
+		return list(suppliers)
 
 	def products_by_raw_material(self, raw_material=None, return_indices=False, network_BOM=True):
 		"""Return a list of all products that use ``raw_material`` at the node. 
@@ -1128,6 +1191,11 @@ class SupplyChainNode(object):
 			If ``raw_material`` is not found among the node's raw materials, and it's not the case that ``raw_material is None`` and
 			this node has a single raw material.
 		"""
+		# Use cached result, if any.
+		key = self._lookup_key('products_by_raw_material', raw_material, return_indices, network_BOM)
+		if key in self._lookup_cache:
+			return list(self._lookup_cache[key])
+
 		# Validate parameters.
 		_, rm_ind = self.validate_raw_material(raw_material, network_BOM=network_BOM)
   
@@ -1143,9 +1211,12 @@ class SupplyChainNode(object):
 			prod_inds = [prod.index for prod in self.products if prod.BOM(raw_material=rm_ind) > 0]
 		
 		if return_indices:
-			return prod_inds
+			prods = prod_inds
 		else:
-			return [self.network.parse_product(prod_ind)[0] for prod_ind in prod_inds]
+			prods = [self.network.parse_product(prod_ind)[0] for prod_ind in prod_inds]
+
+		self._lookup_cache[key] = prods
+		return list(prods)
 	
 	def supplier_raw_material_pairs_by_product(self, product=None, return_indices=False, network_BOM=True):
 		"""A list of all predecessors and raw materials for ``product``, as tuples ``(pred, rm)``.
@@ -1186,6 +1257,11 @@ class SupplyChainNode(object):
 		# that list suppliers/raw materials. Therefore, those functions can call this one without
 		# triggering an infinite recursion.
 
+		# Use cached result, if any.
+		key = self._lookup_key('supplier_raw_material_pairs_by_product', product, return_indices, network_BOM)
+		if key in self._lookup_cache:
+			return list(self._lookup_cache[key])
+
    		# Validate parameters.
 		if product != 'all':
 			prod_obj, prod_ind = self.validate_product(product)
@@ -1219,7 +1295,8 @@ class SupplyChainNode(object):
 		if not return_indices:
 			pairs = [(self.network.nodes_by_index[pred_ind], self.network.products_by_index[rm_ind]) for pred_ind, rm_ind in pairs]
 
-		return pairs
+		self._lookup_cache[key] = pairs
+		return list(pairs)
 
 	def customers_by_product(self, product=None, return_indices=False, network_BOM=True):
 		"""A list of customers that order ``product`` from the node. If the node has a single product
@@ -1242,16 +1319,21 @@ class SupplyChainNode(object):
 		network_BOM : bool, optional
 			If ``True`` (default), function uses network BOM instead of product-only BOM.
 		"""
-		prod_obj, prod_ind = self.validate_product(product)
-	
-		# Customer nodes.
-		custs = [n for n in self.successors(include_external=False) \
-			if prod_obj in n.raw_materials_by_product('all', network_BOM=network_BOM) and \
-				self in n.raw_material_suppliers_by_raw_material(prod_ind, network_BOM=network_BOM)]
-		
-		# Convert to indices, if desired.
-		if return_indices:
-			custs = [n.index for n in custs]
+		# Customer nodes. (Use cached list, if any.)
+		key = self._lookup_key('customers_by_product', product, return_indices, network_BOM)
+		if key in self._lookup_cache:
+			custs = list(self._lookup_cache[key])
+		else:
+			prod_obj, prod_ind = self.validate_product(product)
+			custs = [n for n in self.successors(include_external=False) \
+				if prod_obj in n.raw_materials_by_product('all', network_BOM=network_BOM) and \
+					self in n.raw_material_suppliers_by_raw_material(prod_ind, network_BOM=network_BOM)]
+
+			# Convert to indices, if desired.
+			if return_indices:
+				custs = [n.index for n in custs]
+
+			self._lookup_cache[key] = list(custs)
 		
 		# External customer.
 		ds = self.get_attribute('demand_source', product=product)
@@ -1908,6 +1990,7 @@ class SupplyChainNode(object):
 
 		"""
 		self._successor_indices.append(successor.index)
+		self._clear_lookup_cache()
 
 	def add_predecessor(self, predecessor):
 		"""Add ``predecessor`` to the node's set of predecessors.
@@ -1925,6 +2008,7 @@ class SupplyChainNode(object):
 
 		"""
 		self._predecessor_indices.append(predecessor.index)
+		self._clear_lookup_cache()
 
 	def remove_successor(self, successor):
 		"""Remove ``successor`` from the node's set of successors. ``successor`` may
@@ -1948,6 +2032,7 @@ class SupplyChainNode(object):
 			succ_ind = successor
 
 		self._successor_indices.remove(succ_ind)
+		self._clear_lookup_cache()
 
 	def remove_predecessor(self, predecessor):
 		"""Remove ``predecessor`` from the node's set of predecessors. ``predecessor`` may
@@ -1971,6 +2056,7 @@ class SupplyChainNode(object):
 			pred_ind = predecessor
 
 		self._predecessor_indices.remove(pred_ind)
+		self._clear_lookup_cache()
 
 	def get_one_successor(self):
 		"""Get one successor of the node. If the node has more than one
@@ -2044,7 +2130,46 @@ class SupplyChainNode(object):
 		"""
 		if product is None and len(self.product_indices) > 1:
 			raise ValueError(f'You cannot set product = None for a node that has multiple products (node = {self.index}).')
-  
+
+		# Product objects are not used as cache keys.
+		if isinstance(product, SupplyChainProduct):
+			return self._resolve_attribute(attr, product)[0]
+
+		# Return the cached value, if any. (The cache is cleared whenever an attribute of the node or
+		# of any product is set.)
+		if self._attribute_cache_generation != SupplyChainProduct._attribute_generation:
+			self._clear_attribute_cache()
+		key = (attr, product)
+		try:
+			return self._attribute_cache[key]
+		except KeyError:
+			pass
+
+		value, cacheable = self._resolve_attribute(attr, product)
+		if cacheable:
+			self._attribute_cache[key] = value
+		return value
+
+	def _resolve_attribute(self, attr, product):
+		"""Determine the value of the attribute ``attr`` for ``product``, as described in
+		:meth:`get_attribute`, without using the cache.
+
+		Parameters
+		----------
+		attr : str
+			The name of the attribute to get.
+		product : |class_product| or int
+			The product to get the attribute for, either as a |class_product| object or as an index.
+
+		Returns
+		-------
+		any
+			The value of the attribute for the product (if any).
+		bool
+			``True`` if the value may be cached, ``False`` if it depends on the contents of a mutable
+			attribute (a dict, or a |class_policy| whose ``type`` is ``None``) and so could change without
+			an attribute of the node or product being set.
+		"""
 		# Get self.attr and the product and index.
 		self_attr = getattr(self, attr)
 		if product is None:
@@ -2063,18 +2188,18 @@ class SupplyChainNode(object):
 		# Is self.attr a dict?
 		if is_dict(self_attr):
 			if product_ind in self_attr:
-				return self_attr[product_ind]
+				return self_attr[product_ind], False
 			else:
-				return getattr(product_obj, attr)
+				return getattr(product_obj, attr), False
 		elif attr == 'inventory_policy':
 			# inventory_policy needs to be handled separately because both None and Policy(None)
 			# trigger using the product's attribute.
 			if product_obj is not None and \
 				(self_attr is None or self_attr == self._DEFAULT_VALUES['_inventory_policy'] or \
 				 (isinstance(self_attr, policy.Policy) and self_attr.type is None)):
-				return getattr(product_obj, attr)
+				return getattr(product_obj, attr), self_attr is None
 			else:
-				return self_attr
+				return self_attr, True
 		else:
 			# Determine whether attr is set to its default value; if so, try to use product attribute.
 			# Properties that are aliases for attributes require special handling since there's no
@@ -2087,9 +2212,9 @@ class SupplyChainNode(object):
 				default_val = self._DEFAULT_VALUES[attr]
 			if product_obj is not None and ((default_val is None and self_attr is None) or (self_attr == default_val)):
 				# Product exists and attr at node is set to default value--use attr at product.
-				return getattr(product_obj, attr)
+				return getattr(product_obj, attr), True
 			else:
-				return self_attr
+				return self_attr, True
 
 	def _get_state_var_total(self, attribute, period, product=None, include_external=True):
 		"""Return total (over all successors/predecessors) of ``attribute`` in the node's ``state_vars`` 
@@ -2144,36 +2269,51 @@ class SupplyChainNode(object):
 		# if product_index is None:
 		# 	product_index = self.product_indices[0]
 
+		# In rolling-window mode, totals over all periods come from the running totals in the state store.
+		if period is None and isinstance(self.state_vars, RollingStateVarsList):
+			totals = self.state_vars.total(attribute)
+			if attribute in ('inbound_shipment', 'on_order_by_predecessor', 'raw_material_inventory', 'inbound_disrupted_items'):
+				return float(np.sum([totals[p_index][prod_ind]
+									 for p_index in self.predecessor_indices(include_external=include_external)]))
+			elif attribute in ('inbound_order', 'outbound_shipment', 'backorders_by_successor', 'outbound_disrupted_items'):
+				return float(np.sum([totals[s_index][prod_ind]
+									 for s_index in self.successor_indices(include_external=include_external)]))
+			elif attribute in ('disrupted', 'holding_cost_incurred', 'stockout_cost_incurred', 'in_transit_holding_cost_incurred',
+				'revenue_earned', 'total_cost_incurred'):
+				return totals
+			else:
+				return totals[prod_ind]
+
 		if attribute in ('inbound_shipment', 'on_order_by_predecessor', 'raw_material_inventory', 'inbound_disrupted_items'):
 			# These attributes are indexed by predecessor.
 			if period is None:
-				return float(np.sum([self.state_vars[t].__dict__[attribute][p_index][prod_ind]
+				return float(np.sum([getattr(self.state_vars[t], attribute)[p_index][prod_ind]
 									 for t in range(len(self.state_vars))
 									 for p_index in self.predecessor_indices(include_external=include_external)]))
 			else:
-				return float(np.sum([self.state_vars[period].__dict__[attribute][p_index][prod_ind]
+				return float(np.sum([getattr(self.state_vars[period], attribute)[p_index][prod_ind]
 									 for p_index in self.predecessor_indices(include_external=include_external)]))
 		elif attribute in ('inbound_order', 'outbound_shipment', 'backorders_by_successor', 'outbound_disrupted_items'):
 			# These attributes are indexed by successor.
 			if period is None:
-				return float(np.sum([self.state_vars[t].__dict__[attribute][s_index][prod_ind]
+				return float(np.sum([getattr(self.state_vars[t], attribute)[s_index][prod_ind]
 									 for t in range(len(self.state_vars))
 									 for s_index in self.successor_indices(include_external=include_external)]))
 			else:
-				return float(np.sum([self.state_vars[period].__dict__[attribute][s_index][prod_ind]
+				return float(np.sum([getattr(self.state_vars[period], attribute)[s_index][prod_ind]
 									 for s_index in self.successor_indices(include_external=include_external)]))
 		elif attribute in ('disrupted', 'holding_cost_incurred', 'stockout_cost_incurred', 'in_transit_holding_cost_incurred',
 			'revenue_earned', 'total_cost_incurred'):
 			# These attributes are not indexed by product.
 			if period is None:
-				return np.sum([self.state_vars[:].__dict__[attribute]])
+				return np.sum([getattr(self.state_vars[t], attribute) for t in range(len(self.state_vars))])
 			else:
-				return self.state_vars[period].__dict__[attribute]
+				return getattr(self.state_vars[period], attribute)
 		else:
 			if period is None:
-				return np.sum([self.state_vars[:].__dict__[attribute][prod_ind]])
+				return np.sum([getattr(self.state_vars[t], attribute)[prod_ind] for t in range(len(self.state_vars))])
 			else:
-				return self.state_vars[period].__dict__[attribute][prod_ind]
+				return getattr(self.state_vars[period], attribute)[prod_ind]
 
 	def reindex_all_state_variables(self, old_to_new_dict, old_to_new_prod_dict):
 		"""Change indices of all node-based keys in all state variables using ``old_to_new_dict``
@@ -2187,6 +2327,10 @@ class SupplyChainNode(object):
 			Dict in which keys are old product indices and values are new product indices.
 
 		"""
+		# The keys of state variables stored in a StateStore cannot be changed, so convert them to
+		# ordinary NodeStateVars objects first.
+		if isinstance(self.state_vars, (StateVarsList, RollingStateVarsList)):
+			self.state_vars = self.state_vars.to_list()
 		for i in range(len(self.state_vars)):
 			self.state_vars[i].reindex_state_variables(old_to_new_dict, old_to_new_prod_dict)
 
@@ -224,6 +224,14 @@ class SupplyChainProduct(object):
 		'order_capacity': None,
 		'state_vars': []
 	}
+
+	# Incremented whenever an attribute of any product is set. Nodes use it to detect when the
+	# values cached by SupplyChainNode.get_attribute() might be out of date.
+	_attribute_generation = 0
+
+	def __setattr__(self, name, value):
+		SupplyChainProduct._attribute_generation += 1
+		super().__setattr__(name, value)
 	
 	@property
 	def index(self):
@@ -33,6 +33,13 @@ import numpy as np
 from stockpyl.helpers import *
 
 
+# Number of items whose DPs are performed together in wagner_whitin_batch().
+_BATCH_CHUNK_SIZE = 4096
+
+# Relative tolerance within which costs are treated as tied in _wagner_whitin_dp().
+_TIE_TOL = 1e-9
+
+
 def wagner_whitin(num_periods, holding_cost, fixed_cost, demand, purchase_cost=0):
 	"""Solve the Wagner-Whitin problem using dynamic programming (DP).
 
@@ -90,7 +97,13 @@ def wagner_whitin(num_periods, holding_cost, fixed_cost, demand, purchase_cost=0
 
 		\\theta_t = \\min_{t < s \le T+1} \\left\\{K + c_t\sum_{i=1}^{s-1}d_i + h\\sum_{i=t}^{s-1}(i-t)d_i + \\theta_s \\right\\}
 
-	**Algorithm Used:** Wagner-Whitin algorithm (Algorithm 3.1)
+	**Algorithm Used:** Wagner-Whitin algorithm (Algorithm 3.1). The sums in the
+	equation are calculated from prefix sums of the demands. If the holding cost is the
+	same in every period, :math:`\\theta_t` is found in :math:`O(\\log T)` time from the
+	lower envelope of the (linear) costs of the possible next order periods, as in
+	Wagelmans, van Hoesel, and Kolen (1992), so the algorithm takes :math:`O(T \\log T)` time
+	(or :math:`O(T)` time if the purchase cost is also stationary); otherwise it takes
+	:math:`O(T^2)` time.
 
 	**Example** (a Example 3.9):
 
@@ -123,30 +136,11 @@ def wagner_whitin(num_periods, holding_cost, fixed_cost, demand, purchase_cost=0
 	demand = ensure_list_for_time_periods(demand, num_periods)
 	purchase_cost = ensure_list_for_time_periods(purchase_cost, num_periods)
 
-	# Allocate solution arrays.
-	theta = np.zeros(num_periods+2)
-	next_order_periods = [0] * (num_periods+1)
-
-	# Loop backwards through periods.
-	for t in range(num_periods, 0, -1):
-
-		# Loop through possible next order periods.
-		best_cost = BIG_FLOAT
-		for ss in range(t+1, num_periods+2):
-			# Calculate cost if next order is in period ss.
-			cost = fixed_cost[t] * (sum(demand[i] for i in range(t, ss)) > 0) # 0 fixed/setup cost if demand is 0
-			for i in range(t, ss):
-				cost += purchase_cost[t] * demand[i] + holding_cost[t] * (i - t) * demand[i]
-			cost += theta[ss]
-
-			# Compare to best cost.
-			if cost < best_cost:
-				best_cost = cost
-				best_s = ss
-
-		# Set theta and next_order_periods.
-		theta[t] = best_cost
-		next_order_periods[t] = best_s
+	# Solve DP.
+	theta, next_order_periods = _wagner_whitin_dp(
+		*(np.array([x], dtype=float) for x in (holding_cost, fixed_cost, demand, purchase_cost)))
+	theta = theta[0]
+	next_order_periods = next_order_periods[0].tolist()
 
 	# Determine optimal order quantities.
 	order_quantities = [0] * (num_periods+1)
@@ -159,3 +153,228 @@ def wagner_whitin(num_periods, holding_cost, fixed_cost, demand, purchase_cost=0
 	return order_quantities, cost, theta, next_order_periods
 
 
+def wagner_whitin_batch(num_periods, holding_cost, fixed_cost, demand, purchase_cost=0):
+	"""Solve the Wagner-Whitin problem for several items that share a time horizon,
+	using dynamic programming (DP). The DP is performed for all items together
+	using array operations; see :func:`wagner_whitin` for the algorithm.
+
+	The parameters may be given as arrays of shape (``n_items``, ``num_periods``),
+	or as any shape that broadcasts to it: a singleton applies to every item and
+	period, an array of length ``num_periods`` to every item, and an array of
+	shape (``n_items``, 1) to every period.
+
+	Parameters
+	----------
+	num_periods : int
+		Number of periods in time horizon. [:math:`T`]
+	holding_cost : float or array
+		Holding cost per item per period. [:math:`h`]
+	fixed_cost : float or array
+		Fixed cost per order. [:math:`K`]
+	demand : float or array
+		Demand in each time period. [:math:`d`]
+	purchase_cost : float or array, optional
+		Purchase cost per item. [:math:`c`]
+
+	Returns
+	-------
+	order_quantities : ndarray
+		Array of shape (``n_items``, ``num_periods``\\+1); ``order_quantities[i, t]`` is
+		the order quantity of item ``i`` in period ``t``. [:math:`Q^*`]
+	cost : ndarray
+		Optimal cost of each item for entire horizon. [:math:`\\theta_1`]
+	costs_to_go : ndarray
+		Array of shape (``n_items``, ``num_periods``\\+2) of "costs to go". [:math:`\\theta`]
+	next_order_periods : ndarray
+		Array of shape (``n_items``, ``num_periods``\\+1) of "next order" periods. [:math:`s`]
+
+	Raises
+	------
+	ValueError
+		If the parameters cannot be broadcast to shape (``n_items``, ``num_periods``).
+	ValueError
+		If ``holding_cost``, ``fixed_cost``, ``demand``, or ``purchase_cost`` < 0 for any item and time period.
+
+
+	**Example** (Example 3.9 and the same instance with twice the fixed cost):
+
+	.. testsetup:: *
+
+		from stockpyl.wagner_whitin import *
+
+	.. doctest::
+
+		>>> Q, cost, theta, s = wagner_whitin_batch(4, 2, [[500], [1000]], [90, 120, 80, 70])
+		>>> Q
+		array([[  0., 210.,   0., 150.,   0.],
+		       [  0., 360.,   0.,   0.,   0.]])
+		>>> cost
+		array([1380., 1980.])
+
+	"""
+	# Broadcast parameters to arrays of shape (n_items, num_periods+1), so that
+	# column t refers to period t (column 0 is ignored).
+	params = (holding_cost, fixed_cost, demand, purchase_cost)
+	try:
+		shape = np.broadcast_shapes((1, num_periods), *(np.shape(x) for x in params))
+	except ValueError:
+		raise ValueError("parameters must be broadcastable to shape (n_items, num_periods)")
+	if len(shape) != 2:
+		raise ValueError("parameters must be broadcastable to shape (n_items, num_periods)")
+	holding_cost, fixed_cost, demand, purchase_cost = \
+		(np.broadcast_to(np.asarray(x, dtype=float), shape) for x in params)
+	n_items = shape[0]
+
+	# Check that parameters are non-negative.
+	if not np.all(holding_cost >= 0): raise ValueError("holding_cost must be non-negative")
+	if not np.all(fixed_cost >= 0): raise ValueError("fixed_cost must be non-negative")
+	if not np.all(demand >= 0): raise ValueError("demand must be non-negative")
+	if not np.all(purchase_cost >= 0): raise ValueError("purchase_cost must be non-negative")
+
+	# Allocate solution arrays.
+	theta = np.zeros((n_items, num_periods+2))
+	next_order_periods = np.zeros((n_items, num_periods+1), dtype=int)
+	order_quantities = np.zeros((n_items, num_periods+1))
+
+	# Solve DP for a chunk of items at a time (to limit the size of the working
+	# arrays). Add column 0 to parameter arrays.
+	for start in range(0, n_items, _BATCH_CHUNK_SIZE):
+		chunk = slice(start, start + _BATCH_CHUNK_SIZE)
+		theta[chunk], next_order_periods[chunk] = _wagner_whitin_dp(
+			*(np.pad(x[chunk], ((0, 0), (1, 0))) for x in (holding_cost, fixed_cost, demand, purchase_cost)))
+
+		# Determine optimal order quantities: follow the next order periods from period 1.
+		cum_demand = np.pad(np.cumsum(demand[chunk], axis=1), ((0, 0), (1, 0)))
+		next_order = np.ones(cum_demand.shape[0], dtype=int)
+		for t in range(1, num_periods+1):
+			order = np.flatnonzero(next_order == t)
+			s = next_order_periods[start + order, t]
+			order_quantities[start + order, t] = cum_demand[order, s - 1] - cum_demand[order, t - 1]
+			next_order[order] = s
+
+	return order_quantities, theta[:, 1], theta, next_order_periods
+
+
+### HELPER FUNCTIONS ###
+
+def _wagner_whitin_dp(holding_cost, fixed_cost, demand, purchase_cost):
+	"""Perform the Wagner-Whitin DP for the items in the rows of the parameter
+	arrays, which have shape (``n_items``, ``num_periods``\\+1) (column 0 is ignored).
+	Return ``theta`` (with shape (``n_items``, ``num_periods``\\+2)) and
+	``next_order_periods`` (with shape (``n_items``, ``num_periods``\\+1)).
+
+	Among next order periods with the same cost, the earliest is chosen. (Costs are
+	treated as the same if they differ by at most a factor of ``_TIE_TOL``, since the prefix
+	sums introduce rounding errors that would otherwise break ties arbitrarily.)
+	"""
+	n_items, num_periods = demand.shape[0], demand.shape[1] - 1
+	items = np.arange(n_items)
+
+	# Work with periods in rows, so that the values for all items in a period are contiguous.
+	holding_cost, fixed_cost, demand, purchase_cost = \
+		(np.ascontiguousarray(x.T) for x in (holding_cost, fixed_cost, demand, purchase_cost))
+
+	# Prefix sums: P[s] = d_1 + ... + d_{s-1} and W[s] = 1*d_1 + ... + (s-1)*d_{s-1}
+	# (for each item), so the cost in periods t, ..., T if the next order after t is in s is
+	#	K_t + (c_t - h_t*t)(P[s] - P[t]) + h_t(W[s] - W[t]) + theta_s
+	# (with K_t replaced by 0 if P[s] = P[t]).
+	P = np.zeros((num_periods+2, n_items))
+	P[2:] = np.cumsum(demand[1:], axis=0)
+	W = np.zeros((num_periods+2, n_items))
+	W[2:] = np.cumsum(demand[1:] * np.arange(1, num_periods+1)[:, None], axis=0)
+
+	theta = np.zeros((num_periods+2, n_items))
+	next_order_periods = np.zeros((num_periods+1, n_items), dtype=int)
+
+	if np.all(holding_cost[1:] == holding_cost[1]):
+		# Holding cost is stationary. For each s, the cost above is a line in
+		# alpha_t = c_t - h*t, with slope P[s] and intercept B[s] = h*W[s] + theta_s
+		# (plus terms that depend only on t). Maintain the lower envelope of the
+		# lines for s = t+1, ..., T+1 in hull[:size], ordered by decreasing
+		# slope (= decreasing s), and find the best s for each t by binary search.
+		# If alpha_t does not decrease as t decreases (e.g., if c is stationary), the
+		# best line for t is no lower in the envelope than the best line for t+1 (that
+		# remains), so it is found by moving up from there instead.
+		h = holding_cost[1]
+		alpha = purchase_cost - h * np.arange(num_periods+1)[:, None]
+		monotone = np.all(alpha[1:-1] >= alpha[2:])
+		B = np.zeros((num_periods+2, n_items))
+		hull = np.zeros((num_periods+1, n_items), dtype=int)
+		size = np.zeros(n_items, dtype=int)
+		best = np.zeros(n_items, dtype=int)
+		for t in range(num_periods, 0, -1):
+
+			# Add line for s = t+1. If the top line has the same slope, keep whichever
+			# has the lower intercept (the new one, if tied, since it has smaller s).
+			s = t + 1
+			B[s] = h * W[s] + theta[s]
+			top = hull[np.maximum(size - 1, 0), items]
+			same_slope = (size > 0) & (P[top, items] == P[s])
+			add = ~same_slope | _no_worse(B[s], B[top, items])
+			size -= same_slope & add
+			# Remove lines from the top that are no longer on the envelope.
+			cand = np.flatnonzero(add & (size >= 2))
+			while cand.size > 0:
+				l1, l2 = hull[size[cand] - 2, cand], hull[size[cand] - 1, cand]
+				remove = (B[s, cand] - B[l1, cand]) * (P[l1, cand] - P[l2, cand]) \
+					<= (B[l2, cand] - B[l1, cand]) * (P[l1, cand] - P[s, cand])
+				cand = cand[remove]
+				size[cand] -= 1
+				cand = cand[size[cand] >= 2]
+			best = np.minimum(best, np.maximum(size - 1, 0))
+			hull[size[add], items[add]] = s
+			size += add
+
+			# Find the last line on the envelope whose value at alpha_t is no greater than
+			# that of the line before it. (The values decrease and then increase along the
+			# envelope.)
+			a = alpha[t]
+			if monotone:
+				active = np.flatnonzero(best < size - 1)
+				while active.size > 0:
+					s_next, s_best = hull[best[active] + 1, active], hull[best[active], active]
+					better = _no_worse(P[s_next, active] * a[active] + B[s_next, active],
+									   P[s_best, active] * a[active] + B[s_best, active])
+					active = active[better]
+					best[active] += 1
+					active = active[best[active] < size[active] - 1]
+			else:
+				best[:] = 0
+				hi = size - 1
+				active = np.flatnonzero(best < hi)
+				while active.size > 0:
+					mid = (best[active] + hi[active] + 1) // 2
+					s_mid, s_prev = hull[mid, active], hull[mid - 1, active]
+					better = _no_worse(P[s_mid, active] * a[active] + B[s_mid, active],
+									   P[s_prev, active] * a[active] + B[s_prev, active])
+					best[active] = np.where(better, mid, best[active])
+					hi[active] = np.where(better, hi[active], mid - 1)
+					active = active[best[active] < hi[active]]
+			best_s = hull[best, items]
+			best_cost = fixed_cost[t] + a * (P[best_s, items] - P[t]) \
+				+ h * (W[best_s, items] - W[t]) + theta[best_s, items]
+
+			# If d_t = 0, not ordering in t (s = t+1) incurs no fixed cost.
+			no_order = (demand[t] == 0) & _no_worse(theta[t+1], best_cost)
+			theta[t] = np.where(no_order, theta[t+1], best_cost)
+			next_order_periods[t] = np.where(no_order, t+1, best_s)
+
+	else:
+		# Holding cost is nonstationary. Evaluate the cost for all s.
+		for t in range(num_periods, 0, -1):
+			s = np.arange(t+1, num_periods+2)
+			D = P[s] - P[t]
+			cost = fixed_cost[t] * (D > 0) + purchase_cost[t] * D \
+				+ holding_cost[t] * (W[s] - W[t] - t * D) + theta[s]
+			best = np.argmax(_no_worse(cost, np.min(cost, axis=0)), axis=0)
+			theta[t] = cost[best, items]
+			next_order_periods[t] = s[best]
+
+	return theta.T, next_order_periods.T
+
+
+def _no_worse(cost, incumbent_cost):
+	"""Return a boolean array indicating whether each value in ``cost`` is no greater than
+	the corresponding value in ``incumbent_cost``, up to a relative tolerance of ``_TIE_TOL``.
+	"""
+	return cost <= incumbent_cost + _TIE_TOL * np.abs(incumbent_cost)
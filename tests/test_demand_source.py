@@ -1303,3 +1303,111 @@ class TestLeadTimeDemandDistribution(unittest.TestCase):
 		self.assertEqual(ltd_dist.ppf(0.9999999999), 0)
 
 
+class TestGenerateDemand(unittest.TestCase):
+	@classmethod
+	def set_up_class(cls):
+		"""Called once, before any tests."""
+		print_status('TestGenerateDemand', 'set_up_class()')
+
+	@classmethod
+	def tear_down_class(cls):
+		"""Called once, after all tests, if set_up_class successful."""
+		print_status('TestGenerateDemand', 'tear_down_class()')
+
+	def test_rng(self):
+		"""Test that generate_demand() draws from rng, if provided, and that the draws
+		match those from the global PRNG seeded the same way.
+		"""
+		print_status('TestGenerateDemand', 'test_rng()')
+
+		demand_sources = [
+			DemandSource(type='N', mean=50, standard_deviation=8),
+			DemandSource(type='P', mean=20),
+			DemandSource(type='UD', lo=5, hi=15),
+			DemandSource(type='UC', lo=5, hi=15),
+			DemandSource(type='NB', n=20, p=0.4),
+			DemandSource(type='CD', demand_list=[1, 4, 7, 10], probabilities=[0.1, 0.2, 0.3, 0.4]),
+			DemandSource(type='N', mean=50, standard_deviation=8, round_to_int=True)
+		]
+
+		for ds in demand_sources:
+			np.random.seed(42)
+			global_demands = [ds.generate_demand(t) for t in range(10)]
+			rng = np.random.RandomState(42)
+			rng_demands = [ds.generate_demand(t, rng=rng) for t in range(10)]
+			self.assertListEqual(global_demands, rng_demands)
+
+	def test_generator(self):
+		"""Test that generate_demand() accepts a numpy Generator.
+		"""
+		print_status('TestGenerateDemand', 'test_generator()')
+
+		ds = DemandSource(type='UD', lo=5, hi=15)
+		rng1 = np.random.default_rng(42)
+		rng2 = np.random.default_rng(42)
+		demands1 = [ds.generate_demand(t, rng=rng1) for t in range(20)]
+		demands2 = [ds.generate_demand(t, rng=rng2) for t in range(20)]
+		self.assertListEqual(demands1, demands2)
+		self.assertTrue(all(5 <= d <= 15 and is_integer(d) for d in demands1))
+
+		ds = DemandSource(type='D', demand_list=[3, 5, 2])
+		self.assertListEqual([ds.generate_demand(t, rng=rng1) for t in range(4)], [3, 5, 2, 3])
+
+
+class TestGenerateDemands(unittest.TestCase):
+	@classmethod
+	def set_up_class(cls):
+		"""Called once, before any tests."""
+		print_status('TestGenerateDemands', 'set_up_class()')
+
+	@classmethod
+	def tear_down_class(cls):
+		"""Called once, after all tests, if set_up_class successful."""
+		print_status('TestGenerateDemands', 'tear_down_class()')
+
+	def test_matches_generate_demand(self):
+		"""Test that generate_demands() returns the same demands as successive calls to
+		generate_demand() and leaves the rng in the same state.
+		"""
+		print_status('TestGenerateDemands', 'test_matches_generate_demand()')
+
+		demand_sources = [
+			DemandSource(type='N', mean=50, standard_deviation=30),
+			DemandSource(type='P', mean=20),
+			DemandSource(type='UD', lo=5, hi=15),
+			DemandSource(type='UC', lo=5, hi=15),
+			DemandSource(type='NB', n=20, p=0.4),
+			DemandSource(type='D', demand_list=[3, 5, 2]),
+			DemandSource(type='D', demand_list=7),
+			DemandSource(type='CD', demand_list=[1, 4, 7, 10], probabilities=[0.1, 0.2, 0.3, 0.4]),
+			DemandSource(type='N', mean=50, standard_deviation=30, round_to_int=True),
+			DemandSource(type='UC', lo=5, hi=15, round_to_int=True)
+		]
+
+		for ds in demand_sources:
+			for rng_type in ['RandomState', 'Generator']:
+				rng1 = np.random.RandomState(42) if rng_type == 'RandomState' else np.random.default_rng(42)
+				rng2 = np.random.RandomState(42) if rng_type == 'RandomState' else np.random.default_rng(42)
+				demands = ds.generate_demands(25, rng=rng1)
+				self.assertEqual(demands.shape, (25,))
+				self.assertListEqual(demands.tolist(), [ds.generate_demand(t, rng=rng2) for t in range(25)])
+				self.assertEqual(rng1.random(), rng2.random())
+
+	def test_size(self):
+		"""Test that generate_demands() returns a matrix of paths if size is provided.
+		"""
+		print_status('TestGenerateDemands', 'test_size()')
+
+		ds = DemandSource(type='P', mean=20)
+		demands = ds.generate_demands(10, size=3, rng=np.random.RandomState(42))
+		self.assertEqual(demands.shape, (3, 10))
+
+		rng = np.random.RandomState(42)
+		for r in range(3):
+			np.testing.assert_array_equal(demands[r], ds.generate_demands(10, rng=rng))
+
+		ds = DemandSource(type='D', demand_list=[3, 5, 2])
+		np.testing.assert_array_equal(ds.generate_demands(4, size=2), [[3, 5, 2, 3], [3, 5, 2, 3]])
+
+		ds = DemandSource()
+		self.assertIsNone(ds.generate_demands(10))
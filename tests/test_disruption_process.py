@@ -552,3 +552,49 @@ class TestSteadyStateProbabilities(unittest.TestCase):
 		self.assertAlmostEqual(pi_u, 8/14)
 		self.assertAlmostEqual(pi_d, 6/14)
 
+
+class TestUpdateDisruptionState(unittest.TestCase):
+	@classmethod
+	def set_up_class(cls):
+		"""Called once, before any tests."""
+		print_status('TestUpdateDisruptionState', 'set_up_class()')
+
+	@classmethod
+	def tear_down_class(cls):
+		"""Called once, after all tests, if set_up_class successful."""
+		print_status('TestUpdateDisruptionState', 'tear_down_class()')
+
+	def test_rng(self):
+		"""Test that update_disruption_state() draws from rng, if provided, and that the states
+		match those from the global PRNG seeded the same way.
+		"""
+		print_status('TestUpdateDisruptionState', 'test_rng()')
+
+		dp = DisruptionProcess(random_process_type='M', disruption_probability=0.2, recovery_probability=0.3)
+		np.random.seed(42)
+		global_states = []
+		for t in range(50):
+			dp.update_disruption_state(t)
+			global_states.append(dp.disrupted)
+
+		dp.disrupted = False
+		rng = np.random.RandomState(42)
+		rng_states = []
+		for t in range(50):
+			dp.update_disruption_state(t, rng=rng)
+			rng_states.append(dp.disrupted)
+
+		self.assertListEqual(global_states, rng_states)
+
+		# numpy Generator.
+		generator_states = []
+		for _ in range(2):
+			dp.disrupted = False
+			rng = np.random.default_rng(42)
+			states = []
+			for t in range(50):
+				dp.update_disruption_state(t, rng=rng)
+				states.append(dp.disrupted)
+			generator_states.append(states)
+		self.assertListEqual(generator_states[0], generator_states[1])
+		self.assertIn(True, generator_states[0])
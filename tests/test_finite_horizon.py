@@ -1,4 +1,5 @@
 import unittest
+import warnings
 
 import numpy as np
 from scipy.stats import norm
@@ -7,6 +8,7 @@ from scipy.stats import lognorm
 import scipy.io as sio
 
 import stockpyl.finite_horizon as finite_horizon
+from stockpyl.demand_source import DemandSource
 from stockpyl.instances import *
 from tests.settings import *
 
@@ -359,6 +361,215 @@ class TestFiniteHorizon(unittest.TestCase):
 										total_cost, cost_matrix, oul_matrix, x_range,
 										'tests/additional_files/instance_1', sample_frac=None)
 
+	def test_5_period_instance(self):
+		"""Test that finite_horizon() function correctly solves a 5-period instance, and
+		that it returns the same costs when the optimal oul_matrix is provided.
+		"""
+		print_status('TestFiniteHorizon', 'test_5_period_instance()')
+
+		reorder_points, order_up_to_levels, total_cost, cost_matrix, oul_matrix, \
+			x_range = finite_horizon.finite_horizon_dp(5, 1, 20, 1, 20, 2, 50, 100, 20)
+
+		self.assertListEqual(list(reorder_points), [0, 110, 110, 110, 110, 111])
+		self.assertListEqual(list(order_up_to_levels), [0, 133, 133, 133, 133, 126])
+		self.assertAlmostEqual(total_cost, 1558.6946467384012)
+
+		# Order-up-to levels are at least x, and are equal to x for x > s.
+		for t in range(1, 6):
+			self.assertTrue(np.all(oul_matrix[t, :] >= x_range))
+			self.assertTrue(np.all(oul_matrix[t, x_range > reorder_points[t]] == x_range[x_range > reorder_points[t]]))
+
+		_, _, total_cost2, cost_matrix2, oul_matrix2, _ = finite_horizon.finite_horizon_dp(
+			5, 1, 20, 1, 20, 2, 50, 100, 20, oul_matrix=oul_matrix.copy(), x_range=x_range)
+		self.assertAlmostEqual(total_cost2, total_cost)
+		np.testing.assert_allclose(cost_matrix2, cost_matrix)
+		np.testing.assert_array_equal(oul_matrix2, oul_matrix)
+
+	def test_range_expansion(self):
+		"""Test that finite_horizon() function gives the same solution when the x-range
+		is expanded during the optimization as when the expanded range is provided up front.
+		"""
+		print_status('TestFiniteHorizon', 'test_range_expansion()')
+
+		args = (6, 1, 20, 1, 20, 2, 50, [300, 220, 60, 50, 50, 50], [30, 25, 10, 10, 10, 10])
+
+		with self.assertWarns(UserWarning):
+			reorder_points, order_up_to_levels, total_cost, cost_matrix, oul_matrix, \
+				x_range = finite_horizon.finite_horizon_dp(*args, x_range=np.arange(-50, 120))
+		self.assertEqual(x_range[-1], 476)
+
+		reorder_points2, order_up_to_levels2, total_cost2, cost_matrix2, oul_matrix2, \
+			x_range2 = finite_horizon.finite_horizon_dp(*args, x_range=np.arange(-50, 477))
+		self.assertListEqual(list(reorder_points), list(reorder_points2))
+		self.assertListEqual(list(order_up_to_levels), list(order_up_to_levels2))
+		self.assertAlmostEqual(total_cost, total_cost2)
+		np.testing.assert_array_equal(x_range, x_range2)
+		np.testing.assert_allclose(cost_matrix, cost_matrix2)
+		np.testing.assert_array_equal(oul_matrix, oul_matrix2)
+
+	def test_demand_source_list(self):
+		"""Test that finite_horizon() function gives the same solution when a separate (but equal)
+		demand source is provided for each period as when the demand mean and SD are provided.
+		"""
+		print_status('TestFiniteHorizon', 'test_demand_source_list()')
+
+		reorder_points, order_up_to_levels, total_cost, cost_matrix, oul_matrix, \
+			x_range = finite_horizon.finite_horizon_dp(5, 1, 20, 1, 20, 2, 50, 100, 20)
+
+		demand_source = [DemandSource(type='N', mean=100, standard_deviation=20) for _ in range(5)]
+		reorder_points2, order_up_to_levels2, total_cost2, cost_matrix2, oul_matrix2, \
+			x_range2 = finite_horizon.finite_horizon_dp(5, 1, 20, 1, 20, 2, 50, demand_source=demand_source)
+
+		self.assertListEqual(list(reorder_points), list(reorder_points2))
+		self.assertListEqual(list(order_up_to_levels), list(order_up_to_levels2))
+		self.assertEqual(total_cost, total_cost2)
+		np.testing.assert_array_equal(cost_matrix, cost_matrix2)
+		np.testing.assert_array_equal(oul_matrix, oul_matrix2)
+
+	def test_policy_only(self):
+		"""Test that finite_horizon() function gives the same policy and cost when
+		policy_only is True, including when the x-range is expanded.
+		"""
+		print_status('TestFiniteHorizon', 'test_policy_only()')
+
+		for args, kwargs in [((5, 1, 20, 1, 20, 2, 50, 100, 20), {}),
+							 ((6, 1, 20, 1, 20, 2, 50, [300, 220, 60, 50, 50, 50], [30, 25, 10, 10, 10, 10]),
+							  {'x_range': np.arange(-50, 120)})]:
+			with warnings.catch_warnings():
+				warnings.simplefilter('ignore')
+				reorder_points, order_up_to_levels, total_cost, _, _, x_range = \
+					finite_horizon.finite_horizon_dp(*args, **kwargs)
+				reorder_points2, order_up_to_levels2, total_cost2, cost_matrix2, oul_matrix2, x_range2 = \
+					finite_horizon.finite_horizon_dp(*args, policy_only=True, **kwargs)
+
+			self.assertListEqual(list(reorder_points), list(reorder_points2))
+			self.assertListEqual(list(order_up_to_levels), list(order_up_to_levels2))
+			self.assertEqual(total_cost, total_cost2)
+			np.testing.assert_array_equal(x_range, x_range2)
+			self.assertIsNone(cost_matrix2)
+			self.assertIsNone(oul_matrix2)
+
+	def test_warm_start(self):
+		"""Test that finite_horizon() function gives the same solution when warm-started
+		from a previous solve as when solved from scratch, as the horizon shrinks toward
+		a fixed end and the forecast for the first period is updated.
+		"""
+		print_status('TestFiniteHorizon', 'test_warm_start()')
+
+		demand_mean = [100, 90, 110, 100, 120, 100, 80, 100]
+		warm_start = {}
+		for day in range(3):
+			# Roll horizon forward and update forecast for first period.
+			mean = demand_mean[day:]
+			mean[0] += 10
+			with warnings.catch_warnings():
+				warnings.simplefilter('ignore')
+				reorder_points, order_up_to_levels, total_cost, cost_matrix, oul_matrix, x_range = \
+					finite_horizon.finite_horizon_dp(8 - day, 1, 20, 1, 20, 2, 50, mean, 20, warm_start=warm_start)
+				reorder_points2, order_up_to_levels2, total_cost2, cost_matrix2, oul_matrix2, x_range2 = \
+					finite_horizon.finite_horizon_dp(8 - day, 1, 20, 1, 20, 2, 50, mean, 20, x_range=x_range)
+
+			self.assertEqual(warm_start['num_periods_reused'], 0 if day == 0 else 7 - day)
+			self.assertListEqual(list(reorder_points), list(reorder_points2))
+			self.assertListEqual(list(order_up_to_levels), list(order_up_to_levels2))
+			self.assertEqual(total_cost, total_cost2)
+			np.testing.assert_array_equal(cost_matrix, cost_matrix2)
+			np.testing.assert_array_equal(oul_matrix, oul_matrix2)
+
+		with self.assertRaises(ValueError):
+			finite_horizon.finite_horizon_dp(5, 1, 20, 1, 20, 2, 50, 100, 20, policy_only=True, warm_start={})
+
+	def test_warm_start_sliding_window(self):
+		"""Test that finite_horizon() function gives the same solution when warm-started
+		from a previous solve as when solved from scratch, as a fixed-length horizon slides
+		forward with a new last period, reusing no periods but reusing the demand probabilities.
+		"""
+		print_status('TestFiniteHorizon', 'test_warm_start_sliding_window()')
+
+		demand_mean = [100, 90, 110, 100, 120, 100, 80, 100, 95, 105]
+		warm_start = {}
+		for day in range(3):
+			mean = demand_mean[day:day+8]
+			prev_probabilities = dict(warm_start.get('demand_probabilities', {}))
+			with warnings.catch_warnings():
+				warnings.simplefilter('ignore')
+				reorder_points, order_up_to_levels, total_cost, cost_matrix, oul_matrix, x_range = \
+					finite_horizon.finite_horizon_dp(8, 1, 20, 1, 20, 2, 50, mean, 20, warm_start=warm_start)
+				reorder_points2, order_up_to_levels2, total_cost2, cost_matrix2, oul_matrix2, x_range2 = \
+					finite_horizon.finite_horizon_dp(8, 1, 20, 1, 20, 2, 50, mean, 20, x_range=x_range)
+
+			self.assertEqual(warm_start['num_periods_reused'], 0)
+			for key, (_, prob) in prev_probabilities.items():
+				if key in warm_start['demand_probabilities']:
+					self.assertIs(warm_start['demand_probabilities'][key][1], prob)
+			self.assertListEqual(list(reorder_points), list(reorder_points2))
+			self.assertListEqual(list(order_up_to_levels), list(order_up_to_levels2))
+			self.assertEqual(total_cost, total_cost2)
+			np.testing.assert_array_equal(cost_matrix, cost_matrix2)
+			np.testing.assert_array_equal(oul_matrix, oul_matrix2)
+		self.assertEqual(len(warm_start['demand_probabilities']), len(set(demand_mean[2:10])))
+
+class TestFiniteHorizonDPBatch(unittest.TestCase):
+	@classmethod
+	def set_up_class(cls):
+		"""Called once, before any tests."""
+		print_status('TestFiniteHorizonDPBatch', 'set_up_class()')
+
+	@classmethod
+	def tear_down_class(cls):
+		"""Called once, after all tests, if set_up_class successful."""
+		print_status('TestFiniteHorizonDPBatch', 'tear_down_class()')
+
+	def test_matches_finite_horizon_dp(self):
+		"""Test that finite_horizon_dp_batch() function gives the same solutions as
+		finite_horizon_dp() for each SKU.
+		"""
+		print_status('TestFiniteHorizonDPBatch', 'test_matches_finite_horizon_dp()')
+
+		holding_cost = [[1], [0.5], [2]]
+		stockout_cost = [[20], [10], [30]]
+		purchase_cost = [[2], [0], [1]]
+		fixed_cost = [[50], [0], [3000]]
+		demand_mean = [[100, 100, 100, 100, 100], [20, 25, 30, 25, 20], [60, 80, 60, 80, 60]]
+		demand_sd = [[20, 20, 20, 20, 20], [4, 5, 6, 5, 4], [10, 15, 10, 15, 10]]
+		discount_factor = [[1], [0.9], [0.95]]
+		initial_inventory_level = [0, 10, 40]
+
+		with warnings.catch_warnings():
+			warnings.simplefilter('ignore')
+			reorder_points, order_up_to_levels, total_cost = finite_horizon.finite_horizon_dp_batch(
+				5, holding_cost, stockout_cost, 1, [20, 10, 30], purchase_cost, fixed_cost,
+				demand_mean, demand_sd, discount_factor=discount_factor,
+				initial_inventory_level=initial_inventory_level)
+
+		self.assertEqual(reorder_points.shape, (3, 6))
+		self.assertEqual(order_up_to_levels.shape, (3, 6))
+		for k in range(3):
+			with warnings.catch_warnings():
+				warnings.simplefilter('ignore')
+				reorder_points2, order_up_to_levels2, total_cost2, _, _, _ = finite_horizon.finite_horizon_dp(
+					5, holding_cost[k][0], stockout_cost[k][0], 1, [20, 10, 30][k], purchase_cost[k][0],
+					fixed_cost[k][0], demand_mean[k], demand_sd[k], discount_factor=discount_factor[k][0],
+					initial_inventory_level=initial_inventory_level[k], policy_only=True)
+			self.assertListEqual(list(reorder_points[k, 1:]), list(reorder_points2[1:]))
+			self.assertListEqual(list(order_up_to_levels[k, 1:]), list(order_up_to_levels2[1:]))
+			self.assertAlmostEqual(total_cost[k], total_cost2)
+
+	def test_bad_parameters(self):
+		"""Test that finite_horizon_dp_batch() function correctly raises exceptions
+		on bad parameters.
+		"""
+		print_status('TestFiniteHorizonDPBatch', 'test_bad_parameters()')
+
+		with self.assertRaises(ValueError):
+			finite_horizon.finite_horizon_dp_batch(5, [1, 1, 1], 20, 1, 20, 2, 50, 100, 20)
+		with self.assertRaises(ValueError):
+			finite_horizon.finite_horizon_dp_batch(5, [[1], [1]], 20, [1, 1, 1], 20, 2, 50, 100, 20)
+		with self.assertRaises(ValueError):
+			finite_horizon.finite_horizon_dp_batch(5, [[1], [0]], 20, 1, 20, 2, 50, 100, 20)
+		with self.assertRaises(ValueError):
+			finite_horizon.finite_horizon_dp_batch(5, 1, 20, 1, 20, 2, 50, 100, [[20], [-1]])
+
 
 class TestMyopicBounds(unittest.TestCase):
 	@classmethod
@@ -1,4 +1,6 @@
 import unittest
+import os
+import tempfile
 from scipy import stats
 
 import stockpyl.meio_general as meio_general
@@ -6,6 +8,7 @@ from stockpyl.instances import *
 from stockpyl.ssm_serial import *
 from stockpyl.supply_chain_network import *
 from stockpyl.newsvendor import newsvendor_normal_cost
+from stockpyl.sim import generate_sample_paths, run_multiple_trials
 from tests.settings import *
 
 
@@ -26,6 +29,12 @@ def tear_down_module():
 	print_status('---', 'tear_down_module()')
 
 
+def quadratic_cost(S):
+	"""Objective function for enumeration tests. (Defined at module level so that it can
+	be sent to worker processes.)"""
+	return sum((S[n_ind] - 6) ** 2 for n_ind in S) + 0.5 * (S[1] % 2)
+
+
 class TestTruncateAndDiscretize(unittest.TestCase):
 	@classmethod
 	def set_up_class(cls):
@@ -263,6 +272,131 @@ class TestMEIOByEnumeration(unittest.TestCase):
 		self.assertDictEqual(best_S, {0: 45, 1: 25, 2: 25, 3: 12, 4: 12, 5: 12, 6: 12})
 		self.assertAlmostEqual(best_cost, 173.84266390165666)
 
+	def test_workers(self):
+		"""Test that meio_by_enumeration() returns the same results with and without
+		a process pool.
+		"""
+		print_status('TestMEIOByEnumeration', 'test_workers()')
+
+		network = load_instance("example_6_1")
+		for node in network.nodes:
+			node.initial_inventory_level = 0
+
+		# Simulation.
+		kwargs = {'truncation_lo': {1: 5, 2: 4, 3: 10}, 'truncation_hi': {1: 7, 2: 7, 3: 12},
+				  'sim_num_trials': 2, 'sim_num_periods': 50, 'sim_rand_seed': 762,
+				  'progress_bar': False, 'print_solutions': False}
+		best_S, best_cost = meio_general.meio_by_enumeration(network, **kwargs)
+		best_S_pool, best_cost_pool = meio_general.meio_by_enumeration(network, workers=2, chunk_size=5,
+																	   **kwargs)
+		self.assertDictEqual(best_S_pool, best_S)
+		self.assertEqual(best_cost_pool, best_cost)
+
+		# Objective function (with ties).
+		kwargs = {'base_stock_levels': {1: [4, 5, 6, 7, 8], 2: [5, 6, 7], 3: [6, 7]},
+				  'objective_function': quadratic_cost, 'progress_bar': False, 'top_k': 4}
+		best_S, best_cost, top = meio_general.meio_by_enumeration(network, **kwargs)
+		best_S_pool, best_cost_pool, top_pool = meio_general.meio_by_enumeration(network, workers=2, **kwargs)
+		self.assertDictEqual(best_S_pool, best_S)
+		self.assertEqual(best_cost_pool, best_cost)
+		self.assertListEqual(top_pool, top)
+
+	def test_crn(self):
+		"""Test that meio_by_enumeration() evaluates every solution with the same sample paths
+		if crn is True.
+		"""
+		print_status('TestMEIOByEnumeration', 'test_crn()')
+
+		network = load_instance("example_6_1")
+		for node in network.nodes:
+			node.initial_inventory_level = 0
+
+		kwargs = {'truncation_lo': {1: 6, 2: 4, 3: 10}, 'truncation_hi': {1: 7, 2: 5, 3: 11},
+				  'sim_num_trials': 2, 'sim_num_periods': 50, 'sim_rand_seed': 762,
+				  'progress_bar': False, 'crn': True, 'top_k': 8}
+		best_S, best_cost, top = meio_general.meio_by_enumeration(network, **kwargs)
+		best_S_pool, best_cost_pool, top_pool = meio_general.meio_by_enumeration(network, workers=2, **kwargs)
+		self.assertDictEqual(best_S_pool, best_S)
+		self.assertEqual(best_cost_pool, best_cost)
+		self.assertListEqual(top_pool, top)
+
+		# Each cost equals the cost of the solution on the sample paths.
+		sample_paths = generate_sample_paths(network, 2, 50, rand_seed=762)
+		for S, cost in top:
+			for node in network.nodes:
+				node.inventory_policy.base_stock_level = S[node.index]
+			mean_cost, _ = run_multiple_trials(network, 2, 50, progress_bar=False, sample_paths=sample_paths)
+			self.assertEqual(cost, mean_cost)
+
+	def test_ocba(self):
+		"""Test that meio_by_enumeration() finds the best solution when trials are allocated
+		using OCBA, with the same results with and without a process pool (which allocates
+		at least 4 * workers * chunk_size trials per round).
+		"""
+		print_status('TestMEIOByEnumeration', 'test_ocba()')
+
+		network = load_instance("example_6_1")
+		for node in network.nodes:
+			node.initial_inventory_level = 0
+
+		kwargs = {'base_stock_levels': {1: [6, 7], 2: [4, 5], 3: [11]}, 'sim_num_trials': 10,
+				  'sim_num_periods': 30, 'sim_rand_seed': 762, 'progress_bar': False, 'ocba': True,
+				  'ocba_initial_trials': 3, 'ocba_increment': 2, 'top_k': 4}
+		best_S, best_cost, top = meio_general.meio_by_enumeration(network, **kwargs)
+		_, _, top_8 = meio_general.meio_by_enumeration(network, **{**kwargs, 'ocba_increment': 8})
+		best_S_pool, best_cost_pool, top_pool = meio_general.meio_by_enumeration(network, workers=2, chunk_size=1,
+																				 **kwargs)
+
+		self.assertDictEqual(best_S, {1: 7, 2: 5, 3: 11})
+		self.assertEqual(top[0], (best_S, best_cost))
+		self.assertEqual(len(top), 4)
+		self.assertNotEqual(top_8, top)
+		self.assertDictEqual(best_S_pool, best_S)
+		self.assertListEqual(top_pool, top_8)
+
+		for bad_kwargs in ({'ocba_target_pcs': 1}, {'ocba_initial_trials': 1}, {'ocba_increment': 0},
+						   {'ocba_max_trials': 11}):
+			with self.assertRaises(ValueError):
+				meio_general.meio_by_enumeration(network, **{**kwargs, **bad_kwargs})
+
+	def test_top_k(self):
+		"""Test that meio_by_enumeration() returns the top_k best solutions.
+		"""
+		print_status('TestMEIOByEnumeration', 'test_top_k()')
+
+		network = load_instance("example_6_1")
+
+		best_S, best_cost, top = meio_general.meio_by_enumeration(network,
+											base_stock_levels={1: [4, 5, 6, 7, 8], 2: [5, 6, 7], 3: [6, 7]},
+											objective_function=quadratic_cost, progress_bar=False, top_k=4)
+
+		self.assertDictEqual(best_S, {1: 6, 2: 6, 3: 6})
+		self.assertEqual(best_cost, 0)
+		self.assertListEqual(top, [({1: 6, 2: 6, 3: 6}, 0),
+								   ({1: 6, 2: 5, 3: 6}, 1),
+								   ({1: 6, 2: 6, 3: 7}, 1),
+								   ({1: 6, 2: 7, 3: 6}, 1)])
+
+		# top_k larger than the number of solutions.
+		_, _, top = meio_general.meio_by_enumeration(network,
+											base_stock_levels={1: [5, 6], 2: [6], 3: [6]},
+											objective_function=quadratic_cost, progress_bar=False, top_k=10)
+		self.assertListEqual(top, [({1: 6, 2: 6, 3: 6}, 0), ({1: 5, 2: 6, 3: 6}, 1.5)])
+
+	def test_bad_parameters(self):
+		"""Test that meio_by_enumeration() raises ValueError on bad workers, chunk_size,
+		or top_k.
+		"""
+		print_status('TestMEIOByEnumeration', 'test_bad_parameters()')
+
+		network = load_instance("example_6_1")
+
+		for kwargs in ({'workers': 0}, {'workers': 1.5}, {'chunk_size': 0}, {'top_k': -1}):
+			with self.assertRaises(ValueError):
+				meio_general.meio_by_enumeration(network, base_stock_levels={1: [6], 2: [6], 3: [6]},
+												 objective_function=quadratic_cost, progress_bar=False,
+												 **kwargs)
+
 
 class TestMEIOByCoordinateDescent(unittest.TestCase):
 	@classmethod
@@ -378,3 +512,89 @@ class TestMEIOByCoordinateDescent(unittest.TestCase):
 
 		self.assertDictEqual(best_S, {0: 46.137514205286905, 1: 22.8116265434347, 2: 22.8116265434347, 3: 11.599007310905623, 4: 11.599007310905623, 5: 11.599007310905623, 6: 11.599007310905623})
 		self.assertAlmostEqual(best_cost, 267.103456382861)
+
+	def test_cache(self):
+		"""Test that meio_by_coordinate_descent() uses and fills an ObjectiveCache.
+		"""
+		print_status('TestMEIOByCoordinateDescent', 'test_cache()')
+
+		network = load_instance("example_6_1")
+		kwargs = {'initial_solution': {1: 4, 2: 4, 3: 4}, 'search_lo': 0, 'search_hi': 12,
+				  'objective_function': quadratic_cost}
+
+		# Without rounding, results are unchanged.
+		best_S, best_cost = meio_general.meio_by_coordinate_descent(network, **kwargs)
+		cache = meio_general.ObjectiveCache()
+		best_S_cache, best_cost_cache = meio_general.meio_by_coordinate_descent(network, cache=cache, **kwargs)
+		self.assertDictEqual(best_S_cache, best_S)
+		self.assertEqual(best_cost_cache, best_cost)
+		self.assertEqual(cache.misses, len(cache))
+
+		# With rounding, later sweeps revisit solutions.
+		with tempfile.TemporaryDirectory() as tmpdir:
+			filename = os.path.join(tmpdir, 'cache.pickle')
+			cache = meio_general.ObjectiveCache(resolution=1, filename=filename)
+			best_S, best_cost = meio_general.meio_by_coordinate_descent(network, cache=cache, **kwargs)
+			self.assertDictEqual(best_S, {1: 6, 2: 6, 3: 6})
+			self.assertEqual(best_cost, 0)
+			self.assertGreater(cache.hits, cache.misses)
+			self.assertEqual(cache.misses, len(cache))
+
+			# A new cache loaded from the file needs no evaluations.
+			cache2 = meio_general.ObjectiveCache(resolution=1, filename=filename)
+			self.assertEqual(len(cache2), len(cache))
+			best_S2, best_cost2 = meio_general.meio_by_coordinate_descent(network, cache=cache2, **kwargs)
+			self.assertDictEqual(best_S2, best_S)
+			self.assertEqual(best_cost2, best_cost)
+			self.assertEqual(cache2.misses, 0)
+
+			with self.assertRaises(ValueError):
+				meio_general.ObjectiveCache(resolution=0.5, filename=filename)
+
+	def test_fibonacci_line_search(self):
+		"""Test that meio_by_coordinate_descent() finds integer base-stock levels with
+		fewer evaluations if line_search is 'fibonacci'.
+		"""
+		print_status('TestMEIOByCoordinateDescent', 'test_fibonacci_line_search()')
+
+		network = load_instance("example_6_1")
+		kwargs = {'initial_solution': {1: 4, 2: 4, 3: 4}, 'search_lo': 0, 'search_hi': 30,
+				  'objective_function': quadratic_cost}
+
+		golden_cache = meio_general.ObjectiveCache()
+		meio_general.meio_by_coordinate_descent(network, cache=golden_cache, **kwargs)
+		fibonacci_cache = meio_general.ObjectiveCache()
+		best_S, best_cost = meio_general.meio_by_coordinate_descent(network, cache=fibonacci_cache,
+																	line_search='fibonacci', **kwargs)
+
+		self.assertDictEqual(best_S, {1: 6, 2: 6, 3: 6})
+		self.assertEqual(best_cost, 0)
+		self.assertLess(fibonacci_cache.hits + fibonacci_cache.misses,
+						(golden_cache.hits + golden_cache.misses) / 4)
+
+		with self.assertRaises(ValueError):
+			meio_general.meio_by_coordinate_descent(network, line_search='ternary', **kwargs)
+		with self.assertRaises(ValueError):
+			meio_general.meio_by_coordinate_descent(network, cache=meio_general.ObjectiveCache(),
+													line_search='fibonacci', line_search_resample=2, **kwargs)
+
+	def test_cache_lru(self):
+		"""Test that ObjectiveCache discards the least recently used solutions.
+		"""
+		print_status('TestMEIOByCoordinateDescent', 'test_cache_lru()')
+
+		cache = meio_general.ObjectiveCache(resolution=0.5, max_size=2)
+		cache.put({1: 1.1, 2: 3}, 10)
+		cache.put({1: 2, 2: 3}, 20)
+		self.assertEqual(cache.get({2: 3, 1: 0.9}), 10)
+		cache.put({1: 3, 2: 3}, 30)
+		self.assertEqual(len(cache), 2)
+		self.assertIsNone(cache.get({1: 2, 2: 3}))
+		self.assertEqual(cache.get({1: 3, 2: 3}), 30)
+		self.assertEqual((cache.hits, cache.misses), (2, 1))
+		self.assertDictEqual(cache.quantize({1: 1.1, 2: 3.3}), {1: 1.0, 2: 3.5})
+
+		with self.assertRaises(ValueError):
+			meio_general.ObjectiveCache(resolution=0)
+		with self.assertRaises(ValueError):
+			meio_general.ObjectiveCache(max_size=0)
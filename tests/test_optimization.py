@@ -1,5 +1,6 @@
 import unittest
 import copy
+import numpy as np
 
 import stockpyl.optimization as optimization
 from stockpyl.instances import *
@@ -81,3 +82,96 @@ class TestGoldenSectionSearch(unittest.TestCase):
 
 		self.assertAlmostEqual(S1_star, 6.899491709061081, places=1)
 		self.assertAlmostEqual(C_star, 47.82, places=1)
+
+
+class TestFibonacciSearch(unittest.TestCase):
+	@classmethod
+	def set_up_class(cls):
+		"""Called once, before any tests."""
+		print_status('TestFibonacciSearch', 'set_up_class()')
+
+	@classmethod
+	def tear_down_class(cls):
+		"""Called once, after all tests, if set_up_class successful."""
+		print_status('TestFibonacciSearch', 'tear_down_class()')
+
+	def test_quadratic(self):
+		"""Test that fibonacci_search() correctly optimizes (x-2.3)^2 over the integers,
+		evaluating each point at most once.
+		"""
+		print_status('TestFibonacciSearch', 'test_quadratic()')
+
+		evaluated = []
+		def f(x):
+			evaluated.append(x)
+			return (x - 2.3) ** 2
+
+		x_star, f_star = optimization.fibonacci_search(f, 1, 50)
+
+		self.assertEqual(x_star, 2)
+		self.assertAlmostEqual(f_star, 0.09)
+		self.assertTrue(all(isinstance(x, int) for x in evaluated))
+		self.assertEqual(len(evaluated), len(set(evaluated)))
+		self.assertLessEqual(len(evaluated), 10)
+
+	def test_all_intervals(self):
+		"""Test that fibonacci_search() finds the integer minimizer of a quadratic for many
+		intervals and minimizers, including minimizers outside the interval.
+		"""
+		print_status('TestFibonacciSearch', 'test_all_intervals()')
+
+		for a in range(-3, 4):
+			for b in range(a, a + 25):
+				for m in [a - 1.5, a + 0.4, (a + b) / 2 + 0.3, b - 0.6, b + 2]:
+					f = lambda x: (x - m) ** 2
+					x_star, f_star = optimization.fibonacci_search(f, a, b)
+					self.assertEqual(f_star, min(f(x) for x in range(a, b + 1)))
+
+	def test_example_4_1(self):
+		"""Test that fibonacci_search() correctly optimizes newsvendor
+		cost function for Example 4.1 over the integers.
+		"""
+		print_status('TestFibonacciSearch', 'test_example_4_1()')
+
+		instance = load_instance("example_4_1")
+		h = instance['holding_cost']
+		p = instance['stockout_cost']
+		mu = instance['demand_mean']
+		sigma = instance['demand_sd']
+
+		f = lambda S: newsvendor_normal_cost(S, h, p, mu, sigma)
+
+		S_star, f_star = optimization.fibonacci_search(f, 40.5, 60)
+
+		self.assertEqual(S_star, 57)
+		self.assertAlmostEqual(f_star, f(57))
+
+	def test_resample(self):
+		"""Test that fibonacci_search() chooses among the points near the minimizer by
+		their mean values if resample > 0.
+		"""
+		print_status('TestFibonacciSearch', 'test_resample()')
+
+		rng = np.random.default_rng(17)
+		evaluated = []
+		def f(x):
+			evaluated.append(x)
+			return (x - 10.4) ** 2 + rng.normal(0, 3)
+
+		x_star, f_star = optimization.fibonacci_search(f, 0, 40, resample=30, resample_width=2)
+
+		self.assertEqual(x_star, 10)
+		self.assertEqual(evaluated.count(x_star), 31)
+
+	def test_bad_parameters(self):
+		"""Test that fibonacci_search() raises ValueError on bad parameters.
+		"""
+		print_status('TestFibonacciSearch', 'test_bad_parameters()')
+
+		f = lambda x: x ** 2
+		with self.assertRaises(ValueError):
+			optimization.fibonacci_search(f, 2.2, 2.8)
+		with self.assertRaises(ValueError):
+			optimization.fibonacci_search(f, 0, 10, resample=-1)
+		with self.assertRaises(ValueError):
+			optimization.fibonacci_search(f, 0, 10, resample=1, resample_width=0.5)
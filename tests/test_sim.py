@@ -1,5 +1,6 @@
 import unittest
 import random
+import sys
 import filecmp
 
 from stockpyl.instances import *
@@ -8,6 +9,7 @@ from stockpyl.sim_io import write_results
 from stockpyl.supply_chain_network import local_to_echelon_base_stock_levels
 from stockpyl.policy import *
 from stockpyl.disruption_process import DisruptionProcess
+from stockpyl.demand_source import DemandSource
 
 
 # Module-level functions.
@@ -1680,5 +1682,367 @@ class TestCalculatePeriodCosts(unittest.TestCase):
                 )
 
 
+class TestRunMultipleTrials(unittest.TestCase):
+    @classmethod
+    def set_up_class(cls):
+        """Called once, before any tests."""
+        print_status('TestRunMultipleTrials', 'set_up_class()')
+
+    @classmethod
+    def tear_down_class(cls):
+        """Called once, after all tests, if set_up_class successful."""
+        print_status('TestRunMultipleTrials', 'tear_down_class()')
+
+    def test_workers_reproducible(self):
+        """Test that run_multiple_trials() returns identical results for any number of workers.
+        """
+        print_status('TestRunMultipleTrials', 'test_workers_reproducible()')
+
+        network = load_instance("example_6_1")
+        results = [run_multiple_trials(network, 8, 50, rand_seed=17, progress_bar=False, workers=w)
+                   for w in [1, 2, 3]]
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+
+    def test_workers_with_disruptions(self):
+        """Test that run_multiple_trials() returns identical results for any number of workers
+        when the network has disruptions (whose states carry over between periods).
+        """
+        print_status('TestRunMultipleTrials', 'test_workers_with_disruptions()')
+
+        network = load_instance("example_6_1")
+        network.nodes_by_index[1].disruption_process = DisruptionProcess(
+            random_process_type='M',
+            disruption_type='OP',
+            disruption_probability=0.1,
+            recovery_probability=0.4
+        )
+        result1 = run_multiple_trials(network, 6, 50, rand_seed=42, progress_bar=False, workers=1)
+        result2 = run_multiple_trials(network, 6, 50, rand_seed=42, progress_bar=False, workers=2)
+
+        self.assertEqual(result1, result2)
+
+    def test_workers_batch(self):
+        """Test that run_multiple_trials() returns the same results with and without the batch engine
+        when workers are specified.
+        """
+        print_status('TestRunMultipleTrials', 'test_workers_batch()')
+
+        network = load_instance("example_6_1")
+        mean_cost, sem_cost = run_multiple_trials(network, 8, 50, rand_seed=17, progress_bar=False, workers=2)
+        mean_cost_batch, sem_cost_batch = run_multiple_trials(network, 8, 50, rand_seed=17, progress_bar=False,
+                                                              workers=2, batch=True)
+
+        self.assertAlmostEqual(mean_cost, mean_cost_batch, places=6)
+        self.assertAlmostEqual(sem_cost, sem_cost_batch, places=6)
+
+    def test_bad_workers(self):
+        """Test that run_multiple_trials() raises ValueError if workers is invalid.
+        """
+        print_status('TestRunMultipleTrials', 'test_bad_workers()')
+
+        network = load_instance("example_6_1")
+        with self.assertRaises(ValueError):
+            run_multiple_trials(network, 2, 10, rand_seed=17, progress_bar=False, workers=0)
+
+    def test_sample_paths(self):
+        """Test that run_multiple_trials() replays the demands in sample_paths, and that a
+        single-trial sample path reproduces a seeded simulation.
+        """
+        print_status('TestRunMultipleTrials', 'test_sample_paths()')
+
+        network = load_instance("example_6_1")
+        sample_paths = generate_sample_paths(network, 1, 50, rand_seed=17)
+        total_cost = simulation(network, 50, rand_seed=17, progress_bar=False)
+        total_cost_replay = simulation(network, 50, progress_bar=False, sample_path=sample_paths[0])
+        self.assertEqual(total_cost, total_cost_replay)
+        node = network.nodes_by_index[1]
+        prod_index = node.product_indices[0]
+        np.testing.assert_array_equal([node.state_vars[t].inbound_order[None][prod_index] for t in range(50)],
+                                      sample_paths[0]['demands'][(1, prod_index)])
+
+        # Same result for any rand_seed and number of workers.
+        sample_paths = generate_sample_paths(network, 6, 50, rand_seed=42)
+        results = [run_multiple_trials(network, 6, 50, rand_seed=seed, progress_bar=False, workers=w,
+                                       sample_paths=sample_paths) for seed, w in [(1, None), (2, 1), (3, 2)]]
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+
+    def test_sample_paths_with_disruptions(self):
+        """Test that run_multiple_trials() replays the disruption states in sample_paths.
+        """
+        print_status('TestRunMultipleTrials', 'test_sample_paths_with_disruptions()')
+
+        network = load_instance("example_6_1")
+        network.nodes_by_index[1].disruption_process = DisruptionProcess(
+            random_process_type='M',
+            disruption_type='OP',
+            disruption_probability=0.1,
+            recovery_probability=0.4
+        )
+        sample_paths = generate_sample_paths(network, 3, 50, rand_seed=42)
+        result1 = run_multiple_trials(network, 3, 50, progress_bar=False, sample_paths=sample_paths)
+        disrupted = [network.nodes_by_index[1].state_vars[t].disrupted for t in range(50)]
+        result2 = run_multiple_trials(network, 3, 50, progress_bar=False, sample_paths=sample_paths)
+
+        self.assertListEqual(disrupted, list(sample_paths[2]['disruption_states'][1]))
+        self.assertEqual(result1, result2)
+
+    def test_bad_sample_paths(self):
+        """Test that run_multiple_trials() raises ValueError if sample_paths has the wrong length.
+        """
+        print_status('TestRunMultipleTrials', 'test_bad_sample_paths()')
+
+        network = load_instance("example_6_1")
+        sample_paths = generate_sample_paths(network, 2, 10, rand_seed=17)
+        with self.assertRaises(ValueError):
+            run_multiple_trials(network, 3, 10, progress_bar=False, sample_paths=sample_paths)
+
+
+class TestSimulationContext(unittest.TestCase):
+    @classmethod
+    def set_up_class(cls):
+        """Called once, before any tests."""
+        print_status('TestSimulationContext', 'set_up_class()')
+
+    @classmethod
+    def tear_down_class(cls):
+        """Called once, after all tests, if set_up_class successful."""
+        print_status('TestSimulationContext', 'tear_down_class()')
+
+    def test_interleaved(self):
+        """Test that two step-by-step simulations whose periods are interleaved match the
+        results of simulating each one by itself.
+        """
+        print_status('TestSimulationContext', 'test_interleaved()')
+
+        T = 100
+
+        def build_networks():
+            network1 = load_instance("example_6_1")
+            network2 = load_instance("rong_atan_snyder_figure_1a")
+            network2.nodes_by_index[1].disruption_process = DisruptionProcess(
+                random_process_type='M',
+                disruption_type='OP',
+                disruption_probability=0.1,
+                recovery_probability=0.3
+            )
+            return network1, network2
+
+        # Each simulation by itself.
+        network1, network2 = build_networks()
+        total_cost1 = simulation(network1, T, rand_seed=17, progress_bar=False)
+        total_cost2 = simulation(network2, T, rand_seed=42, progress_bar=False)
+
+        # Interleaved.
+        network3, network4 = build_networks()
+        context3 = initialize(network3, T, rand_seed=17)
+        context4 = initialize(network4, T, rand_seed=42)
+        for _ in range(T):
+            step(network3, context=context3)
+            step(network4, context=context4)
+        total_cost3 = close(network3)
+        total_cost4 = close(network4)
+
+        self.assertAlmostEqual(total_cost1, total_cost3)
+        self.assertAlmostEqual(total_cost2, total_cost4)
+        self.assertTrue(network1.deep_equal_to(network3))
+        self.assertTrue(network2.deep_equal_to(network4))
+
+    def test_threads(self):
+        """Test that simulations run concurrently in threads match the results of running
+        them one at a time.
+        """
+        print_status('TestSimulationContext', 'test_threads()')
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        T = 100
+        seeds = [3, 17, 42, 62]
+
+        def simulate(rand_seed):
+            network = load_instance("example_6_1")
+            return simulation(network, T, rand_seed=rand_seed, progress_bar=False)
+
+        sequential_costs = [simulate(seed) for seed in seeds]
+        with ThreadPoolExecutor(max_workers=len(seeds)) as executor:
+            threaded_costs = list(executor.map(simulate, seeds))
+
+        self.assertEqual(sequential_costs, threaded_costs)
+
+    def test_generator(self):
+        """Test that simulation() accepts a numpy Generator and does not use the global PRNG.
+        """
+        print_status('TestSimulationContext', 'test_generator()')
+
+        T = 100
+
+        network = load_instance("example_6_1")
+        network.nodes_by_index[2].disruption_process = DisruptionProcess(
+            random_process_type='M',
+            disruption_type='SP',
+            disruption_probability=0.1,
+            recovery_probability=0.3
+        )
+
+        np.random.seed(99)
+        global_state = np.random.get_state()[1].copy()
+
+        total_cost1 = simulation(network, T, progress_bar=False, rng=np.random.default_rng(5))
+        total_cost2 = simulation(network, T, progress_bar=False, rng=np.random.default_rng(5))
+
+        self.assertEqual(total_cost1, total_cost2)
+        np.testing.assert_array_equal(np.random.get_state()[1], global_state)
+
+    def test_presample_demands(self):
+        """Test that pre-sampling demands does not change the results when there is a single random
+        demand source, and that pre-sampled demands are the ones that are simulated.
+        """
+        print_status('TestSimulationContext', 'test_presample_demands()')
+
+        T = 100
+
+        # Single random demand source: results are the same with or without pre-sampling.
+        network1 = load_instance("example_6_1")
+        network2 = load_instance("example_6_1")
+        total_cost1 = simulation(network1, T, rand_seed=17, progress_bar=False, presample_demands=False)
+        total_cost2 = simulation(network2, T, rand_seed=17, progress_bar=False, presample_demands=True)
+        self.assertAlmostEqual(total_cost1, total_cost2)
+        self.assertTrue(network1.deep_equal_to(network2))
+
+        # Multiple random demand sources: not pre-sampled by default.
+        network = load_instance("rong_atan_snyder_figure_1a")
+        context = initialize(network, T, rand_seed=17)
+        self.assertDictEqual(context.demand_buffer, {})
+
+        # ...but pre-sampled if requested.
+        total_cost = simulation(network, T, rand_seed=17, progress_bar=False, presample_demands=True)
+        self.assertGreater(total_cost, 0)
+        for (node_index, prod_index), demands in network.sim_context.demand_buffer.items():
+            node = network.nodes_by_index[node_index]
+            self.assertListEqual(
+                [node.state_vars[t].inbound_order[None][prod_index] for t in range(T)],
+                demands.tolist()
+            )
+
+    def test_step_loop_sees_demand_changes(self):
+        """Test that initialize() does not pre-sample demands by default, so that a change to a demand
+        source made during a manual step() loop takes effect.
+        """
+        print_status('TestSimulationContext', 'test_step_loop_sees_demand_changes()')
+
+        T = 20
+
+        network = load_instance("example_6_1")
+        sink = network.sink_nodes[0]
+        prod_index = sink.product_indices[0]
+        context = initialize(network, T, rand_seed=17)
+        self.assertDictEqual(context.demand_buffer, {})
+        for t in range(T):
+            if t == 10:
+                sink.demand_source.mean = 1000
+            step(network)
+
+        demands = [sink.state_vars[t].inbound_order[None][prod_index] for t in range(T)]
+        self.assertTrue(all(d < 100 for d in demands[:10]))
+        self.assertTrue(all(d > 900 for d in demands[10:]))
+
+
+class TestSimulationPlan(unittest.TestCase):
+    @classmethod
+    def set_up_class(cls):
+        """Called once, before any tests."""
+        print_status('TestSimulationPlan', 'set_up_class()')
+
+    @classmethod
+    def tear_down_class(cls):
+        """Called once, after all tests, if set_up_class successful."""
+        print_status('TestSimulationPlan', 'tear_down_class()')
+
+    def test_sequences(self):
+        """Test that each node places orders after its successors and processes shipments
+        after its predecessors.
+        """
+        print_status('TestSimulationPlan', 'test_sequences()')
+
+        for instance_name in ["example_6_1", "assembly_3_stage", "rosling_figure_1", "rong_atan_snyder_figure_1a"]:
+            network = load_instance(instance_name)
+            plan = SimulationPlan(network)
+
+            order_position = {n.index: i for i, n in enumerate(plan.order_sequence)}
+            shipment_position = {n.index: i for i, n in enumerate(plan.shipment_sequence)}
+            self.assertEqual(len(order_position), len(network.nodes))
+            self.assertEqual(len(shipment_position), len(network.nodes))
+            for n in network.nodes:
+                for s_index in n.successor_indices():
+                    self.assertLess(order_position[s_index], order_position[n.index])
+                    self.assertLess(shipment_position[n.index], shipment_position[s_index])
+
+    def test_deep_network(self):
+        """Test that a serial system with more stages than the recursion limit can be simulated.
+        """
+        print_status('TestSimulationPlan', 'test_deep_network()')
+
+        num_nodes = sys.getrecursionlimit() + 100
+        network = serial_system(
+            num_nodes=num_nodes,
+            local_holding_cost=[1] * num_nodes,
+            stockout_cost=[10] + [0] * (num_nodes - 1),
+            demand_type='N',
+            mean=5,
+            standard_deviation=1,
+            shipment_lead_time=[1] * num_nodes,
+            policy_type='BS',
+            base_stock_level=[10] * num_nodes
+        )
+
+        total_cost = simulation(network, 3, rand_seed=17, progress_bar=False)
+        self.assertGreater(total_cost, 0)
+
+    def test_snapshot_attributes(self):
+        """Test that simulating with attribute snapshots gives the same results as without.
+        """
+        print_status('TestSimulationPlan', 'test_snapshot_attributes()')
+
+        for instance_name in ["example_6_1", "assembly_3_stage", "rong_atan_snyder_figure_1a"]:
+            network = load_instance(instance_name)
+            total_cost = simulation(network, 50, rand_seed=762, progress_bar=False)
+            network = load_instance(instance_name)
+            snapshot_total_cost = simulation(network, 50, rand_seed=762, progress_bar=False,
+                                             snapshot_attributes=True)
+            self.assertAlmostEqual(total_cost, snapshot_total_cost)
+
+        network = load_instance("example_6_1")
+        plan = SimulationPlan(network, snapshot_attributes=True)
+        node = network.nodes_by_index[1]
+        slot = plan.attribute_slots[(1, node.product_indices[0])]
+        self.assertEqual(plan.attribute_values['local_holding_cost'][slot], node.local_holding_cost)
+        self.assertEqual(plan.get_attribute(node, 'shipment_lead_time', node.product_indices[0]),
+                         node.shipment_lead_time)
+
+    def test_replace_demand_source(self):
+        """Test that a demand source that is replaced during the simulation is used in later
+        periods, unless attributes are snapshotted.
+        """
+        print_status('TestSimulationPlan', 'test_replace_demand_source()')
+
+        for snapshot_attributes in [False, True]:
+            network = load_instance("example_6_1")
+            sink = network.nodes_by_index[1]
+            prod_index = sink.product_indices[0]
+            initialize(network, 20, rand_seed=762, presample_demands=False,
+                       snapshot_attributes=snapshot_attributes)
+            for t in range(20):
+                if t == 10:
+                    sink.demand_source = DemandSource(type='D', demand_list=[1000])
+                step(network)
+            demands = [sink.state_vars[t].inbound_order[None][prod_index] for t in range(10, 20)]
+            if snapshot_attributes:
+                self.assertLess(max(demands), 100)
+            else:
+                self.assertListEqual(demands, [1000] * 10)
+
+
 if __name__ == '__main__':
     unittest.main()
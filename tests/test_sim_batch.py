@@ -0,0 +1,208 @@
+import unittest
+import sys
+
+from stockpyl.instances import *
+from stockpyl.sim import run_multiple_trials
+from stockpyl.sim_batch import *
+from stockpyl.supply_chain_network import local_to_echelon_base_stock_levels, serial_system
+from stockpyl.policy import Policy
+
+
+# Module-level functions.
+
+def print_status(class_name, function_name):
+    """Print status message."""
+    print("module : test_sim_batch   class : {:30s} function : {:30s}".format(class_name, function_name))
+
+
+def set_up_module():
+    """Called once, before anything else in this module."""
+    print_status('---', 'set_up_module()')
+
+
+def tear_down_module():
+    """Called once, after everything else in this module."""
+    print_status('---', 'tear_down_module()')
+
+
+class TestIsBatchCompatible(unittest.TestCase):
+    @classmethod
+    def set_up_class(cls):
+        """Called once, before any tests."""
+        print_status('TestIsBatchCompatible', 'set_up_class()')
+
+    @classmethod
+    def tear_down_class(cls):
+        """Called once, after all tests, if set_up_class successful."""
+        print_status('TestIsBatchCompatible', 'tear_down_class()')
+
+    def test_compatible(self):
+        """Test that is_batch_compatible() returns True for supported networks.
+        """
+        print_status('TestIsBatchCompatible', 'test_compatible()')
+
+        for instance_name in ["example_6_1", "assembly_3_stage", "rong_atan_snyder_figure_1a"]:
+            network = load_instance(instance_name)
+            self.assertTrue(is_batch_compatible(network))
+
+    def test_incompatible(self):
+        """Test that is_batch_compatible() returns False for unsupported networks.
+        """
+        print_status('TestIsBatchCompatible', 'test_incompatible()')
+
+        # BEBS policies.
+        network = load_instance("rosling_figure_1")
+        self.assertFalse(is_batch_compatible(network))
+
+        # Disruptions.
+        network = load_instance("example_6_1")
+        network.nodes_by_index[2].disruption_process.random_process_type = 'M'
+        network.nodes_by_index[2].disruption_process.disruption_probability = 0.1
+        network.nodes_by_index[2].disruption_process.recovery_probability = 0.3
+        self.assertFalse(is_batch_compatible(network))
+
+        # Holding cost function.
+        network = load_instance("example_6_1")
+        network.nodes_by_index[1].local_holding_cost_function = lambda x: 2 * x
+        self.assertFalse(is_batch_compatible(network))
+
+
+class TestBatchSimulation(unittest.TestCase):
+    @classmethod
+    def set_up_class(cls):
+        """Called once, before any tests."""
+        print_status('TestBatchSimulation', 'set_up_class()')
+
+    @classmethod
+    def tear_down_class(cls):
+        """Called once, after all tests, if set_up_class successful."""
+        print_status('TestBatchSimulation', 'tear_down_class()')
+
+    def compare_to_scalar(self, network, num_trials=10, num_periods=100, rand_seed=17):
+        """Check that batch and trial-by-trial results agree."""
+        mean_cost, sem_cost = run_multiple_trials(network, num_trials, num_periods, rand_seed=rand_seed,
+                                                  progress_bar=False)
+        mean_cost_batch, sem_cost_batch = run_multiple_trials(network, num_trials, num_periods, rand_seed=rand_seed,
+                                                              progress_bar=False, batch=True)
+        self.assertAlmostEqual(mean_cost, mean_cost_batch, places=6)
+        self.assertAlmostEqual(sem_cost, sem_cost_batch, places=6)
+
+    def test_example_6_1(self):
+        """Test that batch simulation agrees with scalar simulation for Example 6.1.
+        """
+        print_status('TestBatchSimulation', 'test_example_6_1()')
+
+        network = load_instance("example_6_1")
+        self.compare_to_scalar(network)
+
+    def test_example_6_1_per_trial(self):
+        """Test that batch_simulation() returns per-trial costs for Example 6.1 that agree
+        with scalar simulation.
+        """
+        print_status('TestBatchSimulation', 'test_example_6_1_per_trial()')
+
+        network = load_instance("example_6_1")
+        total_costs = batch_simulation(network, 5, 50, rand_seed=62)
+        self.assertEqual(total_costs.shape, (5,))
+
+        # First trial alone should agree with first entry.
+        mean_cost, _ = run_multiple_trials(network, 1, 50, rand_seed=62, progress_bar=False)
+        self.assertAlmostEqual(total_costs[0] / 50, mean_cost, places=6)
+
+    def test_assembly_3_stage(self):
+        """Test that batch simulation agrees with scalar simulation for 3-stage assembly system.
+        """
+        print_status('TestBatchSimulation', 'test_assembly_3_stage()')
+
+        network = load_instance("assembly_3_stage")
+        self.compare_to_scalar(network)
+
+    def test_rong_atan_snyder_figure_1a(self):
+        """Test that batch simulation agrees with scalar simulation for distribution system.
+        """
+        print_status('TestBatchSimulation', 'test_rong_atan_snyder_figure_1a()')
+
+        network = load_instance("rong_atan_snyder_figure_1a")
+        self.compare_to_scalar(network)
+
+    def test_echelon_base_stock(self):
+        """Test that batch simulation agrees with scalar simulation for Example 6.1 with
+        echelon base-stock policies.
+        """
+        print_status('TestBatchSimulation', 'test_echelon_base_stock()')
+
+        network = load_instance("example_6_1")
+        S_local = {n.index: n.inventory_policy.base_stock_level for n in network.nodes}
+        S_echelon = local_to_echelon_base_stock_levels(network, S_local)
+        for n in network.nodes:
+            n.inventory_policy.type = 'EBS'
+            n.inventory_policy.base_stock_level = S_echelon[n.index]
+        self.compare_to_scalar(network)
+
+    def test_s_S(self):
+        """Test that batch simulation agrees with scalar simulation for (s,S) policy.
+        """
+        print_status('TestBatchSimulation', 'test_s_S()')
+
+        network = load_instance("example_4_1_network")
+        node = network.nodes[0]
+        node.inventory_policy = Policy(type='sS', reorder_point=40, order_up_to_level=70, node=node)
+        self.compare_to_scalar(network)
+
+    def test_r_Q_with_fixed_cost(self):
+        """Test that batch simulation agrees with scalar simulation for (r,Q) policy with fixed cost.
+        """
+        print_status('TestBatchSimulation', 'test_r_Q_with_fixed_cost()')
+
+        network = load_instance("example_4_1_network")
+        node = network.nodes[0]
+        node.inventory_policy = Policy(type='rQ', reorder_point=40, order_quantity=30, node=node)
+        node.fixed_cost = 10
+        self.compare_to_scalar(network)
+
+    def test_fixed_quantity(self):
+        """Test that batch simulation agrees with scalar simulation for fixed-quantity policy.
+        """
+        print_status('TestBatchSimulation', 'test_fixed_quantity()')
+
+        network = load_instance("example_6_1")
+        node = network.nodes_by_index[3]
+        node.inventory_policy = Policy(type='FQ', order_quantity=5, node=node)
+        self.compare_to_scalar(network)
+
+    def test_deep_network(self):
+        """Test that batch simulation agrees with scalar simulation for a serial system with more
+        stages than the recursion limit.
+        """
+        print_status('TestBatchSimulation', 'test_deep_network()')
+
+        num_nodes = sys.getrecursionlimit() + 100
+        network = serial_system(
+            num_nodes=num_nodes,
+            local_holding_cost=[1] * num_nodes,
+            stockout_cost=[10] + [0] * (num_nodes - 1),
+            demand_type='N',
+            mean=5,
+            standard_deviation=1,
+            shipment_lead_time=[1] * num_nodes,
+            policy_type='BS',
+            base_stock_level=[10] * num_nodes
+        )
+        self.compare_to_scalar(network, num_trials=2, num_periods=3)
+
+    def test_fallback(self):
+        """Test that run_multiple_trials() falls back to scalar simulation for unsupported networks.
+        """
+        print_status('TestBatchSimulation', 'test_fallback()')
+
+        network = load_instance("rosling_figure_1")
+        self.compare_to_scalar(network, num_trials=3, num_periods=20)
+
+    def test_incompatible_raises(self):
+        """Test that batch_simulation() raises ValueError for unsupported networks.
+        """
+        print_status('TestBatchSimulation', 'test_incompatible_raises()')
+
+        network = load_instance("rosling_figure_1")
+        with self.assertRaises(ValueError):
+            batch_simulation(network, 3, 20, rand_seed=17)
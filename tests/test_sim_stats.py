@@ -0,0 +1,175 @@
+import unittest
+
+import numpy as np
+
+from stockpyl.instances import load_instance
+from stockpyl.sim import simulation, run_multiple_trials
+from stockpyl.sim_stats import *
+
+
+# Module-level functions.
+
+def print_status(class_name, function_name):
+    """Print status message."""
+    print("module : test_sim_stats   class : {:30s} function : {:30s}".format(class_name, function_name))
+
+
+def set_up_module():
+    """Called once, before anything else in this module."""
+    print_status('---', 'set_up_module()')
+
+
+def tear_down_module():
+    """Called once, after everything else in this module."""
+    print_status('---', 'tear_down_module()')
+
+
+class TestRunningStatistic(unittest.TestCase):
+    @classmethod
+    def set_up_class(cls):
+        """Called once, before any tests."""
+        print_status('TestRunningStatistic', 'set_up_class()')
+
+    @classmethod
+    def tear_down_class(cls):
+        """Called once, after all tests, if set_up_class successful."""
+        print_status('TestRunningStatistic', 'tear_down_class()')
+
+    def test_moments(self):
+        """Test that RunningStatistic computes the correct mean, variance, min, and max.
+        """
+        print_status('TestRunningStatistic', 'test_moments()')
+
+        values = np.random.RandomState(17).normal(50, 10, size=1000)
+        stat = RunningStatistic()
+        for v in values:
+            stat.add(v)
+
+        self.assertEqual(stat.count, 1000)
+        self.assertAlmostEqual(stat.mean, np.mean(values))
+        self.assertAlmostEqual(stat.variance, np.var(values, ddof=1))
+        self.assertAlmostEqual(stat.standard_deviation, np.std(values, ddof=1))
+        self.assertEqual(stat.min, np.min(values))
+        self.assertEqual(stat.max, np.max(values))
+
+    def test_quantiles(self):
+        """Test that RunningStatistic estimates quantiles accurately.
+        """
+        print_status('TestRunningStatistic', 'test_quantiles()')
+
+        values = np.random.RandomState(42).exponential(10, size=10000)
+        stat = RunningStatistic(quantiles=[0.1, 0.5, 0.9, 0.99])
+        for v in values:
+            stat.add(v)
+
+        for q in [0.1, 0.5, 0.9, 0.99]:
+            self.assertAlmostEqual(stat.quantile(q), np.quantile(values, q), delta=0.05 * np.quantile(values, q))
+
+        with self.assertRaises(ValueError):
+            stat.quantile(0.25)
+
+    def test_few_observations(self):
+        """Test that RunningStatistic returns exact quantiles for 5 or fewer observations.
+        """
+        print_status('TestRunningStatistic', 'test_few_observations()')
+
+        stat = RunningStatistic()
+        self.assertTrue(np.isnan(stat.quantile(0.5)))
+        self.assertTrue(np.isnan(stat.variance))
+
+        values = [4, 1, 3]
+        for v in values:
+            stat.add(v)
+        for q in DEFAULT_QUANTILES:
+            self.assertAlmostEqual(stat.quantile(q), np.quantile(values, q))
+
+    def test_bad_quantile(self):
+        """Test that RunningStatistic raises ValueError for quantiles not in (0, 1).
+        """
+        print_status('TestRunningStatistic', 'test_bad_quantile()')
+
+        with self.assertRaises(ValueError):
+            RunningStatistic(quantiles=[0.5, 1.0])
+
+
+class TestStatisticsCollector(unittest.TestCase):
+    @classmethod
+    def set_up_class(cls):
+        """Called once, before any tests."""
+        print_status('TestStatisticsCollector', 'set_up_class()')
+
+    @classmethod
+    def tear_down_class(cls):
+        """Called once, after all tests, if set_up_class successful."""
+        print_status('TestStatisticsCollector', 'tear_down_class()')
+
+    def test_example_6_1(self):
+        """Test that StatisticsCollector matches the statistics calculated from the state variables
+        for example 6.1.
+        """
+        print_status('TestStatisticsCollector', 'test_example_6_1()')
+
+        T = 200
+        network = load_instance("example_6_1")
+        collector = StatisticsCollector()
+        total_cost = simulation(network, T, rand_seed=762, progress_bar=False, collector=collector)
+
+        for node in network.nodes:
+            prod_index = node.product_indices[0]
+            IL = [node.state_vars[t].inventory_level[prod_index] for t in range(T)]
+            cost = [node.state_vars[t].total_cost_incurred for t in range(T)]
+
+            stat = collector.statistic('inventory_level', node)
+            self.assertEqual(stat.count, T)
+            self.assertAlmostEqual(stat.mean, np.mean(IL))
+            self.assertAlmostEqual(stat.standard_deviation, np.std(IL, ddof=1))
+            self.assertAlmostEqual(stat.min, np.min(IL))
+            self.assertAlmostEqual(stat.max, np.max(IL))
+            self.assertAlmostEqual(collector.statistic('backorders', node.index, prod_index).mean,
+                                   np.mean([max(0, -il) for il in IL]))
+            self.assertAlmostEqual(collector.statistic('total_cost', node).mean, np.mean(cost))
+            self.assertAlmostEqual(collector.fill_rate(node), node.state_vars[T - 1].fill_rate[prod_index])
+
+        self.assertEqual(collector.num_trials, 1)
+        self.assertAlmostEqual(collector.trial_cost.mean, total_cost / T)
+
+        with self.assertRaises(ValueError):
+            collector.statistic('bad_measure', 1)
+
+    def test_rolling_window(self):
+        """Test that StatisticsCollector gives the same results with and without a rolling window.
+        """
+        print_status('TestStatisticsCollector', 'test_rolling_window()')
+
+        network = load_instance("rong_atan_snyder_figure_1a")
+        collector = StatisticsCollector()
+        simulation(network, 100, rand_seed=17, progress_bar=False, collector=collector)
+        network = load_instance("rong_atan_snyder_figure_1a")
+        rolling_collector = StatisticsCollector()
+        simulation(network, 100, rand_seed=17, progress_bar=False, rolling_window=True, collector=rolling_collector)
+
+        self.assertEqual(collector.summary().keys(), rolling_collector.summary().keys())
+        for key, stat in collector.statistics.items():
+            self.assertAlmostEqual(stat.mean, rolling_collector.statistics[key].mean)
+            self.assertAlmostEqual(stat.quantile(0.95), rolling_collector.statistics[key].quantile(0.95))
+
+    def test_multiple_trials(self):
+        """Test that StatisticsCollector accumulates statistics over all trials in run_multiple_trials().
+        """
+        print_status('TestStatisticsCollector', 'test_multiple_trials()')
+
+        network = load_instance("example_6_1")
+        collector = StatisticsCollector()
+        mean_cost, _ = run_multiple_trials(network, 5, 50, rand_seed=42, progress_bar=False, batch=True,
+                                           collector=collector)
+
+        self.assertEqual(collector.num_trials, 5)
+        self.assertAlmostEqual(collector.trial_cost.mean, mean_cost)
+        self.assertEqual(collector.statistic('inventory_level', 1).count, 250)
+
+        with self.assertRaises(ValueError):
+            run_multiple_trials(network, 5, 50, rand_seed=42, progress_bar=False, workers=2, collector=collector)
+
+
+if __name__ == '__main__':
+    unittest.main()
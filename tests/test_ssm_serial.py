@@ -497,6 +497,82 @@ class TestOptimizeBaseStockLevels(unittest.TestCase):
 		# Just make sure no error raised.
 		S_star, C_star = optimize_base_stock_levels(network=network)
 
+	def test_expected_C_hat(self):
+		"""Test that _expected_C_hat() matches a direct calculation, using both the
+		convolution (lattice-aligned demands) and the gather (general demands) calculations.
+		"""
+
+		print_status('TestOptimizeBaseStockLevels', 'test_expected_C_hat()')
+
+		from stockpyl.ssm_serial import _expected_C_hat
+
+		x = np.arange(-20, 40, 0.5)
+		x_ext = np.arange(-60, 80, 0.5)
+		C_hat = (x - 10) ** 2
+		C_hat_lim1 = 100 - 3 * x_ext
+		C_hat_lim2 = 5 * x_ext
+		d = np.arange(0, 15, 1.5)
+		fd = stats.poisson.pmf(np.arange(d.size), 3)
+		fd = fd / np.sum(fd)
+
+		# Lattice-aligned demands use the convolution; shifted demands use the gather.
+		for the_d in [d, d + 0.1]:
+			# Direct calculation.
+			correct_C = np.zeros(x.size)
+			for i, y in enumerate(x):
+				for d_ind in range(the_d.size):
+					if y - the_d[d_ind] < x[0]:
+						cost = C_hat_lim1[np.argmin(np.abs(x_ext - (y - the_d[d_ind])))]
+					else:
+						cost = C_hat[np.argmin(np.abs(x - (y - the_d[d_ind])))]
+					correct_C[i] += fd[d_ind] * cost
+
+			C = _expected_C_hat(x, x_ext, C_hat, C_hat_lim1, C_hat_lim2, the_d, fd)
+			np.testing.assert_allclose(C, correct_C)
+
+	def test_discretized_lead_time_demand(self):
+		"""Test that _discretized_lead_time_demand() returns the correct arrays and reuses them
+		for equal demand sources and lead times.
+		"""
+
+		print_status('TestOptimizeBaseStockLevels', 'test_discretized_lead_time_demand()')
+
+		from stockpyl.ssm_serial import _discretized_lead_time_demand
+
+		tail_prob = 1 - stats.norm.cdf(4)
+		demand_source = DemandSource(type='N', mean=5, standard_deviation=1)
+		d, fd = _discretized_lead_time_demand(demand_source, 2, tail_prob, tail_prob, 100, False)
+
+		# Direct calculation.
+		ltd_dist = stats.norm(10, np.sqrt(2))
+		d_lo = ltd_dist.ppf(tail_prob)
+		d_delta = (ltd_dist.ppf(1 - tail_prob) - d_lo) / 100
+		correct_d = np.array([d_ind * d_delta + d_lo for d_ind in range(101)])
+		correct_fd = np.array([(ltd_dist.cdf(correct_d[ind] + d_delta / 2) if ind < 100 else 1)
+							   - (ltd_dist.cdf(correct_d[ind] - d_delta / 2) if ind > 0 else 0) for ind in range(101)])
+		np.testing.assert_allclose(d, correct_d)
+		np.testing.assert_allclose(fd, correct_fd)
+		self.assertAlmostEqual(np.sum(fd), 1)
+
+		# Equal demand source: same arrays.
+		d2, fd2 = _discretized_lead_time_demand(DemandSource(type='N', mean=5, standard_deviation=1), 2,
+												tail_prob, tail_prob, 100, False)
+		self.assertIs(d2, d)
+		self.assertIs(fd2, fd)
+
+		# Different demand source or lead time: new arrays.
+		demand_source.mean = 6
+		d3, _ = _discretized_lead_time_demand(demand_source, 2, tail_prob, tail_prob, 100, False)
+		self.assertGreater(d3[0], d[0])
+		d4, _ = _discretized_lead_time_demand(demand_source, 3, tail_prob, tail_prob, 100, False)
+		self.assertGreater(d4[-1], d3[-1])
+
+		# Poisson demand: integer values.
+		demand_source = DemandSource(type='P', mean=5)
+		d, fd = _discretized_lead_time_demand(demand_source, 1, tail_prob, tail_prob, 100, True)
+		np.testing.assert_array_equal(d, np.arange(d[0], d[-1] + 1))
+		np.testing.assert_allclose(fd[1:-1], stats.poisson.pmf(d[1:-1], 5))
+
 class TestNewsvendorHeuristic(unittest.TestCase):
 
 	@classmethod
@@ -913,6 +989,97 @@ class TestExpectedCost(unittest.TestCase):
 #		self.assertAlmostEqual(cost, 2.378816200366911e+03)	# before changing sum_ltd_dist.mean() to sum_ltd_hi in optimize_base_stock_levels()
 
 
+
+class TestExpectedCostBatch(unittest.TestCase):
+
+	@classmethod
+	def set_up_class(cls):
+		"""Called once, before any tests."""
+		print_status('TestExpectedCostBatch', 'set_up_class()')
+
+	@classmethod
+	def tear_down_class(cls):
+		"""Called once, after all tests, if set_up_class successful."""
+		print_status('TestExpectedCostBatch', 'tear_down_class()')
+
+	def test_example_6_1(self):
+		"""Test that expected_cost_batch() correctly calculates costs for
+		a few different sets of BS levels for network in Example 6.1.
+		"""
+
+		print_status('TestExpectedCostBatch', 'test_example_6_1()')
+
+		instance = load_instance("example_6_1")
+
+		S_matrix = [[4, 9, 10], [10, 10, 12], [3, -1, 4], [4, 9, 12]]
+		costs = expected_cost_batch(S_matrix, network=instance, x_num=100, d_num=10,
+			ltd_lower_tail_prob=1-stats.norm.cdf(4),
+			ltd_upper_tail_prob=1-stats.norm.cdf(4),
+			sum_ltd_lower_tail_prob=1-stats.norm.cdf(4),
+			sum_ltd_upper_tail_prob=1-stats.norm.cdf(4))
+		self.assertEqual(costs.shape, (4,))
+		self.assertAlmostEqual(costs[0], 402.3432419162113)
+		self.assertAlmostEqual(costs[1], 320.6804885397852)
+		self.assertAlmostEqual(costs[2], 631.0057613782569)
+		cost = expected_cost({1: 4, 2: 9, 3: 12}, network=instance, x_num=100, d_num=10,
+			ltd_lower_tail_prob=1-stats.norm.cdf(4),
+			ltd_upper_tail_prob=1-stats.norm.cdf(4),
+			sum_ltd_lower_tail_prob=1-stats.norm.cdf(4),
+			sum_ltd_upper_tail_prob=1-stats.norm.cdf(4))
+		self.assertAlmostEqual(costs[3], cost)
+
+	def test_example_6_1_poisson(self):
+		"""Test that expected_cost_batch() gives the same costs as expected_cost()
+		for network in Example 6.1 with Poisson demands, with solutions given as dicts.
+		"""
+
+		print_status('TestExpectedCostBatch', 'test_example_6_1_poisson()')
+
+		instance = load_instance("example_6_1")
+		for n in instance.nodes:
+			if n.index == 1:
+				n.demand_source = DemandSource(type='P', mean=5)
+			else:
+				n.demand_source = None
+
+		S_list = [{1: S1, 2: S2, 3: S3} for S1 in (7, 9) for S2 in (14, 15) for S3 in (25, 26)]
+		costs = expected_cost_batch(S_list, network=instance)
+		for k, echelon_S in enumerate(S_list):
+			self.assertAlmostEqual(costs[k], expected_cost(echelon_S, network=instance))
+
+	def test_problem_6_1(self):
+		"""Test that expected_cost_batch() correctly calculates costs for
+		a few different sets of BS levels for network in Problem 6.1.
+		"""
+
+		print_status('TestExpectedCostBatch', 'test_problem_6_1()')
+
+		instance = load_instance("problem_6_1")
+
+		S_matrix = np.array([[1.242440692221066e+02, 2.287925107043527e+02], [75, 50]])
+		costs = expected_cost_batch(S_matrix, network=instance, x_num=100, d_num=10,
+			ltd_lower_tail_prob=1-stats.norm.cdf(4),
+			ltd_upper_tail_prob=1-stats.norm.cdf(4),
+			sum_ltd_lower_tail_prob=1-stats.norm.cdf(4),
+			sum_ltd_upper_tail_prob=1-stats.norm.cdf(4))
+		self.assertAlmostEqual(costs[0], 168.53138639129807)
+		self.assertAlmostEqual(costs[1], 2372.8522046052517)
+
+	def test_bad_parameters(self):
+		"""Test that expected_cost_batch() raises exceptions on bad S_matrix.
+		"""
+
+		print_status('TestExpectedCostBatch', 'test_bad_parameters()')
+
+		instance = load_instance("example_6_1")
+
+		with self.assertRaises(ValueError):
+			expected_cost_batch([[4, 9]], network=instance)
+		with self.assertRaises(ValueError):
+			expected_cost_batch([[4, None, 10]], network=instance)
+		self.assertEqual(expected_cost_batch([], network=instance).shape, (0,))
+
+
 class TestExpectedHoldingCost(unittest.TestCase):
 
 	@classmethod
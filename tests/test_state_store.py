@@ -0,0 +1,225 @@
+import unittest
+import copy
+
+import numpy as np
+
+from stockpyl.instances import load_instance
+from stockpyl.sim import simulation, initialize, step
+from stockpyl.node_state_vars import NodeStateVars
+from stockpyl.state_store import StateStore, StateVarsList, RollingStateVarsList, NodeStateVarsView
+
+
+# Module-level functions.
+
+def print_status(class_name, function_name):
+	"""Print status message."""
+	print("module : test_state_store   class : {:30s} function : {:30s}".format(class_name, function_name))
+
+
+def set_up_module():
+	"""Called once, before anything else in this module."""
+	print_status('---', 'set_up_module()')
+
+
+def tear_down_module():
+	"""Called once, after everything else in this module."""
+	print_status('---', 'tear_down_module()')
+
+
+class TestStateStore(unittest.TestCase):
+	@classmethod
+	def set_up_class(cls):
+		"""Called once, before any tests."""
+		print_status('TestStateStore', 'set_up_class()')
+
+	@classmethod
+	def tear_down_class(cls):
+		"""Called once, after all tests, if set_up_class successful."""
+		print_status('TestStateStore', 'tear_down_class()')
+
+	def test_columns_match_node_state_vars(self):
+		"""Test that the store has the same keys and pipeline lengths as NodeStateVars objects.
+		"""
+		print_status('TestStateStore', 'test_columns_match_node_state_vars()')
+
+		for instance_name in ["example_6_1", "assembly_3_stage", "rong_atan_snyder_figure_1a"]:
+			network = load_instance(instance_name)
+			store = StateStore(network, 5)
+			for n in network.nodes:
+				nsv = NodeStateVars(n, 0)
+				view = store.node_state_vars(n)[3]
+				self.assertIsInstance(view, NodeStateVars)
+				self.assertFalse(view.deep_equal_to(nsv))	# different period
+				view.period = 0
+				self.assertTrue(view.deep_equal_to(nsv))
+
+	def test_array_shapes(self):
+		"""Test that each state variable is stored in one array with one row per period.
+		"""
+		print_status('TestStateStore', 'test_array_shapes()')
+
+		network = load_instance("example_6_1")
+		store = StateStore(network, 10)
+
+		# 3 nodes, 1 product each.
+		self.assertEqual(store.values['inventory_level'].shape, (10, 3))
+		self.assertEqual(store.values['total_cost_incurred'].shape, (10, 3))
+		self.assertEqual(store.disrupted.shape, (10, 3))
+		# Shipment pipelines: one slot per period of (order + shipment) lead time, plus 1.
+		num_slots = sum((n.order_lead_time or 0) + (n.shipment_lead_time or 0) + 1 for n in network.nodes)
+		self.assertEqual(store.values['inbound_shipment_pipeline'].shape, (10, num_slots))
+
+	def test_views(self):
+		"""Test that setting state variables through the views sets them in the store and
+		that int values keep their type.
+		"""
+		print_status('TestStateStore', 'test_views()')
+
+		network = load_instance("example_6_1")
+		store = StateStore(network, 5)
+		node = network.nodes_by_index[2]
+		state_vars = store.node_state_vars(node)
+		prod = node.product_indices[0]
+
+		state_vars[2].inventory_level[prod] = 7
+		self.assertEqual(state_vars[2].inventory_level[prod], 7)
+		self.assertIsInstance(state_vars[2].inventory_level[prod], int)
+		state_vars[2].inventory_level[prod] = 7.5
+		self.assertIsInstance(state_vars[2].inventory_level[prod], float)
+		self.assertEqual(store.values['inventory_level'][2].sum(), 7.5)
+
+		state_vars[1].backorders_by_successor = {1: {prod: 4}}
+		self.assertEqual(state_vars[1].backorders_by_successor, {1: {prod: 4}})
+		self.assertEqual(state_vars[0].backorders_by_successor, {1: {prod: 0}})
+
+		rm = network.nodes_by_index[3].product_indices[0]
+		pipeline = state_vars[0].inbound_shipment_pipeline[3][rm]
+		pipeline[1] = 5
+		self.assertEqual(state_vars[0].inbound_shipment_pipeline[3][rm], [0, 5])
+		self.assertEqual(pipeline[1:] + [0], [5, 0])
+
+		state_vars[4].holding_cost_incurred = 2.5
+		self.assertEqual(state_vars[4].holding_cost_incurred, 2.5)
+		state_vars[4].disrupted = True
+		self.assertIs(state_vars[4].disrupted, True)
+
+		with self.assertRaises(KeyError):
+			state_vars[0].inventory_level[99] = 1
+		with self.assertRaises(TypeError):
+			state_vars[0].inventory_level = 3
+
+	def test_to_dict(self):
+		"""Test that to_dict() and copy.deepcopy() return ordinary dicts and NodeStateVars objects.
+		"""
+		print_status('TestStateStore', 'test_to_dict()')
+
+		network = load_instance("example_6_1")
+		simulation(network, 20, rand_seed=17, progress_bar=False)
+
+		for n in network.nodes:
+			self.assertIsInstance(n.state_vars, StateVarsList)
+			sv_dict = n.state_vars[15].to_dict()
+			self.assertIs(type(sv_dict['inbound_shipment_pipeline']), dict)
+			self.assertIs(type(sv_dict['inventory_level']), dict)
+			self.assertEqual(NodeStateVars.from_dict(sv_dict).inventory_level, n.state_vars[15].inventory_level)
+
+			sv_copy = copy.deepcopy(n.state_vars)
+			self.assertIs(type(sv_copy), list)
+			self.assertNotIsInstance(sv_copy[15], NodeStateVarsView)
+			self.assertListEqual(sv_copy, n.state_vars)
+
+	def test_advance(self):
+		"""Test that advance() shifts the pipelines and carries over ending values.
+		"""
+		print_status('TestStateStore', 'test_advance()')
+
+		network = load_instance("example_6_1")
+		initialize(network, 10, rand_seed=17)
+		for _ in range(4):
+			step(network)
+
+		store = network.sim_context.state_store
+		for n in network.nodes:
+			t = network.period
+			prod = n.product_indices[0]
+			self.assertEqual(n.state_vars[t + 1].inventory_level[prod], n.state_vars[t].inventory_level[prod])
+			for p_index, pipelines in n.state_vars[t].inbound_order_pipeline.items():
+				self.assertEqual(n.state_vars[t + 1].inbound_order_pipeline[p_index][prod],
+								 pipelines[prod][1:] + [0])
+
+		self.assertAlmostEqual(store.total('total_cost_incurred'),
+							   np.sum([n.state_vars[t].total_cost_incurred for n in network.nodes
+									   for t in range(len(n.state_vars))]))
+
+
+class TestRollingWindow(unittest.TestCase):
+	@classmethod
+	def set_up_class(cls):
+		"""Called once, before any tests."""
+		print_status('TestRollingWindow', 'set_up_class()')
+
+	@classmethod
+	def tear_down_class(cls):
+		"""Called once, after all tests, if set_up_class successful."""
+		print_status('TestRollingWindow', 'tear_down_class()')
+
+	def test_same_results(self):
+		"""Test that rolling-window mode gives the same total cost and final state variables as
+		storing all periods.
+		"""
+		print_status('TestRollingWindow', 'test_same_results()')
+
+		for instance_name in ["example_6_1", "assembly_3_stage", "problem_6_16", "rong_atan_snyder_figure_1a"]:
+			network = load_instance(instance_name)
+			total_cost = simulation(network, 100, rand_seed=17, progress_bar=False)
+			rolling_network = load_instance(instance_name)
+			rolling_total_cost = simulation(rolling_network, 100, rand_seed=17, progress_bar=False,
+											rolling_window=True)
+			self.assertAlmostEqual(total_cost, rolling_total_cost)
+
+			for n in network.nodes:
+				rolling_n = rolling_network.nodes_by_index[n.index]
+				self.assertIsInstance(rolling_n.state_vars, RollingStateVarsList)
+				for t in rolling_n.state_vars.periods:
+					self.assertTrue(rolling_n.state_vars[t].deep_equal_to(n.state_vars[t]))
+
+	def test_memory(self):
+		"""Test that the arrays have one row per period in the window.
+		"""
+		print_status('TestRollingWindow', 'test_memory()')
+
+		network = load_instance("example_6_1")
+		initialize(network, 1000, rand_seed=17, rolling_window=True)
+		store = network.sim_context.state_store
+
+		# Window = max order lead time + max shipment lead time + 2.
+		window = max(n.order_lead_time or 0 for n in network.nodes) \
+			+ max(n.shipment_lead_time or 0 for n in network.nodes) + 2
+		self.assertEqual(store.window, window)
+		self.assertEqual(store.values['inventory_level'].shape, (window, 3))
+		self.assertEqual(store.values['total_cost_incurred'].shape, (window, 3))
+
+	def test_totals(self):
+		"""Test that totals include the periods that have left the window and that those periods
+		cannot be accessed.
+		"""
+		print_status('TestRollingWindow', 'test_totals()')
+
+		network = load_instance("example_6_1")
+		simulation(network, 50, rand_seed=17, progress_bar=False)
+		rolling_network = load_instance("example_6_1")
+		simulation(rolling_network, 50, rand_seed=17, progress_bar=False, rolling_window=True)
+
+		for n in network.nodes:
+			rolling_n = rolling_network.nodes_by_index[n.index]
+			for attr in ('inventory_level', 'backorders_by_successor', 'inbound_order', 'total_cost_incurred'):
+				self.assertAlmostEqual(n._get_state_var_total(attr, None),
+									   rolling_n._get_state_var_total(attr, None))
+
+			self.assertListEqual(list(rolling_n.state_vars.periods), [47, 48, 49, 50])
+			with self.assertRaises(IndexError):
+				_ = rolling_n.state_vars[10]
+
+
+if __name__ == '__main__':
+	unittest.main()
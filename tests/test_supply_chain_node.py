@@ -262,6 +262,37 @@ class TestGetAttribute(unittest.TestCase):
 		with self.assertRaises(ValueError):
 			node.get_attribute('local_holding_cost', None)
 
+	def test_cache_invalidation(self):
+		"""Test that get_attribute() returns new values after node and product attributes are set.
+		"""
+		print_status('TestGetAttribute', 'test_cache_invalidation()')
+
+		node = SupplyChainNode(index=0, local_holding_cost=2)
+		prod0 = SupplyChainProduct(index=0, stockout_cost=10)
+		prod1 = SupplyChainProduct(index=1, stockout_cost=20)
+		node.add_products([prod0, prod1])
+
+		self.assertEqual(node.get_attribute('local_holding_cost', 0), 2)
+		self.assertEqual(node.get_attribute('stockout_cost', 1), 20)
+
+		node.local_holding_cost = 3
+		self.assertEqual(node.get_attribute('local_holding_cost', 0), 3)
+		prod1.stockout_cost = 25
+		self.assertEqual(node.get_attribute('stockout_cost', 1), 25)
+
+		# Setting the attribute at the node overrides the product's value.
+		node.stockout_cost = 30
+		self.assertEqual(node.get_attribute('stockout_cost', 1), 30)
+		node.stockout_cost = None
+		self.assertEqual(node.get_attribute('stockout_cost', 1), 25)
+
+		prod2 = SupplyChainProduct(index=2, stockout_cost=40)
+		node.add_product(prod2)
+		self.assertEqual(node.get_attribute('stockout_cost', 2), 40)
+		node.remove_product(prod2)
+		self.assertEqual(node.product_indices, [0, 1])
+		self.assertEqual(node.get_attribute('stockout_cost', 1), 25)
+
 
 class TestHasExternalSupplierCustomer(unittest.TestCase):
 	@classmethod
@@ -1763,6 +1794,47 @@ class TestRawMaterials(unittest.TestCase):
 			_ = nodes[0].raw_material_suppliers_by_raw_material(raw_material=77, return_indices=True, network_BOM=False)
 			_ = nodes[0].raw_material_suppliers_by_raw_material(raw_material=77, network_BOM=False)
 			_ = nodes[4].raw_material_suppliers_by_raw_material(raw_material=nodes[4]._external_supplier_dummy_product.index, return_indices=True, network_BOM=False)
+
+	def test_structure_changes(self):
+		"""Test that the raw material functions return updated results after products, BOMs, and
+		predecessors change.
+		"""
+		print_status('TestRawMaterials', 'test_structure_changes()')
+
+		network = mwor_system(3)
+		nodes = {i: network.nodes_by_index[i] for i in network.node_indices}
+
+		prods = {i: SupplyChainProduct(i) for i in range(0, 6)}
+		nodes[1].add_products([prods[1], prods[2]])
+		nodes[2].add_products([prods[2], prods[3]])
+		nodes[3].add_products([prods[4], prods[5]])
+
+		self.assertCountEqual(nodes[0].raw_materials_by_product(product='all', return_indices=True), [1, 2, 3, 4, 5])
+		self.assertCountEqual(nodes[0].raw_material_suppliers_by_raw_material(raw_material=2, return_indices=True), [1, 2])
+		self.assertCountEqual(nodes[1].customers_by_product(product=1, return_indices=True), [0])
+
+		# Add product with BOM at node 0.
+		prods[0].set_bill_of_materials(raw_material=1, num_needed=2)
+		nodes[0].add_product(prods[0])
+		self.assertCountEqual(nodes[0].raw_materials_by_product(product='all', return_indices=True), [1, 2, 3, 4, 5])
+		self.assertCountEqual(nodes[0].raw_materials_by_product(product='all', return_indices=True, network_BOM=False), [1])
+		self.assertEqual(nodes[0].NBOM(product=0, predecessor=1, raw_material=1), 2)
+		self.assertEqual(nodes[0].NBOM(product=0, predecessor=1, raw_material=2), 0)
+
+		# Change BOM.
+		prods[0].set_bill_of_materials(raw_material=1, num_needed=3)
+		prods[0].set_bill_of_materials(raw_material=4, num_needed=1)
+		self.assertCountEqual(nodes[0].raw_materials_by_product(product='all', return_indices=True), [1, 2, 3, 4])
+		self.assertCountEqual(nodes[0].raw_materials_by_product(product='all', return_indices=True, network_BOM=False), [1, 4])
+		self.assertEqual(nodes[0].NBOM(product=0, predecessor=1, raw_material=1), 3)
+		self.assertCountEqual(nodes[0].products_by_raw_material(raw_material=4, return_indices=True), [0])
+		self.assertCountEqual(nodes[3].customers_by_product(product=4, return_indices=True), [0])
+		self.assertCountEqual(nodes[3].customers_by_product(product=5, return_indices=True), [])
+
+		# Remove predecessor.
+		network.remove_node(nodes[3])
+		self.assertCountEqual(nodes[0].raw_materials_by_product(product='all', return_indices=True), [1, 2, 3])
+		self.assertCountEqual(nodes[0].raw_material_suppliers_by_product(product=0, return_indices=True), [1, 2])
 		
 		
 class TestProductsByRawMaterial(unittest.TestCase):
@@ -1,5 +1,7 @@
 import unittest
 
+import numpy as np
+
 from stockpyl.wagner_whitin import *
 from stockpyl.instances import *
 
@@ -155,6 +157,111 @@ class TestWagnerWhitin(unittest.TestCase):
 		with self.assertRaises(ValueError):
 			wagner_whitin(num_periods, holding_cost, fixed_cost, demand)
 
+	def test_long_instance(self):
+		"""Test that wagner_whitin function gives the same solution as a direct
+		evaluation of the DP on a longer instance, with stationary and nonstationary
+		holding and purchase costs.
+		"""
+		print_status('TestWagnerWhitin', 'test_long_instance()')
+
+		num_periods = 40
+		demand = [0, 50, 0, 0, 120, 80, 0, 30, 200, 10, 0, 0, 0, 90, 60, 60, 0, 150, 40, 0, 0,
+				  70, 0, 110, 20, 0, 0, 0, 0, 130, 90, 0, 10, 0, 80, 80, 0, 0, 50, 0, 100]
+		fixed_cost = [0] + [300, 250, 400] * 13 + [300]
+		for holding_cost, purchase_cost in [(1, 0), (2, [0] + [5, 3, 4, 6] * 10),
+											([0] + [1, 2] * 20, 2)]:
+			h = ensure_list_for_time_periods(holding_cost, num_periods)
+			c = ensure_list_for_time_periods(purchase_cost, num_periods)
+
+			# Evaluate DP directly.
+			theta = [0] * (num_periods+2)
+			s = [0] * (num_periods+1)
+			for t in range(num_periods, 0, -1):
+				costs = [fixed_cost[t] * (sum(demand[t:ss]) > 0)
+						 + sum((c[t] + h[t] * (i - t)) * demand[i] for i in range(t, ss)) + theta[ss]
+						 for ss in range(t+1, num_periods+2)]
+				theta[t] = min(costs)
+				s[t] = t + 1 + costs.index(theta[t])
+
+			order_quantities, cost, costs_to_go, next_order_periods = \
+				wagner_whitin(num_periods, holding_cost, fixed_cost, demand, purchase_cost)
+			self.assertEqual(next_order_periods, s)
+			self.assertEqual(cost, theta[1])
+			np.testing.assert_array_equal(costs_to_go, theta)
+
+	def test_near_ties(self):
+		"""Test that wagner_whitin and wagner_whitin_batch functions choose the earliest
+		next order period among those whose costs differ only by rounding errors.
+		"""
+		print_status('TestWagnerWhitin', 'test_near_ties()')
+
+		demand = [19, 0, 6, 8, 9, 16, 31, 45]
+		order_quantities, cost, _, next_order_periods = wagner_whitin(8, 0.7, 25, demand)
+		self.assertEqual(order_quantities, [0, 25, 0, 0, 17, 0, 47, 0, 45])
+		self.assertEqual(next_order_periods, [0, 4, 3, 6, 6, 7, 8, 8, 9])
+		self.assertAlmostEqual(cost, 136.4)
+
+		order_quantities, cost, _, next_order_periods = wagner_whitin_batch(8, 0.7, 25, [demand])
+		np.testing.assert_array_equal(order_quantities[0], [0, 25, 0, 0, 17, 0, 47, 0, 45])
+		self.assertAlmostEqual(cost[0], 136.4)
+
+
+class TestWagnerWhitinBatch(unittest.TestCase):
+	@classmethod
+	def set_up_class(cls):
+		"""Called once, before any tests."""
+		print_status('TestWagnerWhitinBatch', 'set_up_class()')
+
+	@classmethod
+	def tear_down_class(cls):
+		"""Called once, after all tests, if set_up_class successful."""
+		print_status('TestWagnerWhitinBatch', 'tear_down_class()')
+
+	def test_matches_wagner_whitin(self):
+		"""Test that wagner_whitin_batch function gives the same solutions as
+		wagner_whitin for each item.
+		"""
+		print_status('TestWagnerWhitinBatch', 'test_matches_wagner_whitin()')
+
+		num_periods = 5
+		holding_cost = [[0.1], [2], [1]]
+		fixed_cost = [[100], [500], [0]]
+		demand = [[730, 580, 445, 650, 880], [90, 120, 0, 80, 70], [0, 0, 0, 0, 7]]
+		purchase_cost = [[0, 0, 0, 0, 0], [0, 0, 0, 0, 0], [3, 2, 1, 2, 3]]
+
+		order_quantities, cost, costs_to_go, next_order_periods = \
+			wagner_whitin_batch(num_periods, holding_cost, fixed_cost, demand, purchase_cost)
+
+		for i in range(3):
+			order_quantities2, cost2, costs_to_go2, next_order_periods2 = \
+				wagner_whitin(num_periods, holding_cost[i][0], fixed_cost[i][0], demand[i], purchase_cost[i])
+			self.assertListEqual(list(order_quantities[i]), order_quantities2)
+			self.assertListEqual(list(next_order_periods[i]), next_order_periods2)
+			self.assertAlmostEqual(cost[i], cost2)
+			np.testing.assert_allclose(costs_to_go[i], costs_to_go2)
+
+		# Nonstationary holding costs.
+		holding_cost = [[1, 2, 1, 2, 1], [2, 2, 2, 2, 2], [1, 1, 3, 1, 1]]
+		order_quantities, cost, costs_to_go, next_order_periods = \
+			wagner_whitin_batch(num_periods, holding_cost, fixed_cost, demand, purchase_cost)
+		for i in range(3):
+			order_quantities2, cost2, costs_to_go2, next_order_periods2 = \
+				wagner_whitin(num_periods, holding_cost[i], fixed_cost[i][0], demand[i], purchase_cost[i])
+			self.assertListEqual(list(order_quantities[i]), order_quantities2)
+			self.assertListEqual(list(next_order_periods[i]), next_order_periods2)
+			self.assertAlmostEqual(cost[i], cost2)
+
+	def test_bad_parameters(self):
+		"""Test that wagner_whitin_batch function raises exceptions on bad parameters.
+		"""
+		print_status('TestWagnerWhitinBatch', 'test_bad_parameters()')
+
+		with self.assertRaises(ValueError):
+			wagner_whitin_batch(5, 1, 100, [10, 20, 30])
+		with self.assertRaises(ValueError):
+			wagner_whitin_batch(5, [[1], [-1]], 100, 50)
+		with self.assertRaises(ValueError):
+			wagner_whitin_batch(5, 1, 100, [[10, 20, 30, -40, 50]])
 
 class TestPreviousBugs(unittest.TestCase):
 	"""Test issues that have previously failed due to bugs."""